@@ -1,15 +1,31 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import Literal
+from datetime import datetime
 import numpy as np
+import json
 import sys
 import os
+import threading
+
+try:
+    import orjson  # optional: faster response encoding, falls back to json
+except ImportError:
+    orjson = None
 
 # Make backend importable
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
 from backend.engine.decision_engine import DecisionEngine
+from backend.engine.decision_journal import DecisionJournal
+from backend.engine.delta_time_store import GLOBAL_STREAM, DeltaTimeStore
+from backend.engine.inference_pool import InferencePool, PoolSaturated
+from backend.engine.micro_batcher import MicroBatcher
+from backend.engine.prediction_cache import PredictionCache
 
 app = FastAPI(title="Risk-Aware Fraud Decision API")
 
@@ -24,11 +40,353 @@ app.add_middleware(
 )
 
 # ── Engine (loaded once at startup) ───────────────────────────────────────
-engine = DecisionEngine()
+# MARI_ENSEMBLE_BACKEND=fused serves the ensemble from the NumPy tree evaluator
+# exported by scripts/export_fused_ensemble.py.
+# MARI_ANOMALY_BACKEND=packed scores novelty with the packed NumPy Isolation Forest.
+# MARI_SVM_BACKEND=linear scores the V2/V3 SVM with the closed-form linear scorer.
+# MARI_CASCADE=1 skips the full models for provably-legitimate rows. Those rows carry
+# trace.fast_path=true and report bounds: risk_score/uncertainty are upper bounds. It
+# pays off on single rows with the sklearn ensemble or forest; with fused + packed the
+# bounds cost about as much as the full models.
+# MARI_SHAP_LOAD: "background" (default) builds the SHAP explainer after startup,
+# "lazy" on the first PEND row, "eager" before the app is importable.
+# MARI_EXPLAINER_BACKEND=path explains PEND rows with the precompiled path TreeSHAP.
+# MARI_ENSEMBLE_MODE=anytime evaluates ensemble members one at a time and stops per row
+# once the V1 route is settled: at least MARI_ANYTIME_MIN_MEMBERS (default 5), stopping
+# at MARI_ANYTIME_Z standard errors (default 3). Useful with 10-50 member ensembles.
+# MARI_METRICS=0 turns off the per-stage latency histograms and routing counters
+# served on /metrics.
+# MARI_MODEL_BUNDLE=<path> serves every model from one memory-mapped bundle written by
+# scripts/export_model_bundle.py instead of the pickles (the backend settings above are
+# then fused/packed/linear/path). MARI_BUNDLE_VERIFY=0 skips its checksum at startup.
+SHAP_LOAD = os.environ.get("MARI_SHAP_LOAD", "background")
+if SHAP_LOAD not in ("background", "lazy", "eager"):
+    raise ValueError(f"Unknown MARI_SHAP_LOAD: {SHAP_LOAD}")
+
+engine = DecisionEngine(
+    ensemble_backend=os.environ.get("MARI_ENSEMBLE_BACKEND", "sklearn"),
+    anomaly_backend=os.environ.get("MARI_ANOMALY_BACKEND", "sklearn"),
+    svm_backend=os.environ.get("MARI_SVM_BACKEND", "exact"),
+    cascade=os.environ.get("MARI_CASCADE", "0") == "1",
+    explainer_mode="eager" if SHAP_LOAD == "eager" else "lazy",
+    explainer_backend=os.environ.get("MARI_EXPLAINER_BACKEND", "shap"),
+    ensemble_mode=os.environ.get("MARI_ENSEMBLE_MODE", "full"),
+    anytime_min_members=int(os.environ.get("MARI_ANYTIME_MIN_MEMBERS", "5")),
+    anytime_z=float(os.environ.get("MARI_ANYTIME_Z", "3")),
+    collect_metrics=os.environ.get("MARI_METRICS", "1") == "1",
+    bundle_path=os.environ.get("MARI_MODEL_BUNDLE") or None,
+    verify_bundle=os.environ.get("MARI_BUNDLE_VERIFY", "1") == "1",
+)
+
+
+# ── Inference pool ────────────────────────────────────────────────────────
+# MARI_INFERENCE_POOL: "off" (default) runs scoring on Starlette's shared threadpool;
+# "thread" or "process" run it on a bounded pool of MARI_INFERENCE_WORKERS workers
+# (default: one per core) with up to MARI_INFERENCE_QUEUE requests waiting. Requests
+# beyond that get 503 with Retry-After: MARI_RETRY_AFTER_SECS instead of queueing.
+# "process" forks the workers at startup, after the models (and, unless
+# MARI_SHAP_LOAD=lazy, the explainer) are loaded, so they share them copy-on-write.
+POOL_MODE = os.environ.get("MARI_INFERENCE_POOL", "off")
+if POOL_MODE not in ("off",) + InferencePool.MODES:
+    raise ValueError(f"Unknown MARI_INFERENCE_POOL: {POOL_MODE}")
+RETRY_AFTER_SECS = int(os.environ.get("MARI_RETRY_AFTER_SECS", "1"))
+
+pool = None
+if POOL_MODE != "off":
+    pool = InferencePool(
+        engine,
+        mode=POOL_MODE,
+        workers=int(os.environ.get("MARI_INFERENCE_WORKERS", "0")) or None,
+        max_queue=int(os.environ.get("MARI_INFERENCE_QUEUE", "64")),
+    )
+
+# ── Micro-batching ────────────────────────────────────────────────────────
+# MARI_MICRO_BATCH=1 collects concurrent single-row /predict calls for up to
+# MARI_BATCH_WINDOW_MS (default 2) or MARI_BATCH_MAX_ROWS rows (default 64) and scores
+# them as one matrix, with up to MARI_BATCH_CONCURRENCY batches scoring at once
+# (default: one per pool worker, 1 without a pool). /health reports batch sizes,
+# queueing delay, latency and throughput.
+batcher = None
+if os.environ.get("MARI_MICRO_BATCH", "0") == "1":
+    batcher = MicroBatcher(
+        lambda raw_X, version: _score("evaluate_batch_records", raw_X, version),
+        max_rows=int(os.environ.get("MARI_BATCH_MAX_ROWS", "64")),
+        window_ms=float(os.environ.get("MARI_BATCH_WINDOW_MS", "2")),
+        max_concurrent=int(os.environ.get("MARI_BATCH_CONCURRENCY", "0")) or (pool.workers if pool else 1),
+    )
+
+# ── delta_time state ──────────────────────────────────────────────────────
+# MARI_DELTA_TIME: "off" (default) expects clients to send delta_time as feature 31.
+# "global" or "partition" record every request's Time and derive delta_time on the
+# server for requests that send only [Time, V1..V28, Amount]: Time minus the previous
+# Time of the whole stream ("global") or of the request's `stream` key ("partition").
+# MARI_DELTA_LATENESS_SECS (default 60) is how far out of order events may arrive.
+# MARI_DELTA_SNAPSHOT names an .npz restored at startup and rewritten at shutdown and
+# every MARI_DELTA_SNAPSHOT_EVERY events (default 10000).
+DELTA_MODE = os.environ.get("MARI_DELTA_TIME", "off")
+if DELTA_MODE not in ("off", "global", "partition"):
+    raise ValueError(f"Unknown MARI_DELTA_TIME: {DELTA_MODE}")
+DELTA_SNAPSHOT = os.environ.get("MARI_DELTA_SNAPSHOT")
+DELTA_SNAPSHOT_EVERY = int(os.environ.get("MARI_DELTA_SNAPSHOT_EVERY", "10000"))
+
+delta_store = None
+if DELTA_MODE != "off":
+    lateness = float(os.environ.get("MARI_DELTA_LATENESS_SECS", "60"))
+    if DELTA_SNAPSHOT and os.path.exists(DELTA_SNAPSHOT):
+        delta_store = DeltaTimeStore.load(DELTA_SNAPSHOT, lateness=lateness)
+        print(f"[api] Restored delta_time state for {len(delta_store):,} streams from {DELTA_SNAPSHOT}")
+    else:
+        delta_store = DeltaTimeStore(lateness=lateness)
+
+# ── Decision journal ──────────────────────────────────────────────────────
+# MARI_JOURNAL_DIR turns on the audit log: every scored row (raw features, scores,
+# V1-V4 trace, costs) is queued and written by a background thread every
+# MARI_JOURNAL_FLUSH_MS (default 200) into packed segments of MARI_JOURNAL_SEGMENT_ROWS
+# rows (default 1,000,000). Beyond MARI_JOURNAL_CAPACITY queued rows (default 65536)
+# rows are dropped and counted instead of slowing requests. Read it back with
+# backend.engine.decision_journal.journal_frame or scripts/journal_report.py.
+journal = None
+if os.environ.get("MARI_JOURNAL_DIR"):
+    journal = DecisionJournal(
+        os.environ["MARI_JOURNAL_DIR"],
+        model_digests=engine.registry.digests,
+        shap_feature_names=engine.feature_cols,
+        capacity=int(os.environ.get("MARI_JOURNAL_CAPACITY", "65536")),
+        flush_ms=float(os.environ.get("MARI_JOURNAL_FLUSH_MS", "200")),
+        segment_rows=int(os.environ.get("MARI_JOURNAL_SEGMENT_ROWS", "1000000")),
+    )
+
+# ── Prediction cache ──────────────────────────────────────────────────────
+# MARI_PREDICTION_CACHE=1 answers repeated single-row /predict calls (gateway retries,
+# card-testing bursts) from a cache of up to MARI_CACHE_MAX_MB of results (default 64)
+# kept MARI_CACHE_TTL_SECS (default 300). MARI_CACHE_QUANTIZE=<decimals> rounds rows
+# before keying, so near-identical rows share a result. MARI_CACHE_POLICY: "tinylfu"
+# (default) or "lru". The cache empties itself when thresholds, artifacts or the SHAP
+# explainer status change, and PEND results without explanations are not cached (pool
+# workers may load SHAP without this process noticing). Hits skip the engine, so
+# /metrics stage counts cover misses.
+prediction_cache = None
+if os.environ.get("MARI_PREDICTION_CACHE", "0") == "1":
+    quantize = os.environ.get("MARI_CACHE_QUANTIZE")
+    prediction_cache = PredictionCache(
+        engine,
+        max_bytes=int(float(os.environ.get("MARI_CACHE_MAX_MB", "64")) * (1 << 20)),
+        ttl_secs=float(os.environ.get("MARI_CACHE_TTL_SECS", "300")),
+        quantize_decimals=int(quantize) if quantize else None,
+        policy=os.environ.get("MARI_CACHE_POLICY", "tinylfu"),
+    )
+
+
+@app.on_event("startup")
+def start_serving():
+    if POOL_MODE == "process" and SHAP_LOAD == "background":
+        # Forking while the loader thread is mid-build would leave every worker a
+        # half-built explainer; build it before the fork so the workers inherit it
+        try:
+            engine.load_explainer()
+        except Exception as exc:
+            print(f"[api] SHAP explainer failed to load: {exc}")
+    elif SHAP_LOAD == "background":
+        engine.start_explainer_loading()
+    if pool is not None:
+        pool.start()
+    if journal is not None:
+        journal.start()
+
+
+def _stop_serving():
+    if pool is not None:
+        pool.shutdown()
+    if delta_store is not None and DELTA_SNAPSHOT:
+        delta_store.save(DELTA_SNAPSHOT)
+    if journal is not None:
+        journal.close()
+
+
+@app.on_event("shutdown")
+async def stop_serving():
+    # Pool shutdown, the delta_time snapshot and the journal flush all block
+    await run_in_threadpool(_stop_serving)
+
+
+N_FEATURES = 31
+MAX_BATCH_ROWS = int(os.environ.get("MARI_MAX_BATCH_ROWS", "100000"))
+
+ARROW_MEDIA_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file")
 
 
 class TransactionInput(BaseModel):
-    features: list[float]  # must be length 31
+    features: list[float]  # must be length 31 (30, without delta_time, when MARI_DELTA_TIME is on)
+    stream: str | None = None  # delta_time partition key for MARI_DELTA_TIME=partition
+
+
+# ── Responses ─────────────────────────────────────────────────────────────
+# MARI_RESPONSE_SHAPE sets the default /predict payload (overridable per request with
+# ?shape=): "minimal" is the decision, scores, tier and costs; "standard" (default) adds
+# the explanations, the trace without its copy of the SHAP features and meta without
+# the timestamp; "full_trace" is the engine's result as is.
+ResponseShape = Literal["minimal", "standard", "full_trace"]
+RESPONSE_SHAPES = ("minimal", "standard", "full_trace")
+DEFAULT_SHAPE = os.environ.get("MARI_RESPONSE_SHAPE", "standard")
+if DEFAULT_SHAPE not in RESPONSE_SHAPES:
+    raise ValueError(f"Unknown MARI_RESPONSE_SHAPE: {DEFAULT_SHAPE}")
+
+MINIMAL_KEYS = ("decision", "risk_score", "uncertainty", "novelty_flag", "tier", "costs")
+
+
+class FeatureContribution(BaseModel):
+    feature: str
+    value: float
+    direction: str
+
+
+class Costs(BaseModel):
+    expected_loss: float
+    manual_review_cost: float
+    net_utility: float
+
+
+class Explanations(BaseModel):
+    anomaly_score: float | None
+    top_features: list[FeatureContribution]
+
+
+class Trace(BaseModel):
+    v1_decision: str
+    v2_decision: str
+    v3_decision: str
+    v4_decision: str
+    v2_svm_prob: float
+    v3_svm_prob: float
+    ds_bel_F: float
+    ds_ignorance: float
+    ds_conflict_K: float
+    pend_origin: str | None
+    shap_reason_code: str | None
+    shap_features: list[FeatureContribution] | None = None  # full_trace only
+    fast_path: bool | None = None  # only with MARI_CASCADE=1; true means the scores are bounds
+
+
+class Meta(BaseModel):
+    model_version: str
+    uncertainty_method: str
+    timestamp: str | None = None  # full_trace only
+
+
+class PredictResponse(BaseModel):
+    # Documents the payload; responses are encoded directly, not validated against it
+    decision: str
+    risk_score: float
+    uncertainty: float
+    novelty_flag: bool
+    tier: str
+    costs: Costs
+    explanations: Explanations | None = None  # standard, full_trace
+    trace: Trace | None = None  # standard, full_trace
+    meta: Meta | None = None  # standard, full_trace
+
+
+class FastJSONResponse(JSONResponse):
+    """Compact JSON, encoded with orjson when it is installed."""
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _shape(result: dict, shape: str) -> dict:
+    """Cut an evaluate_transaction result down to the requested response shape."""
+    if shape == "full_trace" or "error" in result:
+        return result
+    out = {key: result[key] for key in MINIMAL_KEYS}
+    if shape == "standard":
+        out["explanations"] = result["explanations"]
+        out["trace"] = {k: v for k, v in result["trace"].items() if k != "shap_features"}
+        out["meta"] = {k: v for k, v in result["meta"].items() if k != "timestamp"}
+    return out
+
+
+def _error(message: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def _read_arrow(body: bytes) -> np.ndarray:
+    import pyarrow as pa  # optional: only needed for Arrow IPC bodies
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_file(body).read_all()
+    return np.column_stack([col.to_numpy().astype("<f8") for col in table.columns])
+
+
+def _parse_batch(body: bytes, content_type: str, width: int = N_FEATURES) -> np.ndarray:
+    """
+    Decode an N x 31 feature matrix from a /predict/batch body:
+      - application/json          {"features": [[...31 floats...], ...]} or a bare array of arrays
+      - application/octet-stream  raw little-endian float64, row-major, `width` columns
+      - Arrow IPC (stream or file) with 31 numeric columns
+    """
+    if content_type == "application/octet-stream":
+        if len(body) % (8 * width):
+            raise ValueError(
+                f"Binary body of {len(body)} bytes is not a whole number of {width}-feature "
+                f"float64 rows ({8 * width} bytes each); set the width with ?width= or X-Feature-Count"
+            )
+        return np.frombuffer(body, dtype="<f8").reshape(-1, width)
+    if content_type in ARROW_MEDIA_TYPES:
+        return _read_arrow(body)
+
+    payload = json.loads(body)
+    rows = payload["features"] if isinstance(payload, dict) else payload
+    return np.asarray(rows, dtype=float)
+
+
+def _overloaded() -> JSONResponse:
+    return JSONResponse(
+        {"error": "Inference queue is full, retry later"},
+        status_code=503,
+        headers={"Retry-After": str(RETRY_AFTER_SECS)},
+    )
+
+
+async def _score(method: str, *args):
+    """Run engine.<method>(*args) off the event loop: on the pool when configured."""
+    if pool is None:
+        return await run_in_threadpool(getattr(engine, method), *args)
+    return await pool.submit(method, *args)
+
+
+def _accepted_widths() -> tuple:
+    return (N_FEATURES - 1, N_FEATURES) if delta_store is not None else (N_FEATURES,)
+
+
+def _delta_stream(stream: str | None) -> str:
+    return stream if DELTA_MODE == "partition" and stream else GLOBAL_STREAM
+
+
+def _with_delta_time(raw_X: np.ndarray, stream: str | None) -> np.ndarray:
+    """
+    Record each row's Time; rows without delta_time get the derived value appended.
+    Periodic snapshots are written on their own thread, off the request path.
+    """
+    before = delta_store.n_events
+    deltas = delta_store.observe_many(raw_X[:, 0], _delta_stream(stream))
+    if DELTA_SNAPSHOT and before // DELTA_SNAPSHOT_EVERY != delta_store.n_events // DELTA_SNAPSHOT_EVERY:
+        threading.Thread(target=delta_store.save, args=(DELTA_SNAPSHOT,), name="delta-snapshot", daemon=True).start()
+    if raw_X.shape[1] == N_FEATURES - 1:
+        raw_X = np.column_stack([raw_X, deltas])
+    return raw_X
+
+
+def _to_columns(value):
+    # numpy arrays -> plain lists so the result serializes without per-element encoding
+    if isinstance(value, dict):
+        return {k: _to_columns(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
 
 
 @app.get("/")
@@ -38,12 +396,104 @@ def root():
 
 @app.get("/health")
 def health(version: str = "V4"):
-    return {"status": "ok", "model": f"xgb_ensemble_{version.lower()}"}
+    # Scoring is ready once the module has imported; SHAP explanations for PEND rows
+    # may still be loading ("loading"/"not_loaded"), or be "unavailable"/"failed".
+    return {
+        "status": "ok",
+        "model": f"xgb_ensemble_{version.lower()}",
+        "scoring_ready": True,
+        "explanations_ready": engine.explanations_ready,
+        "explanations": engine.explainer_status,
+        "inference_pool": pool.stats() if pool is not None else None,
+        "micro_batcher": batcher.stats() if batcher is not None else None,
+        "delta_time": delta_store.stats() if delta_store is not None else None,
+        "decision_journal": journal.stats() if journal is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        # Counted in this process: process-pool workers keep their own counters
+        "anytime_ensemble": engine.anytime_ensemble.stats() if engine.anytime_ensemble is not None else None,
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text format. Counted in this process: process-pool workers keep their own
+    if engine.metrics is None:
+        return PlainTextResponse("# metrics disabled (MARI_METRICS=0)\n", status_code=404)
+    text = engine.metrics.render_prometheus()
+    if prediction_cache is not None:
+        text += prediction_cache.render_prometheus()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
 
 
-@app.post("/predict")
-def predict(txn: TransactionInput, version: str = "V4"):
-    if len(txn.features) != 31:
-        return {"error": "Expected 31 features"}
+@app.post("/predict", response_model=PredictResponse)
+async def predict(txn: TransactionInput, version: str = "V4", shape: ResponseShape = DEFAULT_SHAPE):
+    if len(txn.features) not in _accepted_widths():
+        return FastJSONResponse({"error": f"Expected {' or '.join(map(str, _accepted_widths()))} features"})
     features = np.array(txn.features).reshape(1, -1)
-    return engine.evaluate_transaction(features, version=version)
\ No newline at end of file
+    if prediction_cache is not None:
+        # Keyed on the row as sent, before delta_time is derived: a retried row hits and
+        # is not recorded in its stream a second time
+        key = prediction_cache.key(features, version, _delta_stream(txn.stream) if delta_store is not None else None)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            scored, result = cached
+            if shape == "full_trace":
+                result = dict(result, meta=dict(result["meta"], timestamp=str(datetime.utcnow())))
+            if journal is not None:
+                journal.record(scored, version, result)
+            return FastJSONResponse(_shape(result, shape), headers={"X-Cache": "HIT"})
+    if delta_store is not None:
+        features = _with_delta_time(features, txn.stream)
+    try:
+        if batcher is not None:
+            result = await batcher.submit(features, version)
+        else:
+            result = await _score("evaluate_transaction", features, version)
+    except PoolSaturated:
+        return _overloaded()
+    if journal is not None:
+        journal.record(features, version, result)
+    if prediction_cache is not None:
+        if prediction_cache.cacheable(result):
+            prediction_cache.put(key, (features, result))
+        return FastJSONResponse(_shape(result, shape), headers={"X-Cache": "MISS"})
+    return FastJSONResponse(_shape(result, shape))
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request, version: str = "V4", stream: str | None = None, width: str | None = None):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    n_columns = N_FEATURES
+    if content_type == "application/octet-stream":
+        # Binary bodies carry no shape: the row width comes from ?width= or X-Feature-Count
+        requested = width or request.headers.get("x-feature-count") or str(N_FEATURES)
+        if not requested.strip().isdigit() or int(requested) not in _accepted_widths():
+            widths = " or ".join(map(str, _accepted_widths()))
+            return _error(f"Binary feature count must be {widths}, got {requested!r}")
+        n_columns = int(requested)
+    body = await request.body()
+    try:
+        raw_X = _parse_batch(body, content_type, n_columns)
+    except ImportError:
+        return _error("Arrow IPC bodies require pyarrow on the server", status_code=415)
+    except (ValueError, KeyError, TypeError) as exc:
+        return _error(f"Could not decode feature matrix: {exc}")
+
+    if raw_X.ndim != 2 or raw_X.shape[1] not in _accepted_widths():
+        widths = " or ".join(map(str, _accepted_widths()))
+        return _error(f"Expected an N x {widths} feature matrix, got shape {raw_X.shape}")
+    if raw_X.shape[0] == 0:
+        return _error("Empty batch")
+    if raw_X.shape[0] > MAX_BATCH_ROWS:
+        return _error(f"Batch of {raw_X.shape[0]} rows exceeds the {MAX_BATCH_ROWS} row limit", status_code=413)
+    if delta_store is not None:
+        # One observe() per row: keep large batches off the event loop
+        raw_X = await run_in_threadpool(_with_delta_time, raw_X, stream)
+
+    try:
+        batch = await _score("evaluate_batch", raw_X, version)
+    except PoolSaturated:
+        return _overloaded()
+    if journal is not None:
+        journal.record_batch(raw_X, version, batch)
+    return FastJSONResponse(_to_columns(batch))
@@ -0,0 +1,121 @@
+import threading
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+
+class AnytimeEnsemble:
+    """
+    Ensemble mean and std accumulated one member at a time with Welford's update. A row
+    stops drawing members once its V1 route is statistically settled.
+
+    After k of the N members the running mean has standard error
+    sqrt(S^2 / k * (1 - k / N)). The members are a sample without replacement from the
+    N, so the error vanishes at k = N. The std has a standard error of about
+    S / sqrt(2 (k - 1)) with the same correction.
+
+    A row is settled when its mean is more than z standard errors from auth, escalate
+    and decline thresholds. In the risk bands where decide_v1 also looks at
+    uncertainty, its std must also be more than z standard errors from
+    uncertainty_threshold. Every row evaluates at least min_members. Rows that never
+    settle evaluate all N and get exactly the full-ensemble mean and std.
+
+    For rows that stop early, the reported std estimates the full ensemble's np.std
+    (ddof=0). V2 and V3 consume these estimates unchanged.
+    """
+
+    def __init__(
+        self,
+        member_proba: Callable[[np.ndarray, int], np.ndarray],
+        n_members: int,
+        min_members: int = 5,
+        z: float = 3.0,
+    ) -> None:
+        if n_members < 2:
+            raise ValueError("Anytime evaluation needs at least two ensemble members")
+        self.member_proba = member_proba
+        self.n_members = n_members
+        self.min_members = max(2, min(min_members, n_members))
+        self.z = float(z)
+        self._lock = threading.Lock()
+        self.n_rows = 0
+        self.n_member_evals = 0
+        self.n_early = 0
+
+    def _settled(
+        self, k: int, mean: np.ndarray, m2: np.ndarray,
+        thresholds: Tuple[float, float, float], uncertainty_threshold: float,
+    ) -> np.ndarray:
+        auth, escalate, decline = thresholds
+        n = self.n_members
+        s2 = m2 / (k - 1)
+        fpc = 1.0 - k / n
+        margin_mean = self.z * np.sqrt(s2 / k * fpc)
+        mean_ok = np.ones(mean.shape[0], dtype=bool)
+        for threshold in thresholds:
+            mean_ok &= np.abs(mean - threshold) > margin_mean
+
+        # decide_v1 ignores uncertainty only in the STEP_UP_AUTH band [auth, escalate)
+        std = np.sqrt(s2 * (n - 1) / n)
+        margin_std = self.z * np.sqrt(s2 / (2.0 * (k - 1)) * fpc)
+        std_matters = (mean < auth) | (mean >= escalate)
+        std_ok = ~std_matters | (np.abs(std - uncertainty_threshold) > margin_std)
+        return mean_ok & std_ok
+
+    def predict_mean_std(
+        self, X: np.ndarray, thresholds: Tuple[float, float, float], uncertainty_threshold: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (mean, std, members_used) per row. thresholds are the (auth, escalate, decline)
+        risk thresholds.
+        """
+        n_rows = X.shape[0]
+        n = self.n_members
+        probs = np.zeros((n, n_rows))
+        mean = np.zeros(n_rows)
+        m2 = np.zeros(n_rows)
+        used = np.full(n_rows, n)
+        active = np.arange(n_rows)
+        evals = 0
+
+        for k in range(1, n + 1):
+            x = self.member_proba(X[active], k - 1)
+            evals += active.size
+            probs[k - 1, active] = x
+            delta = x - mean[active]
+            mean[active] += delta / k
+            m2[active] += delta * (x - mean[active])
+            if k < self.min_members or k == n:
+                continue
+            done = self._settled(k, mean[active], m2[active], thresholds, uncertainty_threshold)
+            used[active[done]] = k
+            active = active[~done]
+            if not active.size:
+                break
+
+        out_mean = mean
+        out_std = np.sqrt(m2 / (np.maximum(used, 2) - 1) * (n - 1) / n)
+        # Full-ensemble rows: the reductions predict_proba_batch applies, over an array of
+        # the same shape (NumPy's summation order depends on it)
+        full = used == n
+        if full.any():
+            out_mean[full] = np.mean(probs, axis=0)[full]
+            out_std[full] = np.std(probs, axis=0)[full]
+
+        with self._lock:
+            self.n_rows += n_rows
+            self.n_member_evals += evals
+            self.n_early += int(n_rows - full.sum())
+        return out_mean, out_std, used
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            rows = self.n_rows
+            return {
+                "members": self.n_members,
+                "min_members": self.min_members,
+                "z": self.z,
+                "rows": rows,
+                "mean_members_per_row": self.n_member_evals / rows if rows else 0.0,
+                "early_stop_rate": self.n_early / rows if rows else 0.0,
+            }
@@ -0,0 +1,168 @@
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+LEGIT, FRAUD = 0, 1
+
+# Decisions the engine charges as manual_review_cost: a step-up challenge or a human review
+CHALLENGE_STATES = ("STEP_UP_AUTH", "STEP_UP")
+REVIEW_STATES = ("ESCALATE_INVEST", "ABSTAIN", "HUMAN_ESCALATE", "PEND")
+APPROVE_STATES = ("APPROVE", "AUTO_APPROVE")
+DECLINE_STATES = ("DECLINE", "AUTO_DECLINE", "AUTO_BLOCK")
+
+
+class CostModel:
+    """
+    Business cost of routing decisions as a matrix: cost[decision, true label], with
+    label 0 = legitimate and 1 = fraud.
+
+    Decisions are counted into (decision, label) cells once with a bincount. Totals and
+    per-decision breakdowns are then dot products over the cells, whatever the number
+    of rows. The bootstrap resamples cell counts from a multinomial, which has the same
+    distribution as resampling the rows.
+
+    handling_costs() is the part of a decision's cost that does not depend on the label
+    (min over labels): the engine reports it as manual_review_cost, next to exposure(),
+    the expected cost of approving the row, as expected_loss.
+    """
+
+    def __init__(self, matrix: Dict[str, Tuple[float, float]]) -> None:
+        if not matrix:
+            raise ValueError("Cost matrix needs at least one decision")
+        self.decisions = tuple(matrix)
+        self.index = {decision: i for i, decision in enumerate(self.decisions)}
+        self.table = np.array([matrix[d] for d in self.decisions], dtype=np.float64).reshape(len(self.decisions), 2)
+        self.handling = self.table.min(axis=1)
+
+    @classmethod
+    def from_components(
+        cls,
+        review_costs: Dict[str, float],
+        missed_fraud_cost: float,
+        false_decline_cost: float,
+        approve_states: Iterable[str] = APPROVE_STATES,
+        decline_states: Iterable[str] = DECLINE_STATES,
+    ) -> "CostModel":
+        """Review cost per decision, plus missed_fraud_cost on approved fraud and false_decline_cost on declined legit rows."""
+        matrix = {d: (0.0, float(missed_fraud_cost)) for d in approve_states}
+        matrix.update({d: (float(false_decline_cost), 0.0) for d in decline_states})
+        for decision, cost in review_costs.items():
+            legit, fraud = matrix.get(decision, (0.0, 0.0))
+            matrix[decision] = (legit + cost, fraud + cost)
+        return cls(matrix)
+
+    @classmethod
+    def engine_default(
+        cls,
+        fraud_cost: float = 1000.0,
+        false_positive_cost: float = 50.0,
+        challenge_cost: float = 10.0,
+        investigation_cost: float = 50.0,
+    ) -> "CostModel":
+        """DecisionEngine's costs: challenge_cost per step-up, investigation_cost per review, fraud_cost / false_positive_cost on outcomes."""
+        review_costs = {d: challenge_cost for d in CHALLENGE_STATES}
+        review_costs.update({d: investigation_cost for d in REVIEW_STATES})
+        return cls.from_components(review_costs, fraud_cost, false_positive_cost)
+
+    # ============================================================
+    # PER-ROW COSTS
+    # ============================================================
+
+    def codes(self, decisions: Sequence[str]) -> np.ndarray:
+        """Row index into the matrix for every decision."""
+        # Hash factorization: linear in the rows, no sort over millions of strings
+        inverse, uniques = pd.factorize(np.asarray(decisions, dtype=object).ravel())
+        unknown = [d for d in uniques if d not in self.index]
+        if unknown:
+            raise ValueError(f"Decisions missing from the cost matrix: {unknown}")
+        return np.array([self.index[d] for d in uniques], dtype=np.int64)[inverse]
+
+    def table_for(self, decisions: Sequence[str]) -> np.ndarray:
+        """(len(decisions), 2) cost rows, for callers that keep their own decision codes."""
+        return np.array([self.table[self.index[d]] if d in self.index else (0.0, 0.0) for d in decisions])
+
+    def row_costs(self, decisions: Sequence[str], labels: np.ndarray) -> np.ndarray:
+        """Realized cost of every row given its true label."""
+        return self.table[self.codes(decisions), np.asarray(labels, dtype=np.int64)]
+
+    def expected_costs(self, decisions: Sequence[str], fraud_prob: np.ndarray) -> np.ndarray:
+        """Expected cost of every row when only its fraud probability is known."""
+        rows = self.table[self.codes(decisions)]
+        p = np.asarray(fraud_prob, dtype=np.float64)
+        return (1.0 - p) * rows[:, LEGIT] + p * rows[:, FRAUD]
+
+    def exposure(self, fraud_prob: np.ndarray) -> np.ndarray:
+        """Expected cost of approving rows, whatever they are routed to: the engine's expected_loss."""
+        legit, fraud = self.table[self.index[APPROVE_STATES[0]]]
+        p = np.asarray(fraud_prob, dtype=np.float64)
+        return (1.0 - p) * legit + p * fraud
+
+    def handling_costs(self, decisions: Sequence[str]) -> np.ndarray:
+        return self.handling[self.codes(decisions)]
+
+    def handling_cost(self, decision: str) -> float:
+        """handling_costs() for a single decision."""
+        return float(self.handling[self.index[decision]])
+
+    # ============================================================
+    # AGGREGATES
+    # ============================================================
+
+    def cell_counts(self, decisions: Sequence[str], labels: np.ndarray) -> np.ndarray:
+        """(n_decisions, 2) row counts per (decision, label) cell."""
+        cells = self.codes(decisions) * 2 + np.asarray(labels, dtype=np.int64)
+        return np.bincount(cells, minlength=2 * len(self.decisions)).reshape(-1, 2)
+
+    def summary(self, decisions: Sequence[str], labels: np.ndarray) -> Dict[str, float]:
+        counts = self.cell_counts(decisions, labels)
+        n = int(counts.sum())
+        total = float(np.sum(counts * self.table))
+        handling = float(counts.sum(axis=1) @ self.handling)
+        return {
+            "transactions": n,
+            "total_cost": total,
+            "cost_per_txn": total / n if n else float("nan"),
+            "handling_cost": handling,
+            "outcome_cost": total - handling,
+        }
+
+    def breakdown(self, decisions: Sequence[str], labels: np.ndarray) -> pd.DataFrame:
+        """Per-decision counts, fraud, cost and share of the total cost."""
+        counts = self.cell_counts(decisions, labels)
+        costs = counts * self.table
+        frame = pd.DataFrame({
+            "count": counts.sum(axis=1),
+            "legit": counts[:, LEGIT],
+            "fraud": counts[:, FRAUD],
+            "cost": costs.sum(axis=1),
+        }, index=pd.Index(self.decisions, name="decision"))
+        frame = frame[frame["count"] > 0]
+        frame["cost_share"] = frame["cost"] / frame["cost"].sum() if frame["cost"].sum() else 0.0
+        return frame
+
+    def bootstrap(
+        self,
+        decisions: Sequence[str],
+        labels: np.ndarray,
+        n_boot: int = 2000,
+        ci: float = 0.95,
+        seed: int = 0,
+    ) -> Dict[str, Tuple[float, float, float]]:
+        """
+        Percentile bootstrap intervals (estimate, low, high) for the total cost and the cost
+        per transaction. Each replicate draws the cell counts of n resampled rows from
+        Multinomial(n, cell shares), so the cost does not grow with the number of rows.
+        """
+        counts = self.cell_counts(decisions, labels).ravel()
+        n = int(counts.sum())
+        if n == 0:
+            raise ValueError("No rows to bootstrap")
+        rng = np.random.default_rng(seed)
+        replicates = rng.multinomial(n, counts / n, size=n_boot) @ self.table.ravel()
+        lo, hi = np.quantile(replicates, [(1.0 - ci) / 2.0, (1.0 + ci) / 2.0])
+        total = float(counts @ self.table.ravel())
+        return {
+            "total_cost": (total, float(lo), float(hi)),
+            "cost_per_txn": (total / n, float(lo) / n, float(hi) / n),
+        }
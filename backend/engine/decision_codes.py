@@ -0,0 +1,8 @@
+# Pipeline versions and every routing state, as the int8 codes the threshold sweep
+# re-routes with and the decision journal stores. Append new states at the end:
+# journal segments record these tables, but older readers index into them.
+VERSIONS = ("V1", "V2", "V3", "V4")
+
+STATES = ("APPROVE", "ABSTAIN", "STEP_UP_AUTH", "ESCALATE_INVEST", "DECLINE",
+          "HUMAN_ESCALATE", "AUTO_DECLINE", "STEP_UP", "PEND")
+APPROVE, ABSTAIN, STEP_UP_AUTH, ESCALATE_INVEST, DECLINE, HUMAN_ESCALATE, AUTO_DECLINE, STEP_UP, PEND = range(len(STATES))
@@ -1,10 +1,62 @@
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Any, List, Tuple
 
-import joblib
 import numpy as np
-import shap
+
+from backend.engine.anytime_ensemble import AnytimeEnsemble
+from backend.engine.cost_model import CostModel
+from backend.engine.decision_codes import (
+    ABSTAIN, APPROVE, AUTO_DECLINE, DECLINE, ESCALATE_INVEST, HUMAN_ESCALATE, PEND, STATES, STEP_UP_AUTH,
+)
+from backend.engine.engine_metrics import EngineMetrics
+from backend.engine.evidence_fusion import ensemble_bpa, fuse_evidence, isolation_forest_bpa, svm_bpa
+from backend.engine.fused_ensemble import FusedEnsemble
+from backend.engine.linear_svm import LinearSvmScorer
+from backend.engine.model_bundle import ModelBundle
+from backend.engine.model_registry import ModelRegistry
+from backend.engine.packed_isolation_forest import PackedIsolationForest
+from backend.engine.path_shap import PathShapExplainer, top_k_indices
+
+# V3 decision -> (V4 terminal state, pend_origin); anything else falls back to PEND / HUMAN_ESCALATE
+_V4_TERMINAL_STATES = {
+    "APPROVE": ("APPROVE", ""),
+    "AUTO_APPROVE": ("APPROVE", ""),
+    "DECLINE": ("DECLINE", ""),
+    "AUTO_DECLINE": ("DECLINE", ""),
+    "STEP_UP": ("STEP_UP", ""),
+    "STEP_UP_AUTH": ("STEP_UP", ""),
+    "ABSTAIN": ("PEND", "ABSTAIN"),
+    "HUMAN_ESCALATE": ("PEND", "HUMAN_ESCALATE"),
+}
+# The same map on decision_codes codes, for evaluate_batch; pend_origin code -1 is ""
+_V4_CODES = np.full(len(STATES), PEND, dtype=np.int8)
+_PEND_ORIGIN_CODES = np.full(len(STATES), HUMAN_ESCALATE, dtype=np.int8)
+for _state, (_terminal, _origin) in _V4_TERMINAL_STATES.items():
+    if _state in STATES:
+        _V4_CODES[STATES.index(_state)] = STATES.index(_terminal)
+        _PEND_ORIGIN_CODES[STATES.index(_state)] = STATES.index(_origin) if _origin else -1
+_STATE_NAMES = np.array(STATES + ("",), dtype=object)  # code -> name, -1 -> ""
+
+
+# Safety margin when comparing cascade bounds against routing thresholds. The isotonic
+# maps run in float32 and can step back by an ulp (~3e-8 near 0.3) at a knot, so the
+# bounds are only monotone up to float32 rounding.
+_BOUND_SLACK = 1e-6
+
+# Largest batch served by the fused NumPy evaluator; past a few hundred rows XGBoost's
+# own predictor is faster, and both return identical scores
+_FUSED_MAX_ROWS = 256
+
+
+def _round_rows(values: np.ndarray, rows: np.ndarray, ndigits: int) -> np.ndarray:
+    # Python's round() on the touched rows only, so traces match the per-row path exactly
+    out = np.zeros_like(values)
+    out[rows] = [round(float(v), ndigits) for v in values[rows]]
+    return out
+
 
 class DecisionEngine:
     """
@@ -18,10 +70,36 @@ class DecisionEngine:
     - V4 collapse to 4 terminal states + SHAP explainability for PEND cases
     """
 
+    # Routing, Dempster-Shafer and cost settings: exported with a model bundle
+    SETTINGS = (
+        "decline_threshold", "escalate_threshold", "auth_threshold", "uncertainty_threshold", "anomaly_threshold",
+        "ds_bel_auto_decline", "ds_ign_low", "ds_conflict_human", "ds_ign_human", "ds_bel_stepup",
+        "v2_approve_thresh", "fraud_cost", "review_cost", "false_positive_cost", "challenge_cost", "investigation_cost",
+    )
+    # The settings the decision x label cost matrix is built from, in CostModel.engine_default order
+    COST_SETTINGS = ("fraud_cost", "false_positive_cost", "challenge_cost", "investigation_cost")
+
     def __init__(
         self,
         model_path: str | None = None,
         anomaly_path: str | None = None,
+        ensemble_backend: str = "sklearn",
+        fused_ensemble_path: str | None = None,
+        ensemble_mode: str = "full",
+        anytime_min_members: int = 5,
+        anytime_z: float = 3.0,
+        anomaly_backend: str = "sklearn",
+        packed_anomaly_path: str | None = None,
+        svm_backend: str = "exact",
+        cascade: bool = False,
+        cascade_prefix_trees: int = 50,
+        cascade_forest_depth: int | None = None,
+        registry: ModelRegistry | None = None,
+        explainer_mode: str = "eager",
+        explainer_backend: str = "shap",
+        collect_metrics: bool = True,
+        bundle_path: str | None = None,
+        verify_bundle: bool = True,
     ) -> None:
 
         engine_dir = os.path.dirname(os.path.abspath(__file__))
@@ -30,28 +108,116 @@ class DecisionEngine:
 
         print(f"[DecisionEngine] Project root: {project_root}")
 
+        # Artifacts are loaded through a content-hash registry: identical files (the V2 and
+        # V3 SVM/scaler pair) are unpickled once and shared. Pass a registry to share
+        # models across engines in the same process.
+        self.registry = registry or ModelRegistry()
+
+        # Optional model bundle (scripts/export_model_bundle.py): every model as flat arrays
+        # in one memory-mapped file, served by the NumPy evaluators; no pickle is loaded
+        self.bundle: ModelBundle | None = None
+        if bundle_path is not None:
+            t0 = time.perf_counter()
+            self.bundle = ModelBundle.load(bundle_path, verify=verify_bundle)
+            if self.bundle.arrays("ensemble") is None:
+                raise ValueError(f"Model bundle {bundle_path} has no ensemble")
+            self.registry.digests[bundle_path] = self.bundle.digest
+            ensemble_backend, anomaly_backend, svm_backend, explainer_backend = "fused", "packed", "linear", "path"
+            print(f"[DecisionEngine] Model bundle mapped from {bundle_path}: {self.bundle.nbytes() / 1e6:,.2f} MB "
+                  f"({time.perf_counter() - t0:.3f}s, checksum {'verified' if verify_bundle else 'not verified'}).")
+
         # V1 Models
         ensemble_path = model_path or os.path.join(artifacts_dir, "xgb_ensemble.pkl")
         isolation_path = anomaly_path or os.path.join(artifacts_dir, "isolation_forest.pkl")
 
-        if not os.path.exists(ensemble_path):
+        if self.bundle is not None:
+            self.models: List[Any] = []  # the fused evaluator serves every batch size
+            self.fused_max_rows = np.inf
+        elif not os.path.exists(ensemble_path):
             raise FileNotFoundError(f"Ensemble not found at {ensemble_path}")
-        self.models: List[Any] = joblib.load(ensemble_path)
-        print(f"[DecisionEngine] Loaded ensemble with {len(self.models)} members.")
-
-        if os.path.exists(isolation_path):
-            self.anomaly_model = joblib.load(isolation_path)
+        else:
+            self.models = self.registry.load(ensemble_path)
+            self.fused_max_rows = _FUSED_MAX_ROWS
+            print(f"[DecisionEngine] Loaded ensemble with {len(self.models)} members.")
+
+        # Optional fused NumPy evaluator for the ensemble (see scripts/export_fused_ensemble.py)
+        if ensemble_backend not in ("sklearn", "fused"):
+            raise ValueError(f"Unknown ensemble_backend: {ensemble_backend}")
+        self.fused_ensemble: FusedEnsemble | None = None
+        if ensemble_backend == "fused":
+            fused_path = fused_ensemble_path or os.path.join(artifacts_dir, "xgb_ensemble_fused.npz")
+            if self.bundle is not None:
+                self.fused_ensemble = self.bundle.build("ensemble")
+                print(f"[DecisionEngine] Ensemble served from the bundle: {self.fused_ensemble.n_members} members.")
+            elif os.path.exists(fused_path):
+                self.fused_ensemble = FusedEnsemble.load(fused_path)
+                print(f"[DecisionEngine] Fused ensemble loaded from {fused_path}.")
+            else:
+                self.fused_ensemble = FusedEnsemble.from_models(self.models)
+                print("[DecisionEngine] Fused ensemble export not found. Built from loaded members.")
+            print(f"[DecisionEngine] Fused ensemble: {self.fused_ensemble.n_boosters} boosters, "
+                  f"{self.fused_ensemble.n_trees} trees.")
+
+        # Optional anytime evaluation: members are added one at a time until each row's
+        # V1 route is statistically settled (see backend/engine/anytime_ensemble.py)
+        if ensemble_mode not in ("full", "anytime"):
+            raise ValueError(f"Unknown ensemble_mode: {ensemble_mode}")
+        self.anytime_ensemble: AnytimeEnsemble | None = None
+        if ensemble_mode == "anytime":
+            n_members = self.fused_ensemble.n_members if self.bundle is not None else len(self.models)
+            self.anytime_ensemble = AnytimeEnsemble(self._member_proba, n_members, anytime_min_members, anytime_z)
+            print(f"[DecisionEngine] Anytime ensemble: {self.anytime_ensemble.min_members}-{n_members} "
+                  f"members per row, z={anytime_z}.")
+
+        if anomaly_backend not in ("sklearn", "packed"):
+            raise ValueError(f"Unknown anomaly_backend: {anomaly_backend}")
+        packed_path = packed_anomaly_path or os.path.join(artifacts_dir, "isolation_forest_packed.npz")
+        if self.bundle is not None:
+            self.anomaly_model = self.bundle.build("isolation_forest")
+            if self.anomaly_model is not None:
+                print("[DecisionEngine] Isolation Forest served from the bundle.")
+            else:
+                print("[DecisionEngine] Isolation Forest not in the bundle. Novelty disabled.")
+        elif anomaly_backend == "packed" and os.path.exists(packed_path):
+            self.anomaly_model = PackedIsolationForest.load(packed_path)
+            print(f"[DecisionEngine] Packed Isolation Forest loaded from {packed_path}.")
+        elif os.path.exists(isolation_path):
+            self.anomaly_model = self.registry.load(isolation_path)
             print("[DecisionEngine] Isolation Forest loaded.")
+            if anomaly_backend == "packed":
+                self.anomaly_model = PackedIsolationForest.from_sklearn(self.anomaly_model)
+                print("[DecisionEngine] Packed Isolation Forest export not found. Packed from loaded forest.")
         else:
             self.anomaly_model = None
             print("[DecisionEngine] Isolation Forest not found. Novelty disabled.")
 
+        # Optional cascade: bound the ensemble from the first trees of every booster and the
+        # Isolation Forest from a depth-limited traversal, and skip the full evaluation for
+        # rows that provably stay V1 APPROVE (they report the bounds, see score_cascade).
+        self.cascade = cascade
+        self.cascade_prefix_trees = cascade_prefix_trees
+        self.cascade_forest_depth = cascade_forest_depth
+        self.cascade_ensemble: FusedEnsemble | None = None
+        self.cascade_forest: PackedIsolationForest | None = None
+        if cascade:
+            self.cascade_ensemble = self.fused_ensemble or FusedEnsemble.from_models(self.models)
+            if isinstance(self.anomaly_model, PackedIsolationForest):
+                self.cascade_forest = self.anomaly_model
+            elif self.anomaly_model is not None:
+                self.cascade_forest = PackedIsolationForest.from_sklearn(self.anomaly_model)
+            forest_depth = "full" if cascade_forest_depth is None else cascade_forest_depth
+            print(f"[DecisionEngine] Cascade enabled: {cascade_prefix_trees} prefix trees per booster, "
+                  f"forest depth {forest_depth}.")
+
         # V2 Models (aligned with paper configuration using V3 SVM/Scaler)
         v2_svm_path = os.path.join(artifacts_dir, "v3_svm_calibrated.pkl")
         v2_scaler_path = os.path.join(artifacts_dir, "v3_svm_scaler.pkl")
-        if os.path.exists(v2_svm_path) and os.path.exists(v2_scaler_path):
-            self.v2_svm = joblib.load(v2_svm_path)
-            self.v2_scaler = joblib.load(v2_scaler_path)
+        if self.bundle is not None:
+            # The closed-form scorer is both scaler and classifier
+            self.v2_svm = self.v2_scaler = self.bundle.build("v2_svm")
+        elif os.path.exists(v2_svm_path) and os.path.exists(v2_scaler_path):
+            self.v2_svm = self.registry.load(v2_svm_path)
+            self.v2_scaler = self.registry.load(v2_scaler_path)
             print("[DecisionEngine] V2 SVM and Scaler loaded.")
         else:
             self.v2_svm = None
@@ -61,25 +227,58 @@ class DecisionEngine:
         # V3 Models
         v3_svm_path = os.path.join(artifacts_dir, "v3_svm_calibrated.pkl")
         v3_scaler_path = os.path.join(artifacts_dir, "v3_svm_scaler.pkl")
-        if os.path.exists(v3_svm_path) and os.path.exists(v3_scaler_path):
-            self.v3_svm = joblib.load(v3_svm_path)
-            self.v3_scaler = joblib.load(v3_scaler_path)
+        if self.bundle is not None:
+            # Aliased components are built once and shared, as the registry shares the pickles
+            shared = self.bundle.aliases.get("v3_svm") == "v2_svm"
+            self.v3_svm = self.v3_scaler = self.v2_svm if shared else self.bundle.build("v3_svm")
+            print(f"[DecisionEngine] V2/V3 SVM served from the bundle{' (shared)' if shared else ''}.")
+        elif os.path.exists(v3_svm_path) and os.path.exists(v3_scaler_path):
+            self.v3_svm = self.registry.load(v3_svm_path)
+            self.v3_scaler = self.registry.load(v3_scaler_path)
             print("[DecisionEngine] V3 SVM and Scaler loaded.")
         else:
             self.v3_svm = None
             self.v3_scaler = None
             print("[DecisionEngine] V3 SVM files not found.")
 
-        # V4 SHAP Model & Explainer
-        shap_model_path = os.path.join(artifacts_dir, "xgb_raw_shap.pkl")
-        if os.path.exists(shap_model_path):
-            self.shap_model = joblib.load(shap_model_path)
-            self.shap_explainer = shap.TreeExplainer(self.shap_model)
-            print("[DecisionEngine] SHAP raw model loaded.")
-        else:
-            self.shap_model = None
-            self.shap_explainer = None
-            print("[DecisionEngine] SHAP model not found.")
+        # Optional closed-form backend for the second-opinion SVM. The scorer serves as
+        # both scaler and classifier, so the V2/V3 branches use it unchanged.
+        if svm_backend not in ("exact", "linear"):
+            raise ValueError(f"Unknown svm_backend: {svm_backend}")
+        self.svm_backend = svm_backend
+        if svm_backend == "linear" and self.bundle is None:
+            shared = self.v3_svm is self.v2_svm and self.v3_scaler is self.v2_scaler
+            if self.v2_svm is not None:
+                self.v2_svm = self.v2_scaler = LinearSvmScorer.from_sklearn(self.v2_svm, self.v2_scaler)
+            if shared:
+                self.v3_svm = self.v3_scaler = self.v2_svm
+            elif self.v3_svm is not None:
+                self.v3_svm = self.v3_scaler = LinearSvmScorer.from_sklearn(self.v3_svm, self.v3_scaler)
+            print("[DecisionEngine] SVM second opinion served by the closed-form linear scorer.")
+
+        # V4 SHAP Model & Explainer. Only PEND rows need explanations, so with
+        # explainer_mode="lazy" the shap import and TreeExplainer build are deferred to the
+        # first PEND row, or run in the background via start_explainer_loading().
+        # explainer_backend="path" swaps shap.TreeExplainer for the precompiled path
+        # TreeSHAP in backend/engine/path_shap.py (no shap import at all).
+        if explainer_mode not in ("eager", "lazy"):
+            raise ValueError(f"Unknown explainer_mode: {explainer_mode}")
+        if explainer_backend not in ("shap", "path"):
+            raise ValueError(f"Unknown explainer_backend: {explainer_backend}")
+        self.explainer_backend = explainer_backend
+        self.shap_model_path = os.path.join(artifacts_dir, "xgb_raw_shap.pkl")
+        self.shap_model = None
+        self.shap_explainer = None
+        self.explainer_status = "not_loaded"
+        self._explainer_lock = threading.Lock()
+        if explainer_mode == "eager":
+            self.load_explainer()
+
+        if self.bundle is None:
+            print(f"[DecisionEngine] Model registry: {self.registry.report()}")
+
+        # Per-stage latency histograms and routing counters (engine_metrics.py)
+        self.metrics = EngineMetrics() if collect_metrics else None
 
         # Column names expected by the models (aligned after preprocessing)
         self.feature_cols = [f"V{i}" for i in range(1, 29)] + ["Amount", "hour", "delta_time"]
@@ -105,6 +304,85 @@ class DecisionEngine:
         self.fraud_cost = 1000
         self.review_cost = 20
         self.false_positive_cost = 50
+        # manual_review_cost: a step-up challenge, a human investigation or PEND hold
+        self.challenge_cost = 10.0
+        self.investigation_cost = 50.0
+
+        # A bundle carries the settings it was exported with
+        if self.bundle is not None:
+            for name, value in self.bundle.settings.items():
+                if name in self.SETTINGS:
+                    setattr(self, name, value)
+        self._cost_model_key: tuple | None = None
+        self._cost_model: CostModel | None = None
+
+    @property
+    def cost_model(self) -> CostModel:
+        """
+        Decision x label cost matrix from the current cost settings, rebuilt when one of
+        them changes: expected_loss is its APPROVE row, manual_review_cost its
+        label-independent part.
+        """
+        key = tuple(getattr(self, name) for name in self.COST_SETTINGS)
+        if key != self._cost_model_key:
+            self._cost_model = CostModel.engine_default(*key)
+            self._cost_model_key = key
+        return self._cost_model
+
+    # ============================================================
+    # SHAP EXPLAINER LOADING
+    # ============================================================
+
+    @property
+    def explanations_ready(self) -> bool:
+        return self.explainer_status == "ready"
+
+    def load_explainer(self) -> Any:
+        """
+        Load the SHAP model and build the TreeExplainer on first call and return it
+        (None when unavailable). Thread-safe: callers arriving while a load is running
+        wait for it instead of starting another.
+        """
+        with self._explainer_lock:
+            if self.explainer_status != "not_loaded":
+                return self.shap_explainer
+            if self.bundle is not None:
+                self.shap_explainer = self.bundle.build("explainer")
+                self.explainer_status = "ready" if self.shap_explainer is not None else "unavailable"
+                return self.shap_explainer
+            if not os.path.exists(self.shap_model_path):
+                self.explainer_status = "unavailable"
+                print("[DecisionEngine] SHAP model not found.")
+                return None
+
+            self.explainer_status = "loading"
+            try:
+                t0 = time.perf_counter()
+                self.shap_model = self.registry.load(self.shap_model_path)
+                if self.explainer_backend == "path":
+                    self.shap_explainer = PathShapExplainer.from_xgboost(self.shap_model)
+                else:
+                    import shap  # deferred: the shap/numba import chain dominates cold start
+
+                    self.shap_explainer = shap.TreeExplainer(self.shap_model)
+            except Exception:
+                self.explainer_status = "failed"
+                raise
+            self.explainer_status = "ready"
+            print(f"[DecisionEngine] SHAP raw model loaded ({time.perf_counter() - t0:.2f}s).")
+            return self.shap_explainer
+
+    def start_explainer_loading(self) -> threading.Thread:
+        """Load the explainer on a daemon thread so scoring can start serving first."""
+        def run():
+            try:
+                self.load_explainer()
+            except Exception as exc:
+                print(f"[DecisionEngine] SHAP explainer failed to load: {exc}")
+
+        thread = threading.Thread(target=run, name="shap-explainer-loader", daemon=True)
+        thread.start()
+        return thread
 
     # ============================================================
     # PREPROCESSING PIPELINE
@@ -135,7 +413,23 @@ class DecisionEngine:
     # BASE ENSEMBLE & ANOMALY PREDICTIONS
     # ============================================================
 
+    def _member_proba(self, X: np.ndarray, member: int) -> np.ndarray:
+        if self.fused_ensemble is not None and X.shape[0] <= self.fused_max_rows:
+            return self.fused_ensemble.single_member_proba(X, member)
+        return self.models[member].predict_proba(X)[:, 1]
+
+    def _anytime_mean_std(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        thresholds = (self.auth_threshold, self.escalate_threshold, self.decline_threshold)
+        mean_prob, std_prob, _ = self.anytime_ensemble.predict_mean_std(X, thresholds, self.uncertainty_threshold)
+        return mean_prob, std_prob
+
     def predict_proba(self, X: np.ndarray) -> Tuple[float, float]:
+        if self.anytime_ensemble is not None:
+            mean_prob, std_prob = self._anytime_mean_std(X)
+            return float(mean_prob[0]), float(std_prob[0])
+        if self.fused_ensemble is not None:
+            mean_prob, std_prob = self.fused_ensemble.predict_mean_std(X)
+            return float(mean_prob[0]), float(std_prob[0])
         probs = []
         for model in self.models:
             prob = model.predict_proba(X)[:, 1]
@@ -270,31 +564,58 @@ class DecisionEngine:
         Evaluate a single raw transaction through V1 -> V2 -> V3 -> V4 pipeline.
         raw_X has shape (1, 31): [Time, V1..V28, Amount, delta_time]
         """
+        # Stage timings for self.metrics: (stage, seconds) for every stage that runs
+        clock = time.perf_counter
+        t_start = t = clock()
+        timings = []
+
         # 1. Preprocess raw input
         X = self.preprocess_features(raw_X)
+        timings.append(("preprocess", clock() - t))
 
         # 2. Base predictions
-        if precomputed_prob is not None and precomputed_std is not None:
-            prob = precomputed_prob
-            uncertainty = precomputed_std
-        else:
-            prob, uncertainty = self.predict_proba(X)
+        fast_path = False
+        precomputed = precomputed_anomaly is not None or (precomputed_prob is not None and precomputed_std is not None)
+        if self.cascade and not precomputed:
+            t = clock()
+            fast, prob_hi, std_hi, anomaly_lo, anomaly_exact = self.cascade_bounds(X)
+            timings.append(("cascade", clock() - t))
+            fast_path = bool(fast[0])
+            if fast_path:
+                prob, uncertainty = float(prob_hi[0]), float(std_hi[0])
+                anomaly_score = None if anomaly_lo is None else float(anomaly_lo[0])
+                novelty_flag = False
+            elif anomaly_exact:
+                precomputed_anomaly = float(anomaly_lo[0])
+        if not fast_path:
+            if precomputed_prob is not None and precomputed_std is not None:
+                prob = precomputed_prob
+                uncertainty = precomputed_std
+            else:
+                t = clock()
+                prob, uncertainty = self.predict_proba(X)
+                timings.append(("ensemble", clock() - t))
 
-        if precomputed_anomaly is not None:
-            anomaly_score = precomputed_anomaly
-            novelty_flag = anomaly_score < self.anomaly_threshold
-        else:
-            anomaly_score, novelty_flag = self.anomaly_score(X)
+            if precomputed_anomaly is not None:
+                anomaly_score = precomputed_anomaly
+                novelty_flag = anomaly_score < self.anomaly_threshold
+            else:
+                t = clock()
+                anomaly_score, novelty_flag = self.anomaly_score(X)
+                timings.append(("isolation_forest", clock() - t))
 
         # 3. Route V1
         v1_decision = self.decide_v1(prob, uncertainty, novelty_flag)
 
         # 4. Route V2
+        scaled: dict = {}
         v2_decision = v1_decision
         v2_svm_prob = 0.0
         if v1_decision == "ABSTAIN" and self.v2_svm is not None and self.v2_scaler is not None:
-            X_scaled = self.v2_scaler.transform(X)
+            t = clock()
+            X_scaled = self._scale_once(self.v2_scaler, X, scaled)
             v2_svm_prob = float(self.v2_svm.predict_proba(X_scaled)[0, 1])
+            timings.append(("v2_svm", clock() - t))
             if v2_svm_prob < self.v2_approve_thresh:
                 v2_decision = "APPROVE"
 
@@ -306,8 +627,9 @@ class DecisionEngine:
         conflict_K = 0.0
 
         if v2_decision == "ESCALATE_INVEST" and self.v3_svm is not None and self.v3_scaler is not None:
+            t = clock()
             # V3 SVM prediction
-            X_v3_scaled = self.v3_scaler.transform(X)
+            X_v3_scaled = self._scale_once(self.v3_scaler, X, scaled)
             v3_svm_prob = float(self.v3_svm.predict_proba(X_v3_scaled)[0, 1])
 
             # Dempster-Shafer BPA Construction
@@ -334,6 +656,7 @@ class DecisionEngine:
                 v3_decision = "STEP_UP_AUTH"
             else:
                 v3_decision = "HUMAN_ESCALATE"
+            timings.append(("v3_fusion", clock() - t))
 
         # 6. Route V4 (Terminal States + SHAP Explainability)
         v4_decision = v3_decision
@@ -360,30 +683,21 @@ class DecisionEngine:
             pend_origin = "HUMAN_ESCALATE"
 
         # If V4 decision is PEND, calculate SHAP explainability
-        if v4_decision == "PEND" and self.shap_explainer is not None:
-            sv = self.shap_explainer.shap_values(X)[0]
-            top_idxs = np.argsort(np.abs(sv))[::-1][:3]
-            for rank, fidx in enumerate(top_idxs, 1):
-                fname = self.feature_cols[fidx]
-                sval = float(sv[fidx])
-                shap_features.append({
-                    "feature": fname,
-                    "value": round(sval, 4),
-                    "direction": "elevates_fraud" if sval > 0 else "suppresses_fraud"
-                })
-            reason_code = "PEND_" + "_".join([tf["feature"] for tf in shap_features])
+        explainer = self.load_explainer() if v4_decision == "PEND" else None
+        if explainer is not None:
+            t = clock()
+            sv = explainer.shap_values(X)[0]
+            top_idxs = top_k_indices(sv[None, :], 3)[0]
+            shap_features, reason_code = self._shap_reason(sv, top_idxs)
+            timings.append(("v4_shap", clock() - t))
 
         # Expected Loss and Cost Simulation
-        expected_loss = prob * self.fraud_cost
+        expected_loss = float(self.cost_model.exposure(prob))
         
         # Determine manual review cost based on version-specific decision
         current_decision = v4_decision if version == "V4" else (v3_decision if version == "V3" else (v2_decision if version == "V2" else v1_decision))
-        if current_decision in ("STEP_UP_AUTH", "STEP_UP"):
-            manual_cost = 10.0  # Challenge cost
-        elif current_decision in ("ESCALATE_INVEST", "ABSTAIN", "HUMAN_ESCALATE", "PEND"):
-            manual_cost = 50.0  # Human investigation or PEND holding cost
-        else:
-            manual_cost = 0.0
+        # Challenge cost for step-up, human investigation or PEND holding cost for review
+        manual_cost = self.cost_model.handling_cost(current_decision)
 
         net_utility = -expected_loss - manual_cost
 
@@ -396,19 +710,310 @@ class DecisionEngine:
         elif version == "V4":
             mapped_decision = v4_decision
 
+        if self.metrics is not None:
+            timings.append(("total", clock() - t_start))
+            self.metrics.observe("row", timings, ((v1_decision, v2_decision, v3_decision, v4_decision, pend_origin),))
+
+        return self._build_result(
+            version=version,
+            decision=mapped_decision,
+            prob=prob,
+            uncertainty=uncertainty,
+            novelty_flag=novelty_flag,
+            expected_loss=expected_loss,
+            manual_cost=manual_cost,
+            net_utility=net_utility,
+            anomaly_score=anomaly_score,
+            v1_decision=v1_decision,
+            v2_decision=v2_decision,
+            v3_decision=v3_decision,
+            v4_decision=v4_decision,
+            v2_svm_prob=round(v2_svm_prob, 6),
+            v3_svm_prob=round(v3_svm_prob, 6),
+            ds_bel_F=round(bel_F, 6),
+            ds_ignorance=round(ignorance, 6),
+            ds_conflict_K=round(conflict_K, 6),
+            pend_origin=pend_origin,
+            reason_code=reason_code,
+            shap_features=shap_features,
+            timestamp=str(datetime.utcnow()),
+            fast_path=fast_path if self.cascade else None,
+        )
+
+    # ============================================================
+    # BATCH EVALUATION
+    # ============================================================
+
+    def preprocess_features_batch(self, raw_X: np.ndarray) -> np.ndarray:
+        """
+        Vectorized counterpart of preprocess_features.
+        Input raw_X has shape (n, 31): [Time, V1..V28, Amount, delta_time]
+        Output aligned_X has shape (n, 31): [V1..V28, Amount (log1p), hour, delta_time]
+        """
+        raw_X = np.asarray(raw_X, dtype=float)
+        if raw_X.ndim != 2 or raw_X.shape[1] != 31:
+            raise ValueError(f"Expected raw_X with shape (n, 31), got {raw_X.shape}")
+
+        aligned = np.zeros((raw_X.shape[0], 31))
+        aligned[:, 0:28] = raw_X[:, 1:29]
+        # Contiguous copies keep the ufuncs on the same kernels the (1, 31) path uses
+        aligned[:, 28] = np.log1p(np.ascontiguousarray(raw_X[:, 29]))
+        aligned[:, 29] = (np.ascontiguousarray(raw_X[:, 0]) / 3600.0) % 24.0
+        aligned[:, 30] = raw_X[:, 30]
+        return aligned
+
+    def predict_proba_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.anytime_ensemble is not None:
+            return self._anytime_mean_std(X)
+        if self.fused_ensemble is not None and X.shape[0] <= self.fused_max_rows:
+            return self.fused_ensemble.predict_mean_std(X)
+        probs_arr = np.vstack([model.predict_proba(X)[:, 1] for model in self.models])
+        return np.mean(probs_arr, axis=0), np.std(probs_arr, axis=0)
+
+    def anomaly_score_batch(self, X: np.ndarray) -> Tuple[np.ndarray | None, np.ndarray]:
+        if self.anomaly_model is None:
+            return None, np.zeros(X.shape[0], dtype=bool)
+        scores = np.asarray(self.anomaly_model.decision_function(X), dtype=float)
+        return scores, scores < self.anomaly_threshold
+
+    def cascade_bounds(
+        self, X: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray | None, bool]:
+        """
+        Cheap bounds for the cascade. A row takes the fast path when they prove it is
+        not novel (Isolation Forest lower bound >= anomaly_threshold) and that the
+        ensemble mean < auth_threshold and std < uncertainty_threshold; such a row can
+        only route to V1 APPROVE (and so APPROVE at every later version).
+        Returns (fast_path_mask, mean_hi, std_hi, anomaly_lo, anomaly_exact): mean_hi
+        and std_hi are only set on fast rows, and anomaly_exact says the forest bound
+        is the exact score (the engine's own packed forest at full depth).
+        """
+        n = X.shape[0]
+        candidates = np.arange(n)
+        anomaly_lo = None
+        anomaly_exact = False
+        if self.cascade_forest is not None:
+            anomaly_lo = self.cascade_forest.decision_lower_bound(X, self.cascade_forest_depth)
+            candidates = np.flatnonzero(anomaly_lo >= self.anomaly_threshold + _BOUND_SLACK)
+            depth = self.cascade_forest_depth
+            anomaly_exact = self.cascade_forest is self.anomaly_model and (
+                depth is None or depth >= self.cascade_forest.max_depth
+            )
+
+        fast = np.zeros(n, dtype=bool)
+        mean_hi = np.zeros(n)
+        std_hi = np.zeros(n)
+        if candidates.size:
+            cand_mean, cand_std = self.cascade_ensemble.prefix_bounds(X[candidates], self.cascade_prefix_trees)
+            proven = (cand_mean < self.auth_threshold - _BOUND_SLACK) & (cand_std < self.uncertainty_threshold - _BOUND_SLACK)
+            fast[candidates[proven]] = True
+            mean_hi[candidates[proven]] = cand_mean[proven]
+            std_hi[candidates[proven]] = cand_std[proven]
+        return fast, mean_hi, std_hi, anomaly_lo, anomaly_exact
+
+    def score_cascade(
+        self, X: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None, np.ndarray, np.ndarray]:
+        """
+        Cascaded base scoring. Fast-path rows (see cascade_bounds) skip the ensemble and
+        the Isolation Forest and report the bounds: risk_score and uncertainty are upper
+        bounds, anomaly_score a lower bound unless the bound is exact. Only the other
+        rows run the full models. trace.fast_path marks which rows carry bounds.
+        Returns (prob, uncertainty, anomaly_scores, novelty_flag, fast_path_mask).
+        """
+        fast, prob, uncertainty, anomaly_lo, anomaly_exact = self.cascade_bounds(X)
+        novelty_flag = np.zeros(X.shape[0], dtype=bool)
+        anomaly_scores = None if self.anomaly_model is None else anomaly_lo.copy()
+        if anomaly_exact:
+            novelty_flag = anomaly_scores < self.anomaly_threshold
+
+        slow_rows = np.flatnonzero(~fast)
+        if slow_rows.size:
+            prob[slow_rows], uncertainty[slow_rows] = self.predict_proba_batch(X[slow_rows])
+            if not anomaly_exact:
+                slow_scores, novelty_flag[slow_rows] = self.anomaly_score_batch(X[slow_rows])
+                if anomaly_scores is not None:
+                    anomaly_scores[slow_rows] = slow_scores
+        return prob, uncertainty, anomaly_scores, novelty_flag, fast
+
+    def decide_v1_batch(self, prob: np.ndarray, uncertainty: np.ndarray, novelty_flag: np.ndarray) -> np.ndarray:
+        """decide_v1 over arrays, as int8 decision_codes codes."""
+        # Same priority order as decide_v1: later masks overwrite earlier ones
+        high_prob = prob >= self.escalate_threshold
+        decline_prob = prob >= self.decline_threshold
+        uncertain = uncertainty >= self.uncertainty_threshold
+
+        decision = np.full(prob.shape[0], APPROVE, dtype=np.int8)
+        decision[(prob < self.auth_threshold) & uncertain & ~novelty_flag] = ABSTAIN
+        decision[(prob >= self.auth_threshold) & ~novelty_flag & ~(high_prob & uncertain)] = STEP_UP_AUTH
+        decision[novelty_flag & ~(decline_prob & ~uncertain)] = ESCALATE_INVEST
+        decision[high_prob & uncertain] = ESCALATE_INVEST
+        decision[decline_prob & ~uncertain] = DECLINE
+        return decision
+
+    def _scale_once(self, scaler: Any, X: np.ndarray, cache: dict) -> np.ndarray:
+        # One transform per distinct scaler per evaluation; V2 and V3 share theirs
+        if id(scaler) not in cache:
+            cache[id(scaler)] = scaler.transform(X)
+        return cache[id(scaler)]
+
+    def scale_features_batch(
+        self, X: np.ndarray, v2_rows: np.ndarray, v3_rows: np.ndarray
+    ) -> Tuple[np.ndarray | None, np.ndarray | None]:
+        """
+        Scaled SVM inputs for V2 and V3, full height with only the requested rows filled.
+        When both stages share a scaler the union of their rows is transformed in one call.
+        """
+        def scale(scaler, rows):
+            if scaler is None or rows.size == 0:
+                return None
+            part = scaler.transform(X[rows])
+            out = np.zeros((X.shape[0], part.shape[1]), dtype=part.dtype)
+            out[rows] = part
+            return out
+
+        if self.v2_scaler is not None and self.v2_scaler is self.v3_scaler:
+            shared = scale(self.v2_scaler, np.union1d(v2_rows, v3_rows))
+            return shared, shared
+        return scale(self.v2_scaler, v2_rows), scale(self.v3_scaler, v3_rows)
+
+    def evaluate_batch(self, raw_X: np.ndarray, version: str = "V4") -> dict:
+        """
+        Evaluate a batch of raw transactions through the V1 -> V2 -> V3 -> V4 pipeline.
+        raw_X has shape (n, 31): [Time, V1..V28, Amount, delta_time]
+
+        Every stage runs once over the whole matrix (or over the subset of rows it
+        applies to) and the result is columnar: the same keys as evaluate_transaction,
+        with one array entry per row. Use batch_records() to expand it into the
+        per-row dicts evaluate_transaction would have produced.
+        """
+        clock = time.perf_counter
+        t_start = t = clock()
+        timings = []
+
+        # 1. Preprocess raw input
+        X = self.preprocess_features_batch(raw_X)
+        n = X.shape[0]
+        timings.append(("preprocess", clock() - t))
+
+        # 2. Base predictions
+        t = clock()
+        if self.cascade:
+            prob, uncertainty, anomaly_scores, novelty_flag, fast_path = self.score_cascade(X)
+            timings.append(("cascade", clock() - t))
+        else:
+            prob, uncertainty = self.predict_proba_batch(X)
+            timings.append(("ensemble", clock() - t))
+            t = clock()
+            anomaly_scores, novelty_flag = self.anomaly_score_batch(X)
+            timings.append(("isolation_forest", clock() - t))
+
+        # 3. Route V1 (routes are decision_codes codes until the result is built)
+        v1_code = self.decide_v1_batch(prob, uncertainty, novelty_flag)
+
+        # V2 only turns ABSTAIN into APPROVE, so the rows V3 fuses are known from V1 and
+        # both stages' inputs can be scaled up front
+        v2_rows = np.flatnonzero(v1_code == ABSTAIN)
+        v3_rows = np.flatnonzero(v1_code == ESCALATE_INVEST)
+        t = clock()
+        v2_scaled, v3_scaled = self.scale_features_batch(X, v2_rows, v3_rows)
+        if v2_rows.size or v3_rows.size:
+            timings.append(("svm_scale", clock() - t))
+
+        # 4. Route V2
+        v2_code = v1_code.copy()
+        v2_svm_prob = np.zeros(n)
+        if v2_rows.size and self.v2_svm is not None and v2_scaled is not None:
+            t = clock()
+            v2_svm_prob[v2_rows] = self.v2_svm.predict_proba(v2_scaled[v2_rows])[:, 1]
+            v2_code[v2_rows[v2_svm_prob[v2_rows] < self.v2_approve_thresh]] = APPROVE
+            timings.append(("v2_svm", clock() - t))
+
+        # 5. Route V3
+        v3_code = v2_code.copy()
+        v3_svm_prob = np.zeros(n)
+        bel_F = np.zeros(n)
+        ignorance = np.zeros(n)
+        conflict_K = np.zeros(n)
+        if v3_rows.size and self.v3_svm is not None and v3_scaled is not None:
+            t = clock()
+            v3_svm_prob[v3_rows] = self.v3_svm.predict_proba(v3_scaled[v3_rows])[:, 1]
+
+            # Dempster-Shafer fusion over all escalated rows at once (backend/engine/evidence_fusion.py)
+            fused = fuse_evidence((
+                ensemble_bpa(prob[v3_rows], uncertainty[v3_rows]),
+                isolation_forest_bpa(anomaly_scores[v3_rows] if anomaly_scores is not None else np.zeros(v3_rows.size)),
+                svm_bpa(v3_svm_prob[v3_rows]),
+            ))
+            conflict_K[v3_rows] = fused["conflict_K"]
+            bel_F[v3_rows] = fused["bel_F"]
+            ignorance[v3_rows] = fused["ignorance"]
+
+            sub = np.full(v3_rows.size, HUMAN_ESCALATE, dtype=np.int8)
+            K, bF, ign = conflict_K[v3_rows], bel_F[v3_rows], ignorance[v3_rows]
+            sub[bF >= self.ds_bel_stepup] = STEP_UP_AUTH
+            sub[ign >= self.ds_ign_human] = HUMAN_ESCALATE
+            sub[(bF >= self.ds_bel_auto_decline) & (ign <= self.ds_ign_low)] = AUTO_DECLINE
+            sub[K >= self.ds_conflict_human] = HUMAN_ESCALATE
+            v3_code[v3_rows] = sub
+            timings.append(("v3_fusion", clock() - t))
+
+        # 6. Route V4 (Terminal States + SHAP Explainability)
+        v4_code = _V4_CODES[v3_code]
+        origin_code = np.where(v4_code == PEND, _PEND_ORIGIN_CODES[v3_code], -1).astype(np.int8)
+        v1_decision, v2_decision, v3_decision, v4_decision, pend_origin = _STATE_NAMES[
+            np.stack([v1_code, v2_code, v3_code, v4_code, origin_code])
+        ]
+
+        shap_features: List[List[dict]] = [[] for _ in range(n)]
+        reason_code = np.full(n, "", dtype=object)
+        pend_rows = np.flatnonzero(v4_code == PEND)
+        explainer = self.load_explainer() if pend_rows.size else None
+        if explainer is not None:
+            t = clock()
+            sv = np.asarray(explainer.shap_values(X[pend_rows]))
+            top_idxs = top_k_indices(sv, 3)
+            for j, i in enumerate(pend_rows):
+                shap_features[i], reason_code[i] = self._shap_reason(sv[j], top_idxs[j])
+            timings.append(("v4_shap", clock() - t))
+
+        # Expected Loss and Cost Simulation
+        expected_loss = self.cost_model.exposure(prob)
+
+        current_decision = v4_decision if version == "V4" else (v3_decision if version == "V3" else (v2_decision if version == "V2" else v1_decision))
+        manual_cost = self.cost_model.handling_costs(current_decision)
+
+        net_utility = -expected_loss - manual_cost
+
+        mapped_decision = v1_decision
+        if version == "V2":
+            mapped_decision = v2_decision
+        elif version == "V3":
+            mapped_decision = v3_decision
+        elif version == "V4":
+            mapped_decision = v4_decision
+
+        tier = np.full(n, "low_risk", dtype=object)
+        tier[prob >= self.auth_threshold] = "medium_risk"
+        tier[prob >= self.decline_threshold] = "high_risk"
+
+        if self.metrics is not None:
+            timings.append(("total", clock() - t_start))
+            self.metrics.observe("batch", timings, np.stack([v1_code, v2_code, v3_code, v4_code, origin_code]), n)
+
         return {
             "decision": mapped_decision,
             "risk_score": prob,
             "uncertainty": uncertainty,
             "novelty_flag": novelty_flag,
-            "tier": "high_risk" if prob >= self.decline_threshold else ("medium_risk" if prob >= self.auth_threshold else "low_risk"),
+            "tier": tier,
             "costs": {
                 "expected_loss": expected_loss,
                 "manual_review_cost": manual_cost,
                 "net_utility": net_utility,
             },
             "explanations": {
-                "anomaly_score": anomaly_score,
+                "anomaly_score": anomaly_scores,
                 "top_features": shap_features,
             },
             "trace": {
@@ -416,18 +1021,148 @@ class DecisionEngine:
                 "v2_decision": v2_decision,
                 "v3_decision": v3_decision,
                 "v4_decision": v4_decision,
-                "v2_svm_prob": round(v2_svm_prob, 6),
-                "v3_svm_prob": round(v3_svm_prob, 6),
-                "ds_bel_F": round(bel_F, 6),
-                "ds_ignorance": round(ignorance, 6),
-                "ds_conflict_K": round(conflict_K, 6),
+                "v2_svm_prob": _round_rows(v2_svm_prob, v2_rows, 6),
+                "v3_svm_prob": _round_rows(v3_svm_prob, v3_rows, 6),
+                "ds_bel_F": _round_rows(bel_F, v3_rows, 6),
+                "ds_ignorance": _round_rows(ignorance, v3_rows, 6),
+                "ds_conflict_K": _round_rows(conflict_K, v3_rows, 6),
                 "pend_origin": pend_origin,
                 "shap_reason_code": reason_code,
                 "shap_features": shap_features,
+                **({"fast_path": fast_path} if self.cascade else {}),
             },
             "meta": {
                 "model_version": f"xgb_ensemble_{version.lower()}",
                 "uncertainty_method": "bootstrap_std",
                 "timestamp": str(datetime.utcnow()),
+                "version": version,
+                "n_rows": n,
+            },
+        }
+
+    def batch_records(self, batch: dict) -> List[dict]:
+        """
+        Expand a columnar evaluate_batch result into the per-row dicts that
+        evaluate_transaction returns for the same rows.
+        """
+        version = batch["meta"]["version"]
+        anomaly_scores = batch["explanations"]["anomaly_score"]
+        costs = batch["costs"]
+        trace = batch["trace"]
+        records = []
+        for i in range(batch["meta"]["n_rows"]):
+            records.append(self._build_result(
+                version=version,
+                decision=batch["decision"][i],
+                prob=float(batch["risk_score"][i]),
+                uncertainty=float(batch["uncertainty"][i]),
+                novelty_flag=bool(batch["novelty_flag"][i]),
+                expected_loss=float(costs["expected_loss"][i]),
+                manual_cost=float(costs["manual_review_cost"][i]),
+                net_utility=float(costs["net_utility"][i]),
+                anomaly_score=None if anomaly_scores is None else float(anomaly_scores[i]),
+                v1_decision=trace["v1_decision"][i],
+                v2_decision=trace["v2_decision"][i],
+                v3_decision=trace["v3_decision"][i],
+                v4_decision=trace["v4_decision"][i],
+                v2_svm_prob=float(trace["v2_svm_prob"][i]),
+                v3_svm_prob=float(trace["v3_svm_prob"][i]),
+                ds_bel_F=float(trace["ds_bel_F"][i]),
+                ds_ignorance=float(trace["ds_ignorance"][i]),
+                ds_conflict_K=float(trace["ds_conflict_K"][i]),
+                pend_origin=trace["pend_origin"][i],
+                reason_code=trace["shap_reason_code"][i],
+                shap_features=trace["shap_features"][i],
+                timestamp=batch["meta"]["timestamp"],
+                fast_path=bool(trace["fast_path"][i]) if "fast_path" in trace else None,
+            ))
+        return records
+
+    def evaluate_batch_records(self, raw_X: np.ndarray, version: str = "V4") -> List[dict]:
+        """evaluate_batch, returned as one evaluate_transaction-style dict per row."""
+        return self.batch_records(self.evaluate_batch(raw_X, version))
+
+    # ============================================================
+    # RESULT FORMATTING (shared by the per-row and batch paths)
+    # ============================================================
+
+    def _shap_reason(self, sv: np.ndarray, top_idxs: np.ndarray) -> Tuple[List[dict], str]:
+        shap_features = []
+        for fidx in top_idxs:
+            fname = self.feature_cols[fidx]
+            sval = float(sv[fidx])
+            shap_features.append({
+                "feature": fname,
+                "value": round(sval, 4),
+                "direction": "elevates_fraud" if sval > 0 else "suppresses_fraud"
+            })
+        reason_code = "PEND_" + "_".join([tf["feature"] for tf in shap_features])
+        return shap_features, reason_code
+
+    def _tier(self, prob: float) -> str:
+        return "high_risk" if prob >= self.decline_threshold else ("medium_risk" if prob >= self.auth_threshold else "low_risk")
+
+    def _build_result(
+        self,
+        version: str,
+        decision: str,
+        prob: float,
+        uncertainty: float,
+        novelty_flag: bool,
+        expected_loss: float,
+        manual_cost: float,
+        net_utility: float,
+        anomaly_score: float | None,
+        v1_decision: str,
+        v2_decision: str,
+        v3_decision: str,
+        v4_decision: str,
+        v2_svm_prob: float,
+        v3_svm_prob: float,
+        ds_bel_F: float,
+        ds_ignorance: float,
+        ds_conflict_K: float,
+        pend_origin: str,
+        reason_code: str,
+        shap_features: List[dict],
+        timestamp: str,
+        fast_path: bool | None = None,
+    ) -> dict:
+        result = {
+            "decision": decision,
+            "risk_score": prob,
+            "uncertainty": uncertainty,
+            "novelty_flag": novelty_flag,
+            "tier": self._tier(prob),
+            "costs": {
+                "expected_loss": expected_loss,
+                "manual_review_cost": manual_cost,
+                "net_utility": net_utility,
+            },
+            "explanations": {
+                "anomaly_score": anomaly_score,
+                "top_features": shap_features,
             },
-        }
\ No newline at end of file
+            "trace": {
+                "v1_decision": v1_decision,
+                "v2_decision": v2_decision,
+                "v3_decision": v3_decision,
+                "v4_decision": v4_decision,
+                "v2_svm_prob": v2_svm_prob,
+                "v3_svm_prob": v3_svm_prob,
+                "ds_bel_F": ds_bel_F,
+                "ds_ignorance": ds_ignorance,
+                "ds_conflict_K": ds_conflict_K,
+                "pend_origin": pend_origin,
+                "shap_reason_code": reason_code,
+                "shap_features": shap_features,
+            },
+            "meta": {
+                "model_version": f"xgb_ensemble_{version.lower()}",
+                "uncertainty_method": "bootstrap_std",
+                "timestamp": timestamp,
+            },
+        }
+        if fast_path is not None:
+            result["trace"]["fast_path"] = fast_path
+        return result
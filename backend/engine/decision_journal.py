@@ -0,0 +1,307 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.engine.decision_codes import STATES, VERSIONS
+
+JOURNAL_FORMAT = 1
+RAW_FEATURES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount", "delta_time"]
+TOP_FEATURES = 3
+DECISION_FIELDS = ("decision", "v1_decision", "v2_decision", "v3_decision", "v4_decision", "pend_origin")
+SCORE_FIELDS = ("risk_score", "uncertainty", "anomaly_score", "v2_svm_prob", "v3_svm_prob",
+                "ds_bel_F", "ds_ignorance", "ds_conflict_K")
+COST_FIELDS = ("expected_loss", "manual_review_cost", "net_utility")
+
+# One packed little-endian record per scored row. The version is a code into VERSIONS and
+# decisions are codes into STATES (-1 for an unknown version or no decision), anomaly_score
+# is NaN without an Isolation Forest, fast_path is -1 without the cascade and shap_feature
+# indexes the header's shap_feature_names (-1 pads).
+JOURNAL_DTYPE = np.dtype(
+    [("ts", "<f8"), ("version", "i1")]
+    + [(name, "i1") for name in DECISION_FIELDS]
+    + [("novelty_flag", "?"), ("fast_path", "i1"), ("features", "<f8", (len(RAW_FEATURES),))]
+    + [(name, "<f8") for name in SCORE_FIELDS + COST_FIELDS]
+    + [("shap_feature", "i1", (TOP_FEATURES,)), ("shap_value", "<f8", (TOP_FEATURES,))]
+)
+
+_STATE_CODES = {state: i for i, state in enumerate(STATES)}
+_VERSION_CODES = {version: i for i, version in enumerate(VERSIONS)}
+
+
+def _codes(values: Sequence[str]) -> np.ndarray:
+    return np.array([_STATE_CODES.get(v, -1) for v in values], dtype=np.int8)
+
+
+class DecisionJournal:
+    """
+    Append-only audit log of every scored row: raw features, base scores, the full
+    V1-V4 trace and costs, in rotating segments of packed JOURNAL_DTYPE records.
+
+    record() and record_batch() only append a reference to the result onto a bounded
+    queue, so the request path never waits on encoding or disk. A writer thread wakes
+    every flush_ms, turns everything queued into one record array and appends it to the
+    current segment. When `capacity` rows are already waiting, new rows are dropped and
+    counted rather than blocking the request.
+
+    Each segment is `journal-<opened>-<seq>.bin` next to a `.json` header holding the
+    record dtype, the code tables and the model digests, so read_journal() can decode
+    segments written by any model set. model_digests is read live (pass the engine's
+    registry.digests): a segment rotates after segment_rows rows, or as soon as an
+    artifact loads later, such as the background or lazy SHAP explainer, so every
+    header names the models its rows were scored with.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        model_digests: Dict[str, str],
+        shap_feature_names: Sequence[str],
+        capacity: int = 65536,
+        flush_ms: float = 200.0,
+        segment_rows: int = 1_000_000,
+    ) -> None:
+        self.directory = directory
+        self.model_digests = model_digests
+        self.shap_feature_names = list(shap_feature_names)
+        self.capacity = capacity
+        self.flush_ms = flush_ms
+        self.segment_rows = segment_rows
+        self._shap_index = {name: i for i, name in enumerate(self.shap_feature_names)}
+
+        self._queue: deque = deque()
+        self._queued_rows = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._file = None
+        self._segment_models: Dict[str, str] = {}
+        self._seq = 0
+        self._segment_rows = 0
+        self.n_recorded = 0
+        self.n_written = 0
+        self.n_dropped = 0
+        self.n_flushes = 0
+        self.n_segments = 0
+        self.bytes_written = 0
+        self.last_flush_ms = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    # ============================================================
+    # REQUEST PATH
+    # ============================================================
+
+    def record(self, raw_row: np.ndarray, version: str, result: dict) -> None:
+        """Journal one evaluate_transaction result for its (1, 31) raw row."""
+        self._enqueue((time.time(), version, raw_row, result, False), 1)
+
+    def record_batch(self, raw_X: np.ndarray, version: str, batch: dict) -> None:
+        """Journal a columnar evaluate_batch result for its (n, 31) raw rows."""
+        self._enqueue((time.time(), version, raw_X, batch, True), raw_X.shape[0])
+
+    def _enqueue(self, entry: tuple, n_rows: int) -> None:
+        with self._lock:
+            self.n_recorded += n_rows
+            if self._queued_rows + n_rows > self.capacity:
+                self.n_dropped += n_rows
+                return
+            self._queued_rows += n_rows
+            self._queue.append(entry)
+
+    # ============================================================
+    # WRITER
+    # ============================================================
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="decision-journal", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the writer, flush whatever is queued and close the segment."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_ms / 1e3)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                print(f"[DecisionJournal] Flush failed: {exc}")
+
+    def flush(self) -> int:
+        """Write every queued row; returns the number of rows written."""
+        with self._lock:
+            entries = list(self._queue)
+            self._queue.clear()
+            self._queued_rows = 0
+        if not entries:
+            return 0
+        t0 = time.perf_counter()
+        records = np.concatenate([self._to_records(entry) for entry in entries])
+        written = 0
+        while written < records.size:
+            if (self._file is None or self._segment_rows >= self.segment_rows
+                    or self._segment_models != self.model_digests):
+                self._open_segment()
+            chunk = records[written:written + self.segment_rows - self._segment_rows]
+            self._file.write(chunk.tobytes())
+            self._segment_rows += chunk.size
+            written += chunk.size
+        self._file.flush()
+        self.n_written += written
+        self.n_flushes += 1
+        self.bytes_written += records.nbytes
+        self.last_flush_ms = (time.perf_counter() - t0) * 1e3
+        return written
+
+    def _open_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        opened = time.time()
+        self._segment_models = dict(self.model_digests)
+        stem = os.path.join(self.directory, f"journal-{int(opened * 1e3)}-{self._seq:06d}")
+        header = {
+            "format": JOURNAL_FORMAT,
+            "opened": opened,
+            "dtype": JOURNAL_DTYPE.descr,
+            "states": list(STATES),
+            "versions": list(VERSIONS),
+            "raw_features": RAW_FEATURES,
+            "shap_feature_names": self.shap_feature_names,
+            "models": self._segment_models,
+        }
+        with open(f"{stem}.json", "w") as f:
+            json.dump(header, f, indent=2)
+        self._file = open(f"{stem}.bin", "ab")
+        self._seq += 1
+        self._segment_rows = 0
+        self.n_segments += 1
+
+    def _to_records(self, entry: tuple) -> np.ndarray:
+        ts, version, raw_X, result, columnar = entry
+        if columnar:
+            trace, costs = result["trace"], result["costs"]
+            anomaly = result["explanations"]["anomaly_score"]
+            top_features = trace["shap_features"]
+        else:
+            trace = {k: [v] for k, v in result["trace"].items()}
+            costs = {k: [v] for k, v in result["costs"].items()}
+            anomaly = result["explanations"]["anomaly_score"]
+            anomaly = None if anomaly is None else [anomaly]
+            top_features = [result["trace"]["shap_features"]]
+            result = {k: [result[k]] for k in ("decision", "risk_score", "uncertainty", "novelty_flag")}
+
+        n = raw_X.shape[0]
+        records = np.zeros(n, dtype=JOURNAL_DTYPE)
+        records["ts"] = ts
+        records["version"] = _VERSION_CODES.get(version, -1)
+        records["decision"] = _codes(result["decision"])
+        for name in DECISION_FIELDS[1:]:
+            records[name] = _codes(trace[name])
+        records["novelty_flag"] = result["novelty_flag"]
+        records["fast_path"] = trace["fast_path"] if "fast_path" in trace else -1
+        records["features"] = raw_X
+        records["risk_score"] = result["risk_score"]
+        records["uncertainty"] = result["uncertainty"]
+        records["anomaly_score"] = np.nan if anomaly is None else anomaly
+        for name in SCORE_FIELDS[3:]:
+            records[name] = trace[name]
+        for name in COST_FIELDS:
+            records[name] = costs[name]
+        records["shap_feature"] = -1
+        for i, features in enumerate(top_features):
+            for j, contribution in enumerate(features[:TOP_FEATURES]):
+                records["shap_feature"][i, j] = self._shap_index.get(contribution["feature"], -1)
+                records["shap_value"][i, j] = contribution["value"]
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = self._queued_rows
+        return {
+            "directory": self.directory,
+            "recorded": self.n_recorded,
+            "written": self.n_written,
+            "queued": queued,
+            "dropped": self.n_dropped,
+            "flushes": self.n_flushes,
+            "segments": self.n_segments,
+            "bytes_written": self.bytes_written,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+# ============================================================
+# OFFLINE READER
+# ============================================================
+
+def journal_segments(directory: str) -> List[str]:
+    """Segment files in write order."""
+    return sorted(glob.glob(os.path.join(directory, "journal-*.bin")))
+
+
+def read_segment(path: str) -> tuple:
+    """(header, records) of one segment; records are memory-mapped, a torn last record is ignored."""
+    with open(os.path.splitext(path)[0] + ".json") as f:
+        header = json.load(f)
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    n = os.path.getsize(path) // dtype.itemsize
+    records = np.memmap(path, dtype=dtype, mode="r", shape=(n,)) if n else np.zeros(0, dtype=dtype)
+    return header, records
+
+
+def read_journal(directory: str) -> np.ndarray:
+    """Every record in the journal as one structured array (JOURNAL_DTYPE)."""
+    parts = [read_segment(path)[1] for path in journal_segments(directory)]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=JOURNAL_DTYPE)
+
+
+def journal_frame(directory: str, features: bool = False) -> pd.DataFrame:
+    """
+    The journal as a DataFrame with decisions decoded to names, one row per record,
+    plus the segment and a short digest of the model set that wrote it. features=True adds
+    the raw input columns.
+    """
+    frames = []
+    for path in journal_segments(directory):
+        header, records = read_segment(path)
+        states = np.array(header["states"] + [""], dtype=object)  # code -1 -> ""
+        versions = np.array(header["versions"] + [""], dtype=object)  # unknown version -> ""
+        frame = pd.DataFrame({"ts": pd.to_datetime(records["ts"], unit="s"),
+                              "version": versions[records["version"]]})
+        for name in DECISION_FIELDS:
+            frame[name] = states[records[name]]
+        frame["novelty_flag"] = records["novelty_flag"]
+        frame["fast_path"] = records["fast_path"]
+        for name in SCORE_FIELDS + COST_FIELDS:
+            frame[name] = records[name]
+        names = np.array(header["shap_feature_names"] + [""], dtype=object)
+        for j in range(records["shap_feature"].shape[1]):
+            frame[f"shap_feature_{j + 1}"] = names[records["shap_feature"][:, j]]
+            frame[f"shap_value_{j + 1}"] = records["shap_value"][:, j]
+        if features:
+            frame[header["raw_features"]] = records["features"]
+        frame["segment"] = os.path.basename(path)
+        frame["model_set"] = hashlib.sha256(json.dumps(header["models"], sort_keys=True).encode()).hexdigest()[:12]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
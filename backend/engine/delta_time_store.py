@@ -0,0 +1,107 @@
+import os
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+import numpy as np
+
+GLOBAL_STREAM = ""
+
+
+class DeltaTimeStore:
+    """
+    Last-seen timestamps per stream, for deriving delta_time online the way
+    phase0_cleaning.py does offline: Time minus the previous Time in the
+    time-sorted stream (0.0 for a stream's first event).
+
+    Each stream keeps a short sorted list: every timestamp within `lateness` seconds
+    of its newest one, plus the newest one older than that. An event arriving up to
+    `lateness` seconds out of order therefore still finds its exact predecessor.
+    In-order events append and drop expired entries, so an update costs O(1) in the
+    stream length (O(events inside the window) at worst).
+
+    Events more than `lateness` behind their stream's newest timestamp are scored
+    against whatever is retained (0.0 when older than all of it) and not recorded.
+    A late event cannot correct the delta_time already returned to its successor.
+    """
+
+    def __init__(self, lateness: float = 0.0) -> None:
+        self.lateness = float(lateness)
+        self._times: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self.n_events = 0
+        self.n_late = 0
+        self.n_too_late = 0
+
+    def observe(self, t: float, stream: str = GLOBAL_STREAM) -> float:
+        """Record an event at time t on `stream` and return its delta_time."""
+        t = float(t)
+        with self._lock:
+            self.n_events += 1
+            times = self._times.get(stream)
+            if times is None:
+                self._times[stream] = [t]
+                return 0.0
+
+            newest = times[-1]
+            if t >= newest:
+                times.append(t)
+                # Keep the newest entry at or before the cutoff: a late event's predecessor
+                drop = bisect_right(times, t - self.lateness) - 1
+                if drop > 0:
+                    del times[:drop]
+                return t - newest
+
+            self.n_late += 1
+            i = bisect_right(times, t)
+            delta = t - times[i - 1] if i else 0.0
+            if t < newest - self.lateness:
+                self.n_too_late += 1
+            else:
+                times.insert(i, t)
+            return delta
+
+    def observe_many(self, times: np.ndarray, stream: str = GLOBAL_STREAM) -> np.ndarray:
+        """observe() for each timestamp in arrival order."""
+        return np.array([self.observe(t, stream) for t in np.asarray(times, dtype=float)])
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "streams": len(self._times),
+                "lateness_secs": self.lateness,
+                "events": self.n_events,
+                "late": self.n_late,
+                "too_late": self.n_too_late,
+            }
+
+    # ============================================================
+    # SNAPSHOTS
+    # ============================================================
+
+    def save(self, path: str) -> None:
+        """Write the state to an .npz snapshot, replacing `path` atomically."""
+        with self._lock:
+            streams = list(self._times)
+            counts = np.array([len(self._times[s]) for s in streams], dtype=np.int64)
+            flat = np.fromiter((t for s in streams for t in self._times[s]), dtype=float, count=int(counts.sum()))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, streams=np.array(streams, dtype=str), counts=counts, times=flat,
+                         lateness=np.asarray(self.lateness))
+            # Under the lock, so a concurrent save cannot rename a half-written file
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, lateness: Optional[float] = None) -> "DeltaTimeStore":
+        """Restore a snapshot; `lateness` overrides the saved window."""
+        with np.load(path) as data:
+            store = cls(float(data["lateness"]) if lateness is None else lateness)
+            offsets = np.concatenate([[0], np.cumsum(data["counts"])])
+            times = data["times"].tolist()
+            for i, stream in enumerate(data["streams"].tolist()):
+                store._times[stream] = times[offsets[i]:offsets[i + 1]]
+        return store
@@ -0,0 +1,237 @@
+import math
+import threading
+from collections import Counter, deque
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.engine.decision_codes import STATES
+
+# Stages timed inside evaluate_transaction / evaluate_batch, in pipeline order
+# (svm_scale is batch only: the per-row path scales inside v2_svm / v3_fusion)
+STAGES = ("preprocess", "cascade", "ensemble", "isolation_forest", "svm_scale", "v2_svm", "v3_fusion", "v4_shap", "total")
+_STAGE_CODES = {stage: i for i, stage in enumerate(STAGES)}
+ROUTE_LABELS = ("v1", "v2", "v3", "v4", "pend_origin")
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Calls queued by observe() before one of them buckets the queue (reads fold it too)
+FOLD_CALLS = 256
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram: every power of two between 2**min_exp and 2**max_exp
+    seconds (~60 ns to 128 s by default) is split into `sub_buckets` equal buckets,
+    so any recorded value is known to within 1 / sub_buckets of itself. Recording is
+    a frexp and an increment; observe_many() buckets an array of values at once.
+    """
+
+    def __init__(self, min_exp: int = -23, max_exp: int = 8, sub_buckets: int = 8) -> None:
+        self.min_exp = min_exp
+        self.max_exp = max_exp
+        self.sub_buckets = sub_buckets
+        self.counts = np.zeros((max_exp - min_exp) * sub_buckets, dtype=np.int64)
+        self._last = len(self.counts) - 1
+        self.count = 0
+        self.sum = 0.0
+
+    def copy(self) -> "LatencyHistogram":
+        other = LatencyHistogram(self.min_exp, self.max_exp, self.sub_buckets)
+        other.counts, other.count, other.sum = self.counts.copy(), self.count, self.sum
+        return other
+
+    def bucket(self, secs: float) -> int:
+        if secs <= 0.0:
+            return 0
+        mantissa, exp = math.frexp(secs)  # secs = mantissa * 2**exp, mantissa in [0.5, 1)
+        i = (exp - self.min_exp) * self.sub_buckets + int((mantissa - 0.5) * 2 * self.sub_buckets)
+        return min(max(i, 0), self._last)
+
+    def upper_bound(self, i: int) -> float:
+        exp, sub = divmod(i, self.sub_buckets)
+        return math.ldexp(0.5 + (sub + 1) / (2 * self.sub_buckets), exp + self.min_exp)
+
+    def observe(self, secs: float) -> None:
+        self.counts[self.bucket(secs)] += 1
+        self.count += 1
+        self.sum += secs
+
+    def observe_many(self, secs: np.ndarray) -> None:
+        """observe() over an array of values."""
+        mantissa, exp = np.frexp(secs)
+        i = (exp - self.min_exp) * self.sub_buckets + ((mantissa - 0.5) * 2 * self.sub_buckets).astype(np.int64)
+        i = np.where(secs > 0.0, np.clip(i, 0, self._last), 0)
+        self.counts += np.bincount(i, minlength=self.counts.shape[0])
+        self.count += int(secs.shape[0])
+        self.sum += float(secs.sum())
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0.0 when empty)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.upper_bound(i)
+        return self.upper_bound(len(self.counts) - 1)
+
+    def cumulative(self, bounds: Sequence[float]) -> List[int]:
+        """Observations <= each bound; bounds on power-of-two edges are exact."""
+        out, seen, i = [], 0, 0
+        for bound in bounds:
+            while i < len(self.counts) and self.upper_bound(i) <= bound:
+                seen += self.counts[i]
+                i += 1
+            out.append(seen)
+        return out
+
+
+# decision_codes code + 1 -> name: batch routes carry -1 for an empty pend_origin
+_ROUTE_NAMES = ("",) + STATES
+
+
+def _route_counts(codes: np.ndarray) -> Dict[tuple, int]:
+    """Rows per route for a (len(ROUTE_LABELS), n) array of int8 route codes."""
+    base = len(_ROUTE_NAMES)
+    keys = np.zeros(codes.shape[1], dtype=np.int64)
+    for stage in codes[::-1]:  # one digit per stage, v1 least significant
+        keys = keys * base + (stage.astype(np.int64) + 1)
+    unique, counts = np.unique(keys, return_counts=True)
+    routes = {}
+    for key, n in zip(unique.tolist(), counts.tolist()):
+        route = []
+        for _ in ROUTE_LABELS:
+            key, digit = divmod(key, base)
+            route.append(_ROUTE_NAMES[digit])
+        routes[tuple(route)] = n
+    return routes
+
+
+def _decision_counts(routes: Dict[tuple, int]) -> Dict[str, Counter]:
+    counts = {label: Counter() for label in ROUTE_LABELS}
+    for route, n in routes.items():
+        for label, value in zip(ROUTE_LABELS, route):
+            counts[label][value] += n
+    return counts
+
+
+class EngineMetrics:
+    """
+    Per-stage latency histograms and routing counters for DecisionEngine.
+
+    The engine times each stage with perf_counter and hands the timings over once per
+    call, together with the route each row took (v1, v2, v3, v4 decision, pend_origin):
+    a name tuple for a single row, a stacked int8 decision_codes array for a batch.
+    observe() only appends the call to a queue; every FOLD_CALLS calls, and before any
+    read, fold() buckets the queue in bulk with NumPy. A single-row request pays a deque
+    append, and one request in FOLD_CALLS pays the fold. Histograms are kept separately
+    for single rows ("row") and whole batches ("batch"). Stages a row never reaches (V2
+    for rows that did not abstain, SHAP for non-PEND rows, ...) are not recorded, so
+    each stage's count is how often it ran.
+
+    Counts are per process: with MARI_INFERENCE_POOL=process each worker keeps its own.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.routes: Counter = Counter()
+        self.rows = Counter()
+        self.calls = Counter()
+
+    def observe(self, path: str, timings: Iterable[Tuple[str, float]], routes: Union[Iterable[tuple], np.ndarray],
+                n_rows: int = 1) -> None:
+        """
+        Record one evaluate call: (stage, seconds) pairs and the rows' routes, either
+        route tuples or a (len(ROUTE_LABELS), n_rows) int8 array of decision_codes codes
+        with -1 for an empty pend_origin.
+        """
+        pending = self._pending
+        pending.append((path, timings, routes, n_rows))  # deque.append is thread-safe
+        if len(pending) >= FOLD_CALLS:
+            self.fold()
+
+    def fold(self) -> None:
+        """Bucket every queued call into the histograms and counters."""
+        with self._lock:
+            pending = self._pending
+            queued = [pending.popleft() for _ in range(len(pending))]
+            if not queued:
+                return
+            for path in {call[0] for call in queued}:
+                calls = [call for call in queued if call[0] == path]
+                self.calls[path] += len(calls)
+                self.rows[path] += sum(call[3] for call in calls)
+                coded = [call[2] for call in calls if isinstance(call[2], np.ndarray)]
+                if coded:
+                    self.routes.update(_route_counts(np.concatenate(coded, axis=1)))
+                self.routes.update(chain.from_iterable(call[2] for call in calls if not isinstance(call[2], np.ndarray)))
+                stages, secs = zip(*chain.from_iterable(call[1] for call in calls))
+                codes = np.fromiter(map(_STAGE_CODES.__getitem__, stages), dtype=np.int64, count=len(stages))
+                secs = np.fromiter(secs, dtype=np.float64, count=len(secs))
+                for code in np.flatnonzero(np.bincount(codes)).tolist():
+                    hist = self.histograms.get((path, STAGES[code]))
+                    if hist is None:
+                        hist = self.histograms[(path, STAGES[code])] = LatencyHistogram()
+                    hist.observe_many(secs[codes == code])
+
+    def decision_counts(self) -> Dict[str, Counter]:
+        """Rows per decision at each routing stage (v1..v4, pend_origin)."""
+        self.fold()
+        with self._lock:
+            return _decision_counts(dict(self.routes))
+
+    def render_prometheus(self, prefix: str = "mari") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        self.fold()
+        with self._lock:
+            histograms = {key: h.copy() for key, h in self.histograms.items()}
+            routes = dict(self.routes)
+            rows, calls = dict(self.rows), dict(self.calls)
+
+        lines = [
+            f"# HELP {prefix}_engine_calls_total evaluate_transaction (path=row) and evaluate_batch (path=batch) calls.",
+            f"# TYPE {prefix}_engine_calls_total counter",
+        ]
+        lines += [f'{prefix}_engine_calls_total{{path="{p}"}} {n}' for p, n in sorted(calls.items())]
+        lines += [f"# HELP {prefix}_engine_rows_total Rows scored.", f"# TYPE {prefix}_engine_rows_total counter"]
+        lines += [f'{prefix}_engine_rows_total{{path="{p}"}} {n}' for p, n in sorted(rows.items())]
+
+        # Exported at every power of two from ~1 us to 64 s; the fine buckets feed the quantiles
+        bounds = [2.0 ** e for e in range(-20, 7)]
+        name = f"{prefix}_stage_seconds"
+        lines += [f"# HELP {name} Wall time per engine stage, per call.", f"# TYPE {name} histogram"]
+        ordered = sorted(histograms, key=lambda key: (key[0], STAGES.index(key[1]) if key[1] in STAGES else len(STAGES)))
+        for path, stage in ordered:
+            hist = histograms[(path, stage)]
+            labels = f'path="{path}",stage="{stage}"'
+            for bound, n in zip(bounds, hist.cumulative(bounds)):
+                lines.append(f'{name}_bucket{{{labels},le="{bound:.9g}"}} {n}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum:.9g}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        name = f"{prefix}_stage_latency_quantile_seconds"
+        lines += [f"# HELP {name} Stage latency quantiles from the HDR buckets (upper bounds, 1/8 octave).",
+                  f"# TYPE {name} gauge"]
+        for path, stage in ordered:
+            for q in QUANTILES:
+                value = histograms[(path, stage)].quantile(q)
+                lines.append(f'{name}{{path="{path}",stage="{stage}",quantile="{q}"}} {value:.9g}')
+
+        name = f"{prefix}_route_total"
+        lines += [f"# HELP {name} Rows per V1 -> V2 -> V3 -> V4 route.", f"# TYPE {name} counter"]
+        for route, n in sorted(routes.items()):
+            labels = ",".join(f'{label}="{value}"' for label, value in zip(ROUTE_LABELS, route))
+            lines.append(f"{name}{{{labels}}} {n}")
+
+        name = f"{prefix}_decisions_total"
+        lines += [f"# HELP {name} Rows per decision at each routing stage.", f"# TYPE {name} counter"]
+        counts = _decision_counts(routes)
+        for label in ROUTE_LABELS:
+            for value, n in sorted(counts[label].items()):
+                lines.append(f'{name}{{stage="{label}",decision="{value}"}} {n}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,204 @@
+import glob
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from xgboost import XGBClassifier
+
+from backend.engine.dataset_cache import CACHE_DIR, CSV_PATH, load_dataset
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+# Member hyperparameters, as in phase2_uncertainty.py
+MEMBER_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 4,
+    "learning_rate": 0.05,
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "device": "cpu",
+}
+
+
+def _smaps_rollup_kb(pid: int) -> Dict[str, int]:
+    totals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == "kB":
+                totals[fields[0][:-1]] = int(fields[1])
+    return totals
+
+
+def _process_tree(pid: int) -> List[int]:
+    """pid and all of its descendants (Linux /proc)."""
+    pids, i = [pid], 0
+    while i < len(pids):
+        for path in glob.glob(f"/proc/{pids[i]}/task/*/children"):
+            try:
+                with open(path) as f:
+                    pids += [int(child) for child in f.read().split()]
+            except OSError:
+                pass
+        i += 1
+    return pids
+
+
+class MemorySampler:
+    """
+    Samples the summed RSS and PSS of this process and all of its descendants on a
+    background thread and keeps the peaks, i.e. the memory a run held at one time.
+    Per-process ru_maxrss peaks need not coincide, so their sum overstates it. PSS
+    splits shared pages (the memory-mapped training split) between the processes
+    mapping them and so counts them once; RSS counts them in every process.
+    Linux only: elsewhere the peaks stay None.
+    """
+
+    def __init__(self, interval_secs: float = 0.05) -> None:
+        self.interval_secs = interval_secs
+        self.peak_rss_mb: float | None = None
+        self.peak_pss_mb: float | None = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> None:
+        rss = pss = 0
+        for pid in _process_tree(os.getpid()):
+            try:
+                totals = _smaps_rollup_kb(pid)
+            except OSError:  # exited between listing and reading
+                continue
+            rss += totals.get("Rss", 0)
+            pss += totals.get("Pss", 0)
+        self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss / 1e3)
+        self.peak_pss_mb = max(self.peak_pss_mb or 0.0, pss / 1e3)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_secs):
+            self.sample()
+
+    def __enter__(self) -> "MemorySampler":
+        if os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"):
+            self.sample()
+            self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.sample()
+
+
+def peak_rss_mb(who: str = "self") -> float | None:
+    """Peak resident set size of this process (or of its reaped children) in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return usage.ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3)
+
+
+def bootstrap_indices(seed: int, n: int) -> np.ndarray:
+    """The rows np.random.seed(seed); np.random.choice(n, n, replace=True) draws."""
+    return np.random.RandomState(seed).choice(n, n, replace=True)
+
+
+def scale_pos_weight(y_train: pd.Series) -> float:
+    return (len(y_train) - y_train.sum()) / y_train.sum()
+
+
+def fit_member(seed: int, X_train: pd.DataFrame, y_train: pd.Series, n_jobs: int | None = None) -> CalibratedClassifierCV:
+    """
+    One isotonic-calibrated XGBoost member on bootstrap sample `seed`. The sample is
+    gathered from X_train here, in the process that fits it: with a cached dataset
+    X_train is the shared memmap, so only the fitting worker holds a copy.
+    """
+    indices = bootstrap_indices(seed, len(X_train))
+    X_boot = X_train.iloc[indices]
+    y_boot = y_train.iloc[indices]
+    base_model = XGBClassifier(
+        **MEMBER_PARAMS,
+        scale_pos_weight=scale_pos_weight(y_train),
+        random_state=seed,
+        n_jobs=n_jobs,
+    )
+    model = CalibratedClassifierCV(base_model, method="isotonic", cv=3)
+    model.fit(X_boot, y_boot)
+    return model
+
+
+def _fit_member_worker(task: Tuple[int, str, str, int]) -> Tuple[int, Any, float, float | None]:
+    seed, csv_path, cache_dir, n_jobs = task
+    t0 = time.perf_counter()
+    # Memory-mapped: every worker reads the same page-cache copy of X_train
+    X_train, _, y_train, _ = load_dataset(csv_path, cache_dir).train_test_split()
+    model = fit_member(seed, X_train, y_train, n_jobs)
+    return seed, model, time.perf_counter() - t0, peak_rss_mb()
+
+
+def train_serial(n_models: int = 5, csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR) -> List[Any]:
+    """The phase2_uncertainty.py loop: one member after another, XGBoost on every core."""
+    X_train, _, y_train, _ = load_dataset(csv_path, cache_dir).train_test_split()
+    return [fit_member(seed, X_train, y_train) for seed in range(n_models)]
+
+
+def _train_serial_worker(task: Tuple[int, str, str]) -> Tuple[List[Any], float, float | None]:
+    t0 = time.perf_counter()
+    models = train_serial(*task)
+    return models, time.perf_counter() - t0, peak_rss_mb()
+
+
+def train_serial_isolated(
+    n_models: int = 5, csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """train_serial in a fresh spawned process, so its memory is measured on its own."""
+    load_dataset(csv_path, cache_dir)
+    with MemorySampler() as memory, multiprocessing.get_context("spawn").Pool(1) as pool:
+        models, secs, rss = pool.apply(_train_serial_worker, ((n_models, csv_path, cache_dir),))
+    return models, {"train_secs": secs, "worker_peak_rss_mb": rss,
+                    "peak_rss_mb": memory.peak_rss_mb, "peak_pss_mb": memory.peak_pss_mb}
+
+
+def train_parallel(
+    n_models: int = 5,
+    workers: int | None = None,
+    csv_path: str = CSV_PATH,
+    cache_dir: str = CACHE_DIR,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Fit the members in `workers` spawned processes, one member per process. Each
+    XGBoost gets cpu_count // workers threads, so workers x threads never exceeds
+    the cores. Members depend only on their seed: the result matches train_serial's
+    up to XGBoost's thread-count-dependent float summation order.
+
+    peak_rss_mb / peak_pss_mb are the run's concurrent peaks (parent and workers
+    sampled together, see MemorySampler); member_peak_rss_mb is each worker's own.
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, n_models))
+    n_jobs = max(1, cpus // workers)
+    load_dataset(csv_path, cache_dir)  # build the cache once, before the workers race to
+
+    tasks = [(seed, csv_path, cache_dir, n_jobs) for seed in range(n_models)]
+    models: Dict[int, Any] = {}
+    worker_secs: Dict[int, float] = {}
+    worker_rss: Dict[int, float | None] = {}
+    with MemorySampler() as memory, multiprocessing.get_context("spawn").Pool(workers, maxtasksperchild=1) as pool:
+        for seed, model, secs, rss in pool.imap_unordered(_fit_member_worker, tasks):
+            models[seed], worker_secs[seed], worker_rss[seed] = model, secs, rss
+            print(f"[ensemble_training] member {seed} fitted in {secs:.1f}s")
+
+    stats = {"workers": workers, "threads_per_member": n_jobs, "member_secs": worker_secs, "member_peak_rss_mb": worker_rss,
+             "peak_rss_mb": memory.peak_rss_mb, "peak_pss_mb": memory.peak_pss_mb}
+    return [models[seed] for seed in range(n_models)], stats
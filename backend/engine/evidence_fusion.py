@@ -0,0 +1,88 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+# Column layout of an (n, 3) mass array: m({Fraud}), m({Legit}), m({Fraud, Legit})
+F, L, FL = 0, 1, 2
+
+
+def _masses(m_F: np.ndarray, m_L: np.ndarray, m_FL: np.ndarray) -> np.ndarray:
+    total = m_F + m_L + m_FL
+    return np.stack([m_F / total, m_L / total, m_FL / total], axis=1)
+
+
+# ============================================================
+# BASIC PROBABILITY ASSIGNMENTS
+# ============================================================
+
+def ensemble_bpa(mean_prob: np.ndarray, std: np.ndarray, std_scale: float = 0.05, max_ign: float = 0.50) -> np.ndarray:
+    """DecisionEngine.bpa_from_ensemble over arrays: ensemble disagreement becomes ignorance."""
+    std_normalised = np.clip(np.asarray(std, dtype=float) / std_scale, 0.0, 1.0)
+    uncertainty_weight = std_normalised * max_ign
+    mean_prob = np.asarray(mean_prob, dtype=float)
+    return _masses(mean_prob * (1.0 - uncertainty_weight), (1.0 - mean_prob) * (1.0 - uncertainty_weight),
+                   uncertainty_weight)
+
+
+def isolation_forest_bpa(raw_score: np.ndarray, sigmoid_scale: float = 20.0, base_ign: float = 0.40) -> np.ndarray:
+    """DecisionEngine.bpa_from_isolation_forest over arrays."""
+    anomaly_degree = np.clip(1.0 / (1.0 + np.exp(np.asarray(raw_score, dtype=float) * sigmoid_scale)), 0.0, 1.0)
+    return _masses(anomaly_degree * (1.0 - base_ign), (1.0 - anomaly_degree) * (1.0 - base_ign),
+                   np.full(anomaly_degree.shape, base_ign))
+
+
+def svm_bpa(svm_prob_fraud: np.ndarray, base_ign: float = 0.15, max_ign: float = 0.45) -> np.ndarray:
+    """DecisionEngine.bpa_from_svm over arrays: ignorance shrinks as the SVM gets confident."""
+    svm_prob_fraud = np.asarray(svm_prob_fraud, dtype=float)
+    confidence = np.clip(np.abs(svm_prob_fraud - 0.5) * 2.0, 0.0, 1.0)
+    ign = max_ign - (max_ign - base_ign) * confidence
+    return _masses(svm_prob_fraud * (1.0 - ign), (1.0 - svm_prob_fraud) * (1.0 - ign), ign)
+
+
+# ============================================================
+# COMBINATION
+# ============================================================
+
+def dempster_combine(m1: np.ndarray, m2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Dempster's rule row by row on (n, 3) masses. Returns (combined masses, conflict K)."""
+    m1_F, m1_L, m1_FL = m1[:, F], m1[:, L], m1[:, FL]
+    m2_F, m2_L, m2_FL = m2[:, F], m2[:, L], m2[:, FL]
+
+    K = m1_F * m2_L + m1_L * m2_F
+    K = np.where(K >= 1.0 - 1e-9, 0.999999, K)
+
+    normaliser = 1.0 - K
+    num_F = m1_F * m2_F + m1_F * m2_FL + m1_FL * m2_F
+    num_L = m1_L * m2_L + m1_L * m2_FL + m1_FL * m2_L
+    num_FL = m1_FL * m2_FL
+    return _masses(num_F / normaliser, num_L / normaliser, num_FL / normaliser), K
+
+
+def combine_sources(sources: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fold Dempster's rule left to right over any number of (n, 3) sources. K is the
+    conflict of the last combination, the value V3 reports and routes on.
+    """
+    if len(sources) < 2:
+        raise ValueError("Evidence fusion needs at least two sources")
+    combined, K = dempster_combine(sources[0], sources[1])
+    for masses in sources[2:]:
+        combined, K = dempster_combine(combined, masses)
+    return combined, K
+
+
+def belief_metrics(m: np.ndarray) -> Dict[str, np.ndarray]:
+    """DecisionEngine.extract_belief_metrics over an (n, 3) mass array."""
+    return {
+        "bel_F": m[:, F],
+        "pl_F": m[:, F] + m[:, FL],
+        "bel_L": m[:, L],
+        "pl_L": m[:, L] + m[:, FL],
+        "ignorance": m[:, FL],
+    }
+
+
+def fuse_evidence(sources: Sequence[np.ndarray]) -> Dict[str, np.ndarray]:
+    """combine_sources + belief_metrics: bel_F, pl_F, bel_L, pl_L, ignorance and conflict_K per row."""
+    combined, K = combine_sources(sources)
+    return {**belief_metrics(combined), "conflict_K": K}
@@ -0,0 +1,402 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Rows per traversal chunk: keeps the (rows, trees) index matrices around a few MB
+_CHUNK_ROWS = 256
+
+# Slack on cascade margin bounds; far above float32 rounding over a few hundred trees
+_MARGIN_EPS = 1e-3
+
+# glibc expf (the libm XGBoost's sigmoid calls), evaluated in float64 exactly as glibc
+# does: exp(x) = 2^(k/32) * 2^(r/32) with a table for 2^(i/32) and a cubic for the rest.
+# np.exp on float32 and float64-then-round both differ from it by an ulp on some inputs,
+# which the isotonic maps can amplify to ~1e-6 on the calibrated probability.
+_EXPF_TABLE_BITS = 5
+_EXPF_N = 1 << _EXPF_TABLE_BITS
+_EXPF_TABLE = np.array([
+    0x3ff0000000000000, 0x3fefd9b0d3158574, 0x3fefb5586cf9890f, 0x3fef9301d0125b51,
+    0x3fef72b83c7d517b, 0x3fef54873168b9aa, 0x3fef387a6e756238, 0x3fef1e9df51fdee1,
+    0x3fef06fe0a31b715, 0x3feef1a7373aa9cb, 0x3feedea64c123422, 0x3feece086061892d,
+    0x3feebfdad5362a27, 0x3feeb42b569d4f82, 0x3feeab07dd485429, 0x3feea47eb03a5585,
+    0x3feea09e667f3bcd, 0x3fee9f75e8ec5f74, 0x3feea11473eb0187, 0x3feea589994cce13,
+    0x3feeace5422aa0db, 0x3feeb737b0cdc5e5, 0x3feec49182a3f090, 0x3feed503b23e255d,
+    0x3feee89f995ad3ad, 0x3feeff76f2fb5e47, 0x3fef199bdd85529c, 0x3fef3720dcef9069,
+    0x3fef5818dcfba487, 0x3fef7c97337b9b5f, 0x3fefa4afa2a490da, 0x3fefd0765b6e4540,
+], dtype=np.uint64)
+_EXPF_INV_LN2_N = float.fromhex("0x1.71547652b82fep+0") * _EXPF_N
+_EXPF_SHIFT = float.fromhex("0x1.8p+52")
+_EXPF_POLY = (
+    float.fromhex("0x1.c6af84b912394p-5") / _EXPF_N / _EXPF_N / _EXPF_N,
+    float.fromhex("0x1.ebfce50fac4f3p-3") / _EXPF_N / _EXPF_N,
+    float.fromhex("0x1.62e42ff0c52d6p-1") / _EXPF_N,
+)
+
+
+def _expf(x: np.ndarray) -> np.ndarray:
+    """float32 exp rounded the way glibc's expf rounds it (|x| <= 88.7)."""
+    z = _EXPF_INV_LN2_N * x.astype(np.float64)
+    kd = z + _EXPF_SHIFT
+    ki = kd.view(np.uint64)
+    r = z - (kd - _EXPF_SHIFT)
+    s = (_EXPF_TABLE[ki % np.uint64(_EXPF_N)] + (ki << np.uint64(52 - _EXPF_TABLE_BITS))).view(np.float64)
+    c0, c1, c2 = _EXPF_POLY
+    y = (c0 * r + c1) * (r * r) + (c2 * r + 1.0)
+    return (y * s).astype(np.float32)
+
+
+def _xgb_sigmoid(margins: np.ndarray) -> np.ndarray:
+    """XGBoost's float32 common::Sigmoid: 1 / (expf(min(-x, 88.7)) + 1 + 1e-16)."""
+    x = np.minimum(-margins.astype(np.float32), np.float32(88.7))
+    return np.float32(1.0) / (_expf(x) + np.float32(1.0) + np.float32(1e-16))
+
+
+def _unwrap_calibrated(member: Any) -> List[Tuple[Any, Any]]:
+    """Return [(xgb_classifier, isotonic_calibrator), ...] for one CalibratedClassifierCV."""
+    pairs = []
+    for cc in member.calibrated_classifiers_:
+        # sklearn < 1.2 named these base_estimator / calibrators_
+        estimator = cc.estimator if hasattr(cc, "estimator") else cc.base_estimator
+        calibrators = cc.calibrators if hasattr(cc, "calibrators") else cc.calibrators_
+        if len(calibrators) != 1:
+            raise ValueError("Fused ensemble only supports binary calibrated classifiers")
+        pairs.append((estimator, calibrators[0]))
+    return pairs
+
+
+def _parse_base_score(raw: str) -> np.float32:
+    # xgboost >= 3 serialises base_score as a vector, e.g. "[1.7E-3]"; it is a float32
+    return np.float32(str(raw).strip("[]").split(",")[0])
+
+
+def _booster_trees(xgb_model: Any) -> Tuple[np.float32, List[dict]]:
+    """Read a fitted XGBClassifier's trees and base margin from its JSON dump."""
+    model = json.loads(bytes(xgb_model.get_booster().save_raw("json")))
+    learner = model["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Fused ensemble only supports binary:logistic boosters, got {objective}")
+
+    base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+    # ProbToMargin in float32: -logf(1.0f / base_score - 1.0f)
+    base_margin = np.float32(-np.log(np.float64(np.float32(1.0) / base_score - np.float32(1.0))))
+
+    trees = learner["gradient_booster"]["model"]["trees"]
+    for tree in trees:
+        if any(tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported by the fused ensemble")
+    return base_margin, trees
+
+
+def _isotonic_predict(t: np.ndarray, xp: np.ndarray, fp: np.ndarray) -> np.ndarray:
+    """
+    IsotonicRegression.predict (out_of_bounds="clip") evaluated the way sklearn and scipy
+    do: float64 tables go through np.interp, float32 tables through interp1d's own
+    linear formula in float32.
+    """
+    t = np.clip(t.astype(xp.dtype), xp[0], xp[-1])
+    if xp.shape[0] == 1:
+        return np.repeat(fp, t.shape[0])
+    if xp.dtype == np.float64 and fp.dtype == np.float64:
+        return np.interp(t, xp, fp)
+    hi = np.searchsorted(xp, t).clip(1, xp.shape[0] - 1)
+    lo = hi - 1
+    slope = (fp[hi] - fp[lo]) / (xp[hi] - xp[lo])
+    return (slope * (t - xp[lo]) + fp[lo]).astype(xp.dtype)
+
+
+class FusedEnsemble:
+    """
+    The bootstrap ensemble (members x CV folds of XGBoost + isotonic calibration)
+    flattened into contiguous NumPy arrays and evaluated in one vectorized traversal:
+
+    - Node arrays over every tree of every booster: feature, threshold, left, right,
+      default_left, leaf value. Leaves point to themselves so a fixed number of
+      steps (the deepest tree) lands every row on its leaf.
+    - Per-booster base margin, then XGBoost's float32 sigmoid.
+    - Per-booster isotonic map as an np.interp table.
+    - Fold probabilities averaged into member probabilities, then mean/std across members.
+    """
+
+    ARRAY_NAMES = (
+        "feature", "threshold", "left", "right", "default_left", "value",
+        "tree_root", "tree_booster", "booster_base_margin", "booster_member",
+        "iso_x", "iso_y", "iso_offsets", "iso_float32", "max_depth",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Fused ensemble arrays missing: {missing}")
+
+        self.feature = np.asarray(arrays["feature"], dtype=np.int32)
+        self.threshold = np.asarray(arrays["threshold"], dtype=np.float32)
+        self.left = np.asarray(arrays["left"], dtype=np.int32)
+        self.right = np.asarray(arrays["right"], dtype=np.int32)
+        self.default_left = np.asarray(arrays["default_left"], dtype=bool)
+        self.value = np.asarray(arrays["value"], dtype=np.float32)
+        self.tree_root = np.asarray(arrays["tree_root"], dtype=np.int32)
+        self.tree_booster = np.asarray(arrays["tree_booster"], dtype=np.int32)
+        self.booster_base_margin = np.asarray(arrays["booster_base_margin"], dtype=np.float32)
+        self.booster_member = np.asarray(arrays["booster_member"], dtype=np.int32)
+        self.iso_x = np.asarray(arrays["iso_x"], dtype=np.float64)
+        self.iso_y = np.asarray(arrays["iso_y"], dtype=np.float64)
+        self.iso_offsets = np.asarray(arrays["iso_offsets"], dtype=np.int64)
+        self.iso_float32 = np.asarray(arrays["iso_float32"], dtype=bool)
+        self.max_depth = int(arrays["max_depth"])
+
+        self.n_boosters = self.booster_base_margin.shape[0]
+        self.n_members = int(self.booster_member.max()) + 1
+        self.n_trees = self.tree_root.shape[0]
+
+        # Trees of one booster are contiguous: [booster_start[b], booster_start[b + 1])
+        counts = np.bincount(self.tree_booster, minlength=self.n_boosters)
+        self.booster_start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.uniform_trees = int(counts[0]) if np.all(counts == counts[0]) else None
+        self.member_boosters = [np.flatnonzero(self.booster_member == m) for m in range(self.n_members)]
+        self.iso_monotone = all(np.all(np.diff(self.iso_y[self.iso_offsets[b]:self.iso_offsets[b + 1]]) >= 0)
+                                for b in range(self.n_boosters))
+
+        # Children interleaved so one traversal step is one gather: children[2 * node + go_right]
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+
+        # Leaf value range of every tree, used to bound the trees a cascade skips
+        is_leaf = self.left == np.arange(self.left.shape[0])
+        self.tree_leaf_max = np.maximum.reduceat(np.where(is_leaf, self.value, -np.inf), self.tree_root)
+        self.tree_leaf_min = np.minimum.reduceat(np.where(is_leaf, self.value, np.inf), self.tree_root)
+        self.iso_tables = []
+        for b in range(self.n_boosters):
+            lo, hi = self.iso_offsets[b], self.iso_offsets[b + 1]
+            dtype = np.float32 if self.iso_float32[b] else np.float64
+            self.iso_tables.append((self.iso_x[lo:hi].astype(dtype), self.iso_y[lo:hi].astype(dtype)))
+        # prefix_trees results by n_prefix: the cascade asks for the same split on every call
+        self._prefix_cache: dict = {}
+
+    # ============================================================
+    # EXPORT / PERSISTENCE
+    # ============================================================
+
+    @classmethod
+    def from_models(cls, models: List[Any]) -> "FusedEnsemble":
+        """Flatten a list of CalibratedClassifierCV(XGBClassifier, method="isotonic") members."""
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+        tree_root, tree_booster = [], []
+        base_margins, booster_member = [], []
+        iso_x, iso_y, iso_offsets, iso_float32 = [], [], [0], []
+        max_depth = 0
+        n_nodes = 0
+
+        booster_idx = 0
+        for member_idx, member in enumerate(models):
+            for xgb_model, calibrator in _unwrap_calibrated(member):
+                base_margin, trees = _booster_trees(xgb_model)
+                for tree in trees:
+                    lc = np.asarray(tree["left_children"], dtype=np.int64)
+                    rc = np.asarray(tree["right_children"], dtype=np.int64)
+                    is_leaf = lc == -1
+                    own = np.arange(lc.shape[0])
+
+                    tree_root.append(n_nodes)
+                    tree_booster.append(booster_idx)
+                    feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+                    threshold.append(np.where(is_leaf, 0.0, tree["split_conditions"]))
+                    left.append(np.where(is_leaf, own, lc) + n_nodes)
+                    right.append(np.where(is_leaf, own, rc) + n_nodes)
+                    default_left.append(np.asarray(tree["default_left"], dtype=bool))
+                    # Leaf values live in split_conditions for leaf nodes
+                    value.append(np.where(is_leaf, tree["split_conditions"], 0.0))
+
+                    depth = np.zeros(lc.shape[0], dtype=np.int64)
+                    for node in range(lc.shape[0]):  # parents precede children in xgboost dumps
+                        if not is_leaf[node]:
+                            depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+                    max_depth = max(max_depth, int(depth.max()))
+                    n_nodes += lc.shape[0]
+
+                base_margins.append(base_margin)
+                booster_member.append(member_idx)
+                iso_x.append(np.asarray(calibrator.X_thresholds_, dtype=np.float64))
+                iso_y.append(np.asarray(calibrator.y_thresholds_, dtype=np.float64))
+                iso_offsets.append(iso_offsets[-1] + len(calibrator.X_thresholds_))
+                iso_float32.append(np.asarray(calibrator.X_thresholds_).dtype == np.float32)
+                booster_idx += 1
+
+        return cls({
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float32),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "default_left": np.concatenate(default_left),
+            "value": np.concatenate(value).astype(np.float32),
+            "tree_root": np.asarray(tree_root, dtype=np.int32),
+            "tree_booster": np.asarray(tree_booster, dtype=np.int32),
+            "booster_base_margin": np.asarray(base_margins, dtype=np.float32),
+            "booster_member": np.asarray(booster_member, dtype=np.int32),
+            "iso_x": np.concatenate(iso_x),
+            "iso_y": np.concatenate(iso_y),
+            "iso_offsets": np.asarray(iso_offsets, dtype=np.int64),
+            "iso_float32": np.asarray(iso_float32, dtype=bool),
+            "max_depth": np.asarray(max_depth),
+        })
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        arrays["max_depth"] = np.asarray(self.max_depth)
+        return arrays
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "FusedEnsemble":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    # ============================================================
+    # INFERENCE
+    # ============================================================
+
+    def leaf_values(self, X: np.ndarray, trees: np.ndarray | None = None) -> np.ndarray:
+        """Leaf value reached by every row in every tree (or the given trees): shape (n, trees)."""
+        Xf = np.ascontiguousarray(X, dtype=np.float32)
+        roots = self.tree_root if trees is None else self.tree_root[trees]
+        flat = Xf.ravel()
+        row_base = (np.arange(Xf.shape[0]) * Xf.shape[1])[:, None]
+        has_nan = bool(np.isnan(flat).any())
+        node = np.broadcast_to(roots, (Xf.shape[0], roots.shape[0])).copy()
+        # 1-D take() on flat arrays: markedly cheaper than 2-D fancy indexing
+        for _ in range(self.max_depth):
+            x = flat.take(row_base + self.feature.take(node))
+            go_right = ~(x < self.threshold.take(node))
+            if has_nan:
+                # Missing values follow each node's default direction
+                missing = np.isnan(x)
+                go_right[missing] = ~self.default_left.take(node[missing])
+            node = self.children.take(2 * node + go_right)
+        return self.value.take(node)
+
+    def booster_margins(self, leaves: np.ndarray) -> np.ndarray:
+        """Per-booster raw margins from a (n, n_trees) leaf matrix: shape (n, n_boosters), float32."""
+        n = leaves.shape[0]
+        base = np.broadcast_to(self.booster_base_margin, (n, self.n_boosters))
+        # XGBoost accumulates base + tree_0 + tree_1 + ... sequentially in float32
+        if self.uniform_trees is not None:
+            per_booster = leaves.reshape(n, self.n_boosters, self.uniform_trees)
+            stacked = np.concatenate([base[:, :, None], per_booster], axis=2)
+            return np.cumsum(stacked, axis=2, dtype=np.float32)[:, :, -1]
+
+        margins = np.empty((n, self.n_boosters), dtype=np.float32)
+        for b in range(self.n_boosters):
+            seg = leaves[:, self.booster_start[b]:self.booster_start[b + 1]]
+            stacked = np.hstack([base[:, b:b + 1], seg])
+            margins[:, b] = np.cumsum(stacked, axis=1, dtype=np.float32)[:, -1]
+        return margins
+
+    def calibrate(self, margins: np.ndarray) -> np.ndarray:
+        """XGBoost sigmoid followed by each booster's isotonic map: (n, n_boosters) float64."""
+        raw = _xgb_sigmoid(margins)
+        out = np.empty(raw.shape)
+        for b, (iso_x, iso_y) in enumerate(self.iso_tables):
+            out[:, b] = _isotonic_predict(raw[:, b], iso_x, iso_y)
+        # CalibratedClassifierCV snaps probabilities that overshoot 1.0 by float error
+        out[(out > 1.0) & (out <= 1.0 + 1e-5)] = 1.0
+        return out
+
+    def booster_proba(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated probability of every booster (member fold): shape (n, n_boosters)."""
+        out = np.empty((X.shape[0], self.n_boosters))
+        for lo in range(0, X.shape[0], _CHUNK_ROWS):
+            chunk = X[lo:lo + _CHUNK_ROWS]
+            out[lo:lo + chunk.shape[0]] = self.calibrate(self.booster_margins(self.leaf_values(chunk)))
+        return out
+
+    def members_from_boosters(self, booster_p: np.ndarray) -> np.ndarray:
+        """Average fold probabilities into member probabilities: shape (n_members, n)."""
+        probs = np.empty((self.n_members, booster_p.shape[0]))
+        for m, boosters in enumerate(self.member_boosters):
+            acc = np.zeros(booster_p.shape[0])
+            for b in boosters:
+                acc += booster_p[:, b]
+            probs[m] = acc / len(boosters)
+        return probs
+
+    def member_proba(self, X: np.ndarray) -> np.ndarray:
+        """Fraud probability of every ensemble member: shape (n_members, n)."""
+        return self.members_from_boosters(self.booster_proba(X))
+
+    def single_member_proba(self, X: np.ndarray, member: int) -> np.ndarray:
+        """Fraud probability of one member, traversing only its trees: equals member_proba(X)[member]."""
+        boosters = self.member_boosters[member]
+        trees = np.concatenate([np.arange(self.booster_start[b], self.booster_start[b + 1]) for b in boosters])
+        out = np.empty(X.shape[0])
+        for lo in range(0, X.shape[0], _CHUNK_ROWS):
+            chunk = X[lo:lo + _CHUNK_ROWS]
+            leaves = self.leaf_values(chunk, trees)
+            acc = np.zeros(chunk.shape[0])
+            col = 0
+            for b in boosters:
+                width = self.booster_start[b + 1] - self.booster_start[b]
+                stacked = np.hstack([np.full((chunk.shape[0], 1), self.booster_base_margin[b]), leaves[:, col:col + width]])
+                margin = np.cumsum(stacked, axis=1, dtype=np.float32)[:, -1]
+                p = _isotonic_predict(_xgb_sigmoid(margin), *self.iso_tables[b]).astype(np.float64)
+                p[(p > 1.0) & (p <= 1.0 + 1e-5)] = 1.0
+                acc += p
+                col += width
+            out[lo:lo + chunk.shape[0]] = acc / len(boosters)
+        return out
+
+    def predict_mean_std(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        probs_arr = self.member_proba(X)
+        return np.mean(probs_arr, axis=0), np.std(probs_arr, axis=0)
+
+    # ============================================================
+    # CASCADE BOUNDS
+    # ============================================================
+
+    def prefix_trees(self, n_prefix: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tree indices for the first n_prefix trees of every booster, with the per-booster
+        column offsets into them and the min/max margin the skipped trees can still add.
+        """
+        if n_prefix in self._prefix_cache:
+            return self._prefix_cache[n_prefix]
+        trees, offsets, suffix_min, suffix_max = [], [], [], []
+        for b in range(self.n_boosters):
+            start, end = self.booster_start[b], self.booster_start[b + 1]
+            stop = min(start + n_prefix, end)
+            offsets.append(sum(len(t) for t in trees))
+            trees.append(np.arange(start, stop))
+            suffix_min.append(float(np.sum(self.tree_leaf_min[stop:end], dtype=np.float64)))
+            suffix_max.append(float(np.sum(self.tree_leaf_max[stop:end], dtype=np.float64)))
+        split = np.concatenate(trees), np.asarray(offsets), np.asarray(suffix_min), np.asarray(suffix_max)
+        self._prefix_cache[n_prefix] = split
+        return split
+
+    def prefix_bounds(self, X: np.ndarray, n_prefix: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Upper bounds on the ensemble mean and std from the first n_prefix trees of each booster.
+
+        The skipped trees can move each margin by at most the sum of their leaf ranges;
+        sigmoid and the isotonic maps are non-decreasing, so the margin bounds carry
+        through to per-member probability bounds. The std bound is half the spread
+        between the highest and lowest member bound (Popoviciu's inequality).
+        """
+        if n_prefix < 1:
+            raise ValueError("Cascade needs at least one prefix tree per booster")
+        if not self.iso_monotone:
+            raise ValueError("Cascade bounds need non-decreasing isotonic calibrators")
+        trees, offsets, suffix_min, suffix_max = self.prefix_trees(n_prefix)
+        mean_hi = np.empty(X.shape[0])
+        std_hi = np.empty(X.shape[0])
+        for lo in range(0, X.shape[0], _CHUNK_ROWS):
+            chunk = X[lo:lo + _CHUNK_ROWS]
+            partial = np.add.reduceat(self.leaf_values(chunk, trees).astype(np.float64), offsets, axis=1)
+            partial += self.booster_base_margin
+            # _MARGIN_EPS covers float32 accumulation error in the full XGBoost sum
+            # Upper and lower margins stacked so both go through one calibration pass
+            margins = np.concatenate([partial + suffix_max + _MARGIN_EPS, partial + suffix_min - _MARGIN_EPS])
+            p_hi, p_lo = np.split(self.members_from_boosters(self.calibrate(margins)), 2, axis=1)
+            mean_hi[lo:lo + chunk.shape[0]] = np.mean(p_hi, axis=0)
+            std_hi[lo:lo + chunk.shape[0]] = (np.max(p_hi, axis=0) - np.min(p_lo, axis=0)) / 2.0
+        return mean_hi, std_hi
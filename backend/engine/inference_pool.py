@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict
+
+# Engine used by process-pool workers. Set before the workers fork, so each child
+# inherits the parent's loaded models copy-on-write instead of unpickling its own.
+_worker_engine = None
+
+
+def _call_engine(method: str, args: tuple) -> Any:
+    return getattr(_worker_engine, method)(*args)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class PoolSaturated(Exception):
+    """Raised by InferencePool.submit when the pool already holds its maximum work."""
+
+
+class InferencePool:
+    """
+    Bounded executor for DecisionEngine calls made from async request handlers.
+
+    mode="thread": a thread pool in this process. XGBoost and NumPy release the GIL
+        in their hot loops, so a few threads use several cores on one set of models.
+    mode="process": pre-forked worker processes sharing the already-loaded engine
+        through copy-on-write (fork start method, POSIX only).
+
+    At most `workers` calls run and `max_queue` wait; submit() beyond that raises
+    PoolSaturated immediately so the caller can shed load instead of queueing it.
+    """
+
+    MODES = ("thread", "process")
+
+    def __init__(self, engine: Any, mode: str = "thread", workers: int = None, max_queue: int = 64) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown inference pool mode: {mode}")
+        self.engine = engine
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.capacity = self.workers + max_queue
+
+        self._executor: Executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.n_completed = 0
+        self.n_shed = 0
+
+    def start(self) -> None:
+        """Create the executor; in process mode this forks every worker now."""
+        global _worker_engine
+        if self._executor is not None:
+            return
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+            return
+
+        _worker_engine = self.engine
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("fork")
+        )
+        # The fork context starts all workers on the first submit: do it before traffic
+        pids = {f.result() for f in [self._executor.submit(_warm_up) for _ in range(self.workers)]}
+        print(f"[InferencePool] Forked {len(pids)} inference workers.")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, method: str, *args: Any) -> "asyncio.Future":
+        """Run engine.<method>(*args) on the pool and return an awaitable for the result."""
+        if self._executor is None:
+            self.start()
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.n_shed += 1
+                raise PoolSaturated(f"{self.in_flight} requests in flight (capacity {self.capacity})")
+            self.in_flight += 1
+
+        try:
+            if self.mode == "thread":
+                future = self._executor.submit(getattr(self.engine, method), *args)
+            else:
+                future = self._executor.submit(_call_engine, method, args)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.n_completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.n_completed,
+                "shed": self.n_shed,
+            }
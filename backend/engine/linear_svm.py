@@ -0,0 +1,79 @@
+from typing import Any, Dict
+
+import numpy as np
+
+
+class LinearSvmScorer:
+    """
+    Closed-form scorer for the V2/V3 second-opinion SVM (StandardScaler +
+    CalibratedClassifierCV(LinearSVC, method="sigmoid")):
+
+    - scaler statistics applied as (X - mean) / scale, as StandardScaler.transform does
+    - one weight vector + intercept per calibrated fold
+    - Platt sigmoid per fold, 1 / (1 + exp(a * f + b)), averaged over folds
+
+    Scoring is a single matrix product, so cost no longer depends on sklearn's
+    per-call validation and per-fold dispatch. The object exposes both transform()
+    and predict_proba(), so it can stand in for the scaler and the calibrated SVM.
+    """
+
+    ARRAY_NAMES = ("scaler_mean", "scaler_scale", "coef", "intercept", "cal_a", "cal_b")
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Linear SVM arrays missing: {missing}")
+        self.scaler_mean = np.asarray(arrays["scaler_mean"], dtype=np.float64)
+        self.scaler_scale = np.asarray(arrays["scaler_scale"], dtype=np.float64)
+        self.coef = np.asarray(arrays["coef"], dtype=np.float64)
+        self.intercept = np.asarray(arrays["intercept"], dtype=np.float64)
+        self.cal_a = np.asarray(arrays["cal_a"], dtype=np.float64)
+        self.cal_b = np.asarray(arrays["cal_b"], dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, calibrated: Any, scaler: Any) -> "LinearSvmScorer":
+        coef, intercept, cal_a, cal_b = [], [], [], []
+        for cc in calibrated.calibrated_classifiers_:
+            # sklearn < 1.2 named these base_estimator / calibrators_
+            estimator = cc.estimator if hasattr(cc, "estimator") else cc.base_estimator
+            calibrators = cc.calibrators if hasattr(cc, "calibrators") else cc.calibrators_
+            if not hasattr(estimator, "coef_") or np.ndim(estimator.coef_) != 2 or estimator.coef_.shape[0] != 1:
+                raise ValueError(
+                    f"LinearSvmScorer needs a binary linear estimator, got {type(estimator).__name__}"
+                )
+            if len(calibrators) != 1 or not hasattr(calibrators[0], "a_"):
+                raise ValueError("LinearSvmScorer needs a binary sigmoid (Platt) calibration")
+            coef.append(np.asarray(estimator.coef_[0], dtype=np.float64))
+            intercept.append(float(np.ravel(estimator.intercept_)[0]))
+            cal_a.append(float(calibrators[0].a_))
+            cal_b.append(float(calibrators[0].b_))
+
+        n_features = coef[0].shape[0]
+        mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(n_features)
+        scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(n_features)
+        return cls({
+            "scaler_mean": np.asarray(mean, dtype=np.float64),
+            "scaler_scale": np.asarray(scale, dtype=np.float64),
+            "coef": np.vstack(coef),
+            "intercept": np.asarray(intercept),
+            "cal_a": np.asarray(cal_a),
+            "cal_b": np.asarray(cal_b),
+        })
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """StandardScaler.transform: (X - mean) / scale."""
+        return (np.asarray(X, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+
+    def decision_function(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Per-fold SVM margins on scaled features: shape (n, n_folds)."""
+        return X_scaled @ self.coef.T + self.intercept
+
+    def predict_proba(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Same layout as CalibratedClassifierCV.predict_proba: [:, 1] is P(fraud)."""
+        fold_p = 1.0 / (1.0 + np.exp(self.cal_a * self.decision_function(X_scaled) + self.cal_b))
+        fold_p[(fold_p > 1.0) & (fold_p <= 1.0 + 1e-5)] = 1.0
+        p_fraud = fold_p.mean(axis=1)
+        return np.column_stack([1.0 - p_fraud, p_fraud])
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# (raw row, future the request awaits, arrival time)
+_Pending = Tuple[np.ndarray, "asyncio.Future", float]
+
+
+def _percentiles_ms(samples) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=float), [50, 95, 99]) * 1e3
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3)}
+
+
+class MicroBatcher:
+    """
+    Dynamic batching for single-row requests on one event loop.
+
+    Concurrent submit() calls for the same version are collected until max_rows are
+    waiting or window_ms has passed since the first of them arrived. They are then
+    scored as one matrix by `score(raw_X, version) -> list of per-row results`,
+    and each caller gets its own row back. An exception from `score` is raised to
+    every request of that batch.
+
+    At most max_concurrent batches are scored at once. While they are busy, due rows
+    keep collecting (up to max_rows per batch) and go out as soon as a batch finishes,
+    so batches grow with load instead of multiplying.
+
+    stats() reports latency and throughput over the last `history` requests, for
+    tuning the window.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[np.ndarray, str], Awaitable[List[Any]]],
+        max_rows: int = 64,
+        window_ms: float = 2.0,
+        max_concurrent: int = 1,
+        history: int = 10000,
+    ) -> None:
+        self.score = score
+        self.max_rows = max_rows
+        self.window_ms = window_ms
+        self.max_concurrent = max_concurrent
+
+        self._pending: Dict[str, List[_Pending]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._due: Dict[str, None] = {}  # versions ready to go, oldest first
+        self._running = 0
+        self._tasks = set()
+
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_full_batches = 0
+        self._batch_rows = deque(maxlen=history)
+        self._queue_wait = deque(maxlen=history)
+        self._latency = deque(maxlen=history)
+        self._score_secs = deque(maxlen=history)
+        self._completed_at = deque(maxlen=history)
+
+    async def submit(self, row: np.ndarray, version: str = "V4") -> Any:
+        """Score one (1, 31) raw row as part of the next batch for `version`."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(version, [])
+        pending.append((row, future, time.perf_counter()))
+        self.n_requests += 1
+
+        if len(pending) >= self.max_rows:
+            self._mark_due(version)
+        elif len(pending) == 1 and version not in self._due:
+            self._timers[version] = loop.call_later(self.window_ms / 1e3, self._mark_due, version)
+        return await future
+
+    def _mark_due(self, version: str) -> None:
+        self._due[version] = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._due and self._running < self.max_concurrent:
+            version = next(iter(self._due))
+            pending = self._pending.pop(version, [])
+            batch, rest = pending[:self.max_rows], pending[self.max_rows:]
+            if rest:
+                # Overflow rows have waited behind a busy scorer: they go next
+                self._pending[version] = rest
+            else:
+                del self._due[version]
+                timer = self._timers.pop(version, None)
+                if timer is not None:
+                    timer.cancel()
+            if not batch:
+                continue
+
+            self._running += 1
+            self.n_batches += 1
+            self.n_full_batches += len(batch) >= self.max_rows
+            task = asyncio.ensure_future(self._score_batch(batch, version))
+            self._tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: "asyncio.Task") -> None:
+        self._tasks.discard(task)
+        self._running -= 1
+        self._dispatch()
+
+    async def _score_batch(self, pending: List[_Pending], version: str) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self.score(np.vstack([row for row, _, _ in pending]), version)
+        except Exception as exc:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        finished = time.perf_counter()
+        for (_, future, arrived), result in zip(pending, results):
+            # A request cancelled while waiting (client went away) just drops its row
+            if not future.done():
+                future.set_result(result)
+            self._queue_wait.append(started - arrived)
+            self._latency.append(finished - arrived)
+            self._completed_at.append(finished)
+        self._batch_rows.append(len(pending))
+        self._score_secs.append(finished - started)
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self._completed_at
+        span = completed[-1] - completed[0] if len(completed) > 1 else 0.0
+        return {
+            "max_rows": self.max_rows,
+            "window_ms": self.window_ms,
+            "max_concurrent": self.max_concurrent,
+            "requests": self.n_requests,
+            "batches": self.n_batches,
+            "full_batches": self.n_full_batches,
+            "mean_batch_rows": round(float(np.mean(self._batch_rows)), 2) if self._batch_rows else 0.0,
+            "throughput_rps": round(len(completed) / span, 1) if span > 0 else 0.0,
+            "queue_wait_ms": _percentiles_ms(self._queue_wait),
+            "batch_score_ms": _percentiles_ms(self._score_secs),
+            "latency_ms": _percentiles_ms(self._latency),
+        }
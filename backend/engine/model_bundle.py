@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict
+
+import numpy as np
+
+from backend.engine.fused_ensemble import FusedEnsemble
+from backend.engine.linear_svm import LinearSvmScorer
+from backend.engine.packed_isolation_forest import PackedIsolationForest
+from backend.engine.path_shap import PathShapExplainer
+
+MAGIC = b"MARIBNDL"
+FORMAT_VERSION = 1
+# magic, format version, reserved, header length
+_PREAMBLE = struct.Struct("<8sIIQ")
+# Every array starts on a cache-line (and SIMD) boundary
+_ALIGN = 64
+_HASH_CHUNK_BYTES = 1 << 20
+
+# Bundle component -> evaluator built from its arrays
+COMPONENTS = {
+    "ensemble": FusedEnsemble,
+    "isolation_forest": PackedIsolationForest,
+    "v2_svm": LinearSvmScorer,
+    "v3_svm": LinearSvmScorer,
+    "explainer": PathShapExplainer,
+}
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def _checksum(buffer, start: int) -> str:
+    h = hashlib.sha256()
+    for lo in range(start, buffer.shape[0], _HASH_CHUNK_BYTES):
+        h.update(buffer[lo:lo + _HASH_CHUNK_BYTES])
+    return h.hexdigest()
+
+
+class ModelBundle:
+    """
+    Every model the engine serves, as flat arrays in one file that is memory-mapped
+    read-only instead of unpickled:
+
+        MAGIC | format version | reserved | header length | JSON header | arrays
+
+    The header lists each component's arrays (dtype, shape, byte offset), aliases for
+    components stored once and served twice (V2/V3 share one SVM), the engine settings
+    (routing, Dempster-Shafer and cost thresholds), the digests of the artifacts it was
+    exported from, and a SHA-256 of everything after the header. Arrays start on
+    64-byte boundaries and are viewed in place, so loading reads only the header and
+    worker processes mapping the same file share its pages through the page cache.
+
+    Components are the NumPy evaluators the engine already has (FusedEnsemble,
+    PackedIsolationForest, LinearSvmScorer, PathShapExplainer) and are rebuilt from
+    their to_arrays() output, so serving a bundle needs neither sklearn nor xgboost
+    unpickling, nor matching library versions.
+    """
+
+    def __init__(
+        self,
+        components: Dict[str, Dict[str, np.ndarray]],
+        aliases: Dict[str, str] | None = None,
+        settings: Dict[str, Any] | None = None,
+        sources: Dict[str, str] | None = None,
+        header: Dict[str, Any] | None = None,
+    ) -> None:
+        unknown = set(components) | set(aliases or {})
+        unknown -= set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown bundle components: {sorted(unknown)}")
+        self.components = components
+        self.aliases = aliases or {}
+        self.settings = settings or {}
+        self.sources = sources or {}
+        self.header = header or {}
+        self.path: str | None = None
+
+    @property
+    def digest(self) -> str | None:
+        """SHA-256 of the array data, as recorded when the bundle was written."""
+        return self.header.get("checksum")
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray] | None:
+        return self.components.get(self.aliases.get(name, name))
+
+    def build(self, name: str) -> Any:
+        """The evaluator for one component, or None when the bundle does not carry it."""
+        arrays = self.arrays(name)
+        return None if arrays is None else COMPONENTS[name](arrays)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for arrays in self.components.values() for a in arrays.values())
+
+    # ============================================================
+    # WRITE
+    # ============================================================
+
+    def save(self, path: str) -> str:
+        """Write the bundle (atomically, via a temporary file); returns its checksum."""
+        layout, offset = {}, 0
+        for component, arrays in self.components.items():
+            for name, array in arrays.items():
+                array = np.asarray(array)
+                layout[f"{component}/{name}"] = {
+                    "dtype": array.dtype.str,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                    "nbytes": int(array.nbytes),
+                }
+                offset = _aligned(offset + array.nbytes)
+        data_bytes = offset
+
+        hasher = hashlib.sha256()
+        blocks = []
+        for key, entry in layout.items():
+            component, name = key.split("/", 1)
+            block = np.ascontiguousarray(self.components[component][name]).tobytes()
+            block += b"\x00" * (_aligned(len(block)) - len(block))
+            hasher.update(block)
+            blocks.append(block)
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "numpy": np.__version__,
+            "arrays": layout,
+            "aliases": self.aliases,
+            "settings": self.settings,
+            "sources": self.sources,
+            "data_bytes": data_bytes,
+            "checksum": hasher.hexdigest(),
+        }
+        header_bytes = json.dumps(header, indent=1, sort_keys=True).encode("utf-8")
+        data_start = _aligned(_PREAMBLE.size + len(header_bytes))
+        preamble = _PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes))
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(preamble + header_bytes)
+            f.write(b"\x00" * (data_start - _PREAMBLE.size - len(header_bytes)))
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.header = header
+        self.path = path
+        return header["checksum"]
+
+    # ============================================================
+    # READ
+    # ============================================================
+
+    @classmethod
+    def load(cls, path: str, verify: bool = True) -> "ModelBundle":
+        """
+        Map a bundle read-only. Array contents are not read until used; verify=True
+        hashes the data section once against the header checksum (the pages it touches
+        stay in the shared page cache).
+        """
+        with open(path, "rb") as f:
+            magic, version, _, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a model bundle")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has bundle format {version}; this build reads format {FORMAT_VERSION}")
+            header = json.loads(f.read(header_len))
+
+        data_start = _aligned(_PREAMBLE.size + header_len)
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if buffer.shape[0] != data_start + header["data_bytes"]:
+            raise ValueError(f"{path} is truncated or has trailing bytes")
+        if verify and _checksum(buffer, data_start) != header["checksum"]:
+            raise ValueError(f"{path} failed its checksum; the file is corrupt")
+
+        components: Dict[str, Dict[str, np.ndarray]] = {}
+        for key, entry in header["arrays"].items():
+            component, name = key.split("/", 1)
+            lo = data_start + entry["offset"]
+            view = buffer[lo:lo + entry["nbytes"]].view(np.dtype(entry["dtype"])).reshape(entry["shape"])
+            components.setdefault(component, {})[name] = view
+
+        bundle = cls(components, header["aliases"], header["settings"], header["sources"], header)
+        bundle.path = path
+        return bundle
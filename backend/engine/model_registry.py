@@ -0,0 +1,70 @@
+import hashlib
+import os
+import time
+from typing import Any, Callable, Dict
+
+import joblib
+
+_HASH_CHUNK_BYTES = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of the file contents, read in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Loads model artifacts keyed by content hash, so the same bytes are unpickled once
+    and shared by every stage (and every engine) that asks for them, whatever path
+    they are requested under.
+
+    Keeps load statistics so the engine can report what sharing saved at boot.
+    """
+
+    def __init__(self, loader: Callable[[str], Any] = joblib.load) -> None:
+        self.loader = loader
+        self._objects: Dict[str, Any] = {}
+        self._load_secs: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self.digests: Dict[str, str] = {}  # requested path -> content digest
+        self.n_requests = 0
+        self.n_shared = 0
+        self.bytes_shared = 0
+        self.secs_shared = 0.0
+        self.secs_hashing = 0.0
+
+    def load(self, path: str) -> Any:
+        self.n_requests += 1
+        t0 = time.perf_counter()
+        digest = file_digest(path)
+        self.secs_hashing += time.perf_counter() - t0
+        self.digests[path] = digest
+
+        if digest in self._objects:
+            self.n_shared += 1
+            self.bytes_shared += self._sizes[digest]
+            self.secs_shared += self._load_secs[digest]
+            return self._objects[digest]
+
+        t0 = time.perf_counter()
+        obj = self.loader(path)
+        self._load_secs[digest] = time.perf_counter() - t0
+        self._sizes[digest] = os.path.getsize(path)
+        self._objects[digest] = obj
+        return obj
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def report(self) -> str:
+        loaded_mb = sum(self._sizes.values()) / 1e6
+        return (
+            f"{self.n_requests} artifact requests, {len(self)} unique loads ({loaded_mb:,.2f} MB); "
+            f"{self.n_shared} served from the registry, saving {self.bytes_shared / 1e6:,.2f} MB of "
+            f"artifacts and {self.secs_shared:.2f}s of loading (hashing cost {self.secs_hashing:.2f}s)"
+        )
@@ -0,0 +1,164 @@
+from typing import Any, Dict
+
+import numpy as np
+
+# Rows per traversal chunk: keeps the (rows, trees) index matrices around a few MB
+_CHUNK_ROWS = 2048
+
+
+class PackedIsolationForest:
+    """
+    A fitted sklearn IsolationForest packed into flat NumPy arrays:
+
+    - Node arrays over every tree: split feature, threshold, left, right. Leaves point to
+      themselves so max_depth steps land every row on its leaf.
+    - leaf_path: per leaf, the path length sklearn credits a sample that ends there,
+      i.e. (nodes on the decision path + c(n_node_samples)) - 1.0, precomputed.
+    - subtree_min_path: the smallest leaf_path under every node, which lower-bounds the
+      path length of a row whose traversal is stopped early at that node.
+
+    decision_function / score_samples reproduce sklearn's to float rounding (well below
+    1e-12) and can stand in for the sklearn object inside DecisionEngine.
+    """
+
+    ARRAY_NAMES = (
+        "feature", "threshold", "left", "right", "leaf_path", "subtree_min_path",
+        "tree_root", "max_depth", "denominator", "offset",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Packed isolation forest arrays missing: {missing}")
+
+        self.feature = np.asarray(arrays["feature"], dtype=np.int32)
+        self.threshold = np.asarray(arrays["threshold"], dtype=np.float64)
+        self.left = np.asarray(arrays["left"], dtype=np.int32)
+        self.right = np.asarray(arrays["right"], dtype=np.int32)
+        self.leaf_path = np.asarray(arrays["leaf_path"], dtype=np.float64)
+        self.subtree_min_path = np.asarray(arrays["subtree_min_path"], dtype=np.float64)
+        self.tree_root = np.asarray(arrays["tree_root"], dtype=np.int32)
+        self.max_depth = int(arrays["max_depth"])
+        self.denominator = float(arrays["denominator"])
+        self.offset = float(arrays["offset"])
+        self.n_trees = self.tree_root.shape[0]
+        # Children interleaved so one traversal step is one gather: children[2 * node + go_right]
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+
+    # ============================================================
+    # EXPORT / PERSISTENCE
+    # ============================================================
+
+    @classmethod
+    def from_sklearn(cls, forest: Any) -> "PackedIsolationForest":
+        from sklearn.ensemble._iforest import _average_path_length
+
+        feature, threshold, left, right, leaf_path, subtree_min_path, tree_root = [], [], [], [], [], [], []
+        max_depth = 0
+        n_nodes = 0
+        n_features = forest.n_features_in_
+        for estimator, features in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            lc = tree.children_left.astype(np.int64)
+            rc = tree.children_right.astype(np.int64)
+            is_leaf = lc == -1
+            own = np.arange(lc.shape[0])
+
+            # Nodes on the decision path, root counted as 1 (sklearn's compute_node_depths)
+            depth = np.ones(lc.shape[0], dtype=np.int64)
+            for node in range(lc.shape[0]):  # children always follow their parent
+                if not is_leaf[node]:
+                    depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+            path = np.where(
+                is_leaf,
+                (depth + _average_path_length(tree.n_node_samples)) - 1.0,
+                0.0,
+            )
+            sub_min = np.where(is_leaf, path, np.inf)
+            for node in range(lc.shape[0] - 1, -1, -1):
+                if not is_leaf[node]:
+                    sub_min[node] = min(sub_min[lc[node]], sub_min[rc[node]])
+
+            # Trees fitted on a feature subset index into it; map back to input columns
+            subsampled = len(features) != n_features
+            split_feature = np.asarray(features)[tree.feature] if subsampled else tree.feature
+
+            tree_root.append(n_nodes)
+            feature.append(np.where(is_leaf, 0, split_feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(np.where(is_leaf, own, lc) + n_nodes)
+            right.append(np.where(is_leaf, own, rc) + n_nodes)
+            leaf_path.append(path)
+            subtree_min_path.append(sub_min)
+            max_depth = max(max_depth, int(depth.max()) - 1)
+            n_nodes += lc.shape[0]
+
+        denominator = len(forest.estimators_) * _average_path_length([forest.max_samples_])[0]
+        return cls({
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "leaf_path": np.concatenate(leaf_path),
+            "subtree_min_path": np.concatenate(subtree_min_path),
+            "tree_root": np.asarray(tree_root, dtype=np.int32),
+            "max_depth": np.asarray(max_depth),
+            "denominator": np.asarray(denominator, dtype=np.float64),
+            "offset": np.asarray(forest.offset_, dtype=np.float64),
+        })
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        for name in ("max_depth", "denominator", "offset"):
+            arrays[name] = np.asarray(arrays[name])
+        return arrays
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "PackedIsolationForest":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    # ============================================================
+    # SCORING
+    # ============================================================
+
+    def path_lengths(self, X: np.ndarray, depth: int | None = None) -> np.ndarray:
+        """
+        Summed path length over all trees for every row (sklearn's `depths`).
+        With depth < max_depth the traversal stops early and each unfinished tree
+        contributes its smallest reachable leaf_path, giving a lower bound.
+        """
+        # sklearn validates IsolationForest input as float32 before the trees see it
+        Xf = np.ascontiguousarray(X, dtype=np.float32)
+        steps = self.max_depth if depth is None else min(depth, self.max_depth)
+        out = np.empty(Xf.shape[0])
+        for lo in range(0, Xf.shape[0], _CHUNK_ROWS):
+            chunk = Xf[lo:lo + _CHUNK_ROWS]
+            flat = chunk.ravel()
+            row_base = (np.arange(chunk.shape[0]) * chunk.shape[1])[:, None]
+            node = np.broadcast_to(self.tree_root, (chunk.shape[0], self.n_trees)).copy()
+            for _ in range(steps):
+                go_right = ~(flat.take(row_base + self.feature.take(node)) <= self.threshold.take(node))
+                node = self.children.take(2 * node + go_right)
+            per_tree = (self.leaf_path if steps == self.max_depth else self.subtree_min_path).take(node)
+            # Sequential accumulation over trees, the order sklearn adds them in
+            out[lo:lo + chunk.shape[0]] = np.cumsum(per_tree, axis=1)[:, -1]
+        return out
+
+    def _scores_from_depths(self, depths: np.ndarray) -> np.ndarray:
+        if self.denominator == 0:  # max_samples=1: sklearn sets every score to 2 ** -1
+            return np.full_like(depths, -0.5)
+        return -(2 ** (-(depths / self.denominator)))
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        return self._scores_from_depths(self.path_lengths(X))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset
+
+    def decision_lower_bound(self, X: np.ndarray, depth: int | None = None) -> np.ndarray:
+        """Lower bound on decision_function from a traversal stopped after `depth` levels."""
+        return self._scores_from_depths(self.path_lengths(X, depth)) - self.offset
@@ -0,0 +1,235 @@
+from itertools import combinations
+from math import factorial
+from typing import Any, Dict
+
+import numpy as np
+
+from backend.engine.fused_ensemble import _booster_trees
+
+# Rows per chunk: keeps the (rows, leaves, depth) contribution gather around 20 MB
+_CHUNK_ROWS = 128
+
+
+def top_k_indices(sv: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the k largest |sv| per row, largest first, via argpartition.
+    Same result as np.argsort(np.abs(sv), axis=1)[:, ::-1][:, :k]: rows whose top k + 1
+    magnitudes contain a tie fall back to that full sort, so tie order matches too.
+    """
+    mag = np.abs(sv)
+    if k >= mag.shape[1]:
+        return np.argsort(mag, axis=1)[:, ::-1][:, :k]
+    cand = np.argpartition(-mag, k, axis=1)[:, :k + 1]
+    cand_mag = np.take_along_axis(mag, cand, axis=1)
+    order = np.argsort(-cand_mag, axis=1, kind="stable")
+    cand = np.take_along_axis(cand, order, axis=1)
+    cand_mag = np.take_along_axis(cand_mag, order, axis=1)
+    top = cand[:, :k].copy()
+    tied = np.any(cand_mag[:, 1:] == cand_mag[:, :-1], axis=1)
+    if tied.any():
+        top[tied] = np.argsort(mag[tied], axis=1)[:, ::-1][:, :k]
+    return top
+
+
+def _leaf_contributions(z: np.ndarray, v: np.ndarray, depth: int) -> np.ndarray:
+    """
+    Path-dependent TreeSHAP contributions of leaves whose paths have the same number
+    L of distinct features, for every one-fraction pattern.
+
+    z: (m, L) zero fractions (cover share of the path) per distinct feature
+    v: (m,) leaf values
+    Returns (m, 2**depth, depth): entry [leaf, pattern, j] is the contribution to the
+    j-th path feature when bit j of pattern says the row satisfies that feature's splits.
+    Bits >= L are ignored; slots >= L stay zero.
+
+    For feature i on the path, with o the one fractions:
+        phi_i = v * (o_i - z_i) * sum_{S subset of P \\ {i}} w(|S|, L) prod_{S} o_j prod_{P \\ S \\ {i}} z_j
+    with the Shapley weight w(s, L) = s! (L - s - 1)! / L!.
+    """
+    m, L = z.shape
+    out = np.zeros((m, 1 << depth, depth))
+    weight = [factorial(s) * factorial(L - s - 1) / factorial(L) for s in range(L)]
+    for pattern in range(1 << L):
+        o = [(pattern >> j) & 1 for j in range(L)]
+        for i in range(L):
+            others = [j for j in range(L) if j != i]
+            total = np.zeros(m)
+            for size in range(L):
+                for subset in combinations(others, size):
+                    if not all(o[j] for j in subset):
+                        continue  # one fractions are 0/1: the product vanishes
+                    term = np.full(m, weight[size])
+                    for j in others:
+                        if j not in subset:
+                            term = term * z[:, j]
+                    total += term
+            contrib = v * (o[i] - z[:, i]) * total
+            # Higher pattern bits belong to padding slots; replicate across them
+            out[:, pattern::1 << L, i] = contrib[:, None]
+    return out
+
+
+class PathShapExplainer:
+    """
+    Exact path-dependent TreeSHAP (shap.TreeExplainer's default for tree models without
+    background data) for a binary XGBoost model, precompiled per leaf path:
+
+    - For each leaf, its root path grouped by distinct feature: the internal nodes and
+      directions on the path, each tagged with its feature slot.
+    - Per slot, the zero fraction (product of cover ratios along the path) is fixed by
+      the model and the one fraction is 0/1 for a given row, so each leaf has only
+      2**depth possible contribution vectors. They are tabulated once at build time.
+
+    Scoring a batch evaluates every split once per row, assembles each leaf's one-fraction
+    pattern, gathers the tabulated contributions and scatters them to feature columns
+    with one matrix product. shap_values() can stand in for shap.TreeExplainer(model).shap_values
+    on binary XGBoost models. For those, shap delegates to XGBoost's pred_contribs, which
+    accumulates in float32, so values agree to float32 rounding (~1e-6 relative) and
+    the top-|SHAP| ranking agrees unless two features are within that distance.
+    """
+
+    ARRAY_NAMES = (
+        "node_feature", "node_threshold", "node_default_left",
+        "edge_node", "edge_left", "edge_slot", "slot_feature", "phi_table", "n_features",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Path SHAP arrays missing: {missing}")
+
+        self.node_feature = np.asarray(arrays["node_feature"], dtype=np.int32)
+        self.node_threshold = np.asarray(arrays["node_threshold"], dtype=np.float32)
+        self.node_default_left = np.asarray(arrays["node_default_left"], dtype=bool)
+        self.edge_node = np.asarray(arrays["edge_node"], dtype=np.int32)
+        self.edge_left = np.asarray(arrays["edge_left"], dtype=bool)
+        self.edge_slot = np.asarray(arrays["edge_slot"], dtype=np.int8)
+        self.slot_feature = np.asarray(arrays["slot_feature"], dtype=np.int32)
+        self.phi_table = np.asarray(arrays["phi_table"], dtype=np.float64)
+        self.n_features = int(arrays["n_features"])
+
+        self.n_leaves, self.depth = self.edge_node.shape
+        # Pattern bit each edge can clear when the row does not take it; padding edges clear none
+        self.edge_bit = np.where(self.edge_slot >= 0, 1 << self.edge_slot.astype(np.int64), 0)
+        self.full_pattern = (1 << self.depth) - 1
+        self.phi_flat = self.phi_table.reshape(self.n_leaves << self.depth, self.depth)
+        self.leaf_base = np.arange(self.n_leaves, dtype=np.int64) << self.depth
+        scatter = np.zeros((self.n_leaves * self.depth, self.n_features))
+        scatter[np.arange(self.n_leaves * self.depth), self.slot_feature.ravel()] = 1.0
+        self.scatter = scatter
+
+    # ============================================================
+    # EXPORT / PERSISTENCE
+    # ============================================================
+
+    @classmethod
+    def from_xgboost(cls, model: Any) -> "PathShapExplainer":
+        """Precompile a fitted binary XGBClassifier (e.g. artifacts/xgb_raw_shap.pkl)."""
+        _, trees = _booster_trees(model)
+        n_features = int(model.n_features_in_)
+
+        node_feature, node_threshold, node_default_left = [], [], []
+        leaf_paths = []  # ([(internal node, went left, cover ratio, feature), ...], leaf value)
+        n_internal = 0
+        depth = 0
+        for tree in trees:
+            lc = np.asarray(tree["left_children"], dtype=np.int64)
+            rc = np.asarray(tree["right_children"], dtype=np.int64)
+            cover = np.asarray(tree["sum_hessian"], dtype=np.float64)
+            is_leaf = lc == -1
+            internal_id = np.cumsum(~is_leaf) - 1 + n_internal
+            node_feature.append(np.asarray(tree["split_indices"])[~is_leaf])
+            node_threshold.append(np.asarray(tree["split_conditions"])[~is_leaf])
+            node_default_left.append(np.asarray(tree["default_left"], dtype=bool)[~is_leaf])
+            n_internal += int((~is_leaf).sum())
+
+            # Depth-first walk carrying the path to each leaf
+            stack = [(0, [])]
+            while stack:
+                node, path = stack.pop()
+                if is_leaf[node]:
+                    depth = max(depth, len(path))
+                    leaf_paths.append((path, float(tree["split_conditions"][node])))
+                    continue
+                feat = int(tree["split_indices"][node])
+                for child, went_left in ((lc[node], True), (rc[node], False)):
+                    edge = (int(internal_id[node]), went_left, cover[child] / cover[node], feat)
+                    stack.append((child, path + [edge]))
+
+        n_leaves = len(leaf_paths)
+        edge_node = np.zeros((n_leaves, depth), dtype=np.int32)
+        edge_left = np.zeros((n_leaves, depth), dtype=bool)
+        edge_slot = np.full((n_leaves, depth), -1, dtype=np.int8)
+        slot_feature = np.zeros((n_leaves, depth), dtype=np.int32)
+        zero_fraction = np.ones((n_leaves, depth))
+        n_slots = np.zeros(n_leaves, dtype=np.int64)
+        values = np.zeros(n_leaves)
+        for leaf, (path, value) in enumerate(leaf_paths):
+            values[leaf] = value
+            slots: Dict[int, int] = {}
+            for e, (node, went_left, frac, feat) in enumerate(path):
+                # A feature split twice on one path is one player: fractions multiply
+                slot = slots.setdefault(feat, len(slots))
+                edge_node[leaf, e] = node
+                edge_left[leaf, e] = went_left
+                edge_slot[leaf, e] = slot
+                slot_feature[leaf, slot] = feat
+                zero_fraction[leaf, slot] *= frac
+            n_slots[leaf] = len(slots)
+
+        phi_table = np.zeros((n_leaves, 1 << depth, depth))
+        for L in range(1, depth + 1):
+            leaves = np.flatnonzero(n_slots == L)
+            if leaves.size:
+                phi_table[leaves] = _leaf_contributions(zero_fraction[leaves, :L], values[leaves], depth)
+
+        return cls({
+            "node_feature": np.concatenate(node_feature).astype(np.int32),
+            "node_threshold": np.concatenate(node_threshold).astype(np.float32),
+            "node_default_left": np.concatenate(node_default_left),
+            "edge_node": edge_node,
+            "edge_left": edge_left,
+            "edge_slot": edge_slot,
+            "slot_feature": slot_feature,
+            "phi_table": phi_table,
+            "n_features": np.asarray(n_features),
+        })
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        arrays["n_features"] = np.asarray(self.n_features)
+        return arrays
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "PathShapExplainer":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    # ============================================================
+    # EXPLANATIONS
+    # ============================================================
+
+    def shap_values(self, X: np.ndarray) -> np.ndarray:
+        """SHAP values in margin space: shape (n, n_features)."""
+        Xf = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((Xf.shape[0], self.n_features))
+        for lo in range(0, Xf.shape[0], _CHUNK_ROWS):
+            chunk = Xf[lo:lo + _CHUNK_ROWS]
+            # Direction of every split for every row, XGBoost semantics
+            x = chunk[:, self.node_feature]
+            go_left = np.where(np.isnan(x), self.node_default_left, x < self.node_threshold)
+            # A slot's one fraction is 1 iff the row takes every edge of that slot on the path
+            missed = go_left[:, self.edge_node] != self.edge_left
+            cleared = np.bitwise_or.reduce(np.where(missed, self.edge_bit, 0), axis=2)
+            pattern = self.full_pattern & ~cleared
+            contrib = self.phi_flat.take(self.leaf_base + pattern, axis=0)
+            out[lo:lo + chunk.shape[0]] = contrib.reshape(chunk.shape[0], -1) @ self.scatter
+        return out
+
+    def top_features(self, X: np.ndarray, k: int = 3):
+        """(shap_values, indices of the k largest |SHAP| per row, largest first)."""
+        sv = self.shap_values(X)
+        return sv, top_k_indices(sv, k)
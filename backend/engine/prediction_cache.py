@@ -0,0 +1,258 @@
+import hashlib
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Engine attributes besides DecisionEngine.SETTINGS that change what evaluate_transaction returns
+_CONFIG_ATTRS = ("cascade", "svm_backend", "explainer_backend", "explainer_status")
+
+# Bookkeeping per entry on top of the value: OrderedDict node, key bytes, expiry float
+_ENTRY_OVERHEAD = 200
+
+
+def engine_state(engine) -> tuple:
+    """
+    Everything a cached result depends on besides the row and version: artifact
+    digests, routing/cost thresholds, the cost matrix and the backend config. The
+    explainer status is included because PEND rows scored before the SHAP explainer
+    is ready carry no explanations.
+    """
+    return (
+        tuple(sorted(engine.registry.digests.values())),
+        attrgetter(*engine.SETTINGS, *_CONFIG_ATTRS)(engine),
+        engine.cost_model.table.tobytes(),
+        engine.fused_ensemble is not None,
+        type(engine.anomaly_model).__name__,
+        None if engine.anytime_ensemble is None else (engine.anytime_ensemble.min_members, engine.anytime_ensemble.z),
+    )
+
+
+def deep_sizeof(value: Any) -> int:
+    """Approximate bytes held by a result: the containers plus everything in them."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_sizeof(v) for v in value)
+    return size
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent key frequencies for TinyLFU admission: `depth` rows
+    of saturating byte counters, indexed by slices of the key digest. Every counter is
+    halved after 10 x width increments, so old popularity fades.
+    """
+
+    def __init__(self, width: int, depth: int = 4) -> None:
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.mask = self.width - 1
+        self.rows = [bytearray(self.width) for _ in range(depth)]
+        self.sample_size = 10 * self.width
+        self.additions = 0
+        self._unpack = struct.Struct(f"<{depth}I").unpack_from  # key digests are >= 4 * depth bytes
+
+    def _indexes(self, key: bytes):
+        mask = self.mask
+        return [word & mask for word in self._unpack(key)]
+
+    def increment(self, key: bytes) -> None:
+        for row, i in zip(self.rows, self._indexes(key)):
+            if row[i] < 255:
+                row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.rows = [bytearray(c >> 1 for c in row) for row in self.rows]
+            self.additions //= 2
+
+    def estimate(self, key: bytes) -> int:
+        return min(row[i] for row, i in zip(self.rows, self._indexes(key)))
+
+
+class PredictionCache:
+    """
+    Bounded cache of evaluate_transaction results, for gateway retries and
+    card-testing bursts that resend the same (or near-same) row.
+
+    Keys are a 128-bit BLAKE2b of the raw row (rounded to `quantize_decimals` when
+    set, so rows differing past that digit share a result), the version and a
+    generation number. key() re-reads the engine state (see engine_state); when it has
+    changed the cache is emptied and the generation bumped, so new thresholds,
+    artifacts or a newly ready SHAP explainer never serve stale results, and a result
+    scored across the change is stored under a key nothing will look up again. Callers
+    check cacheable() before put(): unexplained PEND results are never stored.
+
+    Entries expire after `ttl_secs` and are evicted least recently used once the
+    cached results exceed `max_bytes`. With policy="tinylfu" a new result is only
+    admitted over the LRU victim if its key has been requested more often recently,
+    so a scan of one-off rows cannot flush the rows that keep coming back.
+    """
+
+    POLICIES = ("lru", "tinylfu")
+
+    def __init__(
+        self,
+        engine,
+        max_bytes: int = 64 << 20,
+        ttl_secs: float = 300.0,
+        quantize_decimals: int | None = None,
+        policy: str = "tinylfu",
+    ) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.ttl_secs = ttl_secs
+        self.quantize_decimals = quantize_decimals
+        self.policy = policy
+        # One sketch counter per ~1 KB of budget: a few per cached result
+        self.sketch = FrequencySketch(max(1024, max_bytes >> 10)) if policy == "tinylfu" else None
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[Any, float, int]]" = OrderedDict()  # key -> (value, expires, bytes)
+        self._state = engine_state(engine)
+        self.generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.inserts = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.invalidations = 0
+
+    def key(self, raw_row: np.ndarray, version: str, stream: str | None = None) -> bytes:
+        """
+        Cache key of one raw row under the current engine state. `stream` keys rows
+        whose result depends on per-stream state (a server-derived delta_time) apart.
+        """
+        state = engine_state(self.engine)
+        with self._lock:
+            if state != self._state:
+                self._state = state
+                self.generation += 1
+                if self._entries:
+                    self._entries.clear()
+                    self.bytes = 0
+                    self.invalidations += 1
+            generation = self.generation
+        row = np.ascontiguousarray(raw_row, dtype=np.float64).ravel()
+        if self.quantize_decimals is not None:
+            row = np.round(row, self.quantize_decimals) + 0.0  # + 0.0 folds -0.0 into 0.0
+        h = hashlib.blake2b(row.tobytes(), digest_size=16)
+        h.update(f"{version}/{generation}".encode())
+        if stream is not None:
+            h.update(b"\0" + stream.encode())
+        return h.digest()
+
+    @staticmethod
+    def cacheable(result: dict) -> bool:
+        """
+        False for errors and for PEND rows scored before SHAP explanations were
+        available. The generation bump cannot catch the latter everywhere: with a
+        process pool the workers load the explainer themselves, so this process's
+        explainer_status never changes and the unexplained result would be served
+        for as long as it stays cached.
+        """
+        if "error" in result:
+            return False
+        return result["trace"]["v4_decision"] != "PEND" or bool(result["explanations"]["top_features"])
+
+    def get(self, key: bytes) -> Any | None:
+        """The cached result for key, or None (miss or expired)."""
+        with self._lock:
+            if self.sketch is not None:
+                self.sketch.increment(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, size = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: Any) -> bool:
+        """Cache value under key unless it is too large or loses admission; True if stored."""
+        size = deep_sizeof(value) + _ENTRY_OVERHEAD
+        with self._lock:
+            if size > self.max_bytes:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            entries = self._entries
+            if self.bytes + size > self.max_bytes and self.sketch is not None:
+                victim = next(iter(entries))
+                if self.sketch.estimate(key) <= self.sketch.estimate(victim):
+                    self.rejected += 1
+                    return False
+            while self.bytes + size > self.max_bytes:
+                _, (_, _, victim_size) = entries.popitem(last=False)
+                self.bytes -= victim_size
+                self.evictions += 1
+            entries[key] = (value, time.monotonic() + self.ttl_secs, size)
+            self.bytes += size
+            self.inserts += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_secs": self.ttl_secs,
+                "quantize_decimals": self.quantize_decimals,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expired": self.expired,
+                "inserts": self.inserts,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "invalidations": self.invalidations,
+            }
+
+    def render_prometheus(self, prefix: str = "mari") -> str:
+        """Counters and gauges in Prometheus text format, to append to /metrics."""
+        stats = self.stats()
+        name = f"{prefix}_prediction_cache"
+        lines = [
+            f"# HELP {name}_lookups_total /predict cache lookups by result.",
+            f"# TYPE {name}_lookups_total counter",
+            f'{name}_lookups_total{{result="hit"}} {stats["hits"]}',
+            f'{name}_lookups_total{{result="miss"}} {stats["misses"]}',
+        ]
+        for key, help_text in (("expired", "Entries found past their TTL."),
+                               ("evictions", "Entries evicted to stay within max_bytes."),
+                               ("rejected", "Results refused by TinyLFU admission."),
+                               ("invalidations", "Times the cache was emptied by an engine state change.")):
+            lines += [f"# HELP {name}_{key}_total {help_text}", f"# TYPE {name}_{key}_total counter",
+                      f"{name}_{key}_total {stats[key]}"]
+        for key, help_text in (("entries", "Cached results."), ("bytes", "Approximate bytes held by cached results.")):
+            lines += [f"# HELP {name}_{key} {help_text}", f"# TYPE {name}_{key} gauge", f"{name}_{key} {stats[key]}"]
+        return "\n".join(lines) + "\n"
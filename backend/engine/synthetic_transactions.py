@@ -0,0 +1,85 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+# V1 route shares of a realistic workload: mostly clean approvals, with the uncertain and
+# novel rows that drive the V2 SVM, V3 fusion and V4 SHAP stages well represented
+DEFAULT_MIX = {
+    "APPROVE": 0.80,
+    "STEP_UP_AUTH": 0.06,
+    "ABSTAIN": 0.05,
+    "ESCALATE_INVEST": 0.05,
+    "DECLINE": 0.04,
+}
+
+# PCA components most separated by class in the credit card data, and the direction fraud moves them
+_FRAUD_SHIFT = {14: -6.0, 17: -5.0, 12: -5.0, 10: -4.0, 4: 3.0, 11: 3.0, 3: -4.0, 16: -3.0}
+
+
+def synthetic_candidates(n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (n, 31) raw rows [Time, V1..V28, Amount, delta_time]: half legitimate-looking,
+    a third shifted towards fraud by a random strength (so probabilities span the
+    routing thresholds), and the rest scaled-up outliers for the novelty detector.
+    """
+    scales = 2.0 * 0.92 ** np.arange(28)
+    V = rng.standard_normal((n, 28)) * scales
+    kind = rng.choice(3, size=n, p=[0.5, 0.35, 0.15])
+
+    fraud = kind == 1
+    strength = rng.uniform(0.0, 1.5, size=int(fraud.sum()))
+    for component, shift in _FRAUD_SHIFT.items():
+        V[fraud, component - 1] += strength * shift
+    outlier = kind == 2
+    V[outlier] *= rng.uniform(2.0, 5.0, size=(int(outlier.sum()), 1))
+
+    time_s = rng.uniform(0.0, 172800.0, n)
+    amount = np.round(rng.lognormal(3.0, 1.5, n), 2)
+    delta_time = rng.exponential(0.6, n)
+    return np.column_stack([time_s, V, amount, delta_time])
+
+
+def synthetic_workload(
+    engine,
+    n_rows: int,
+    mix: Dict[str, float] = DEFAULT_MIX,
+    seed: int = 0,
+    template_rows: int = 5000,
+    max_candidates: int = 200000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    n_rows synthetic raw rows whose V1 routes follow `mix` under `engine`'s models.
+
+    Candidates are scored in chunks until every route has its share of a
+    `template_rows` template (or max_candidates have been tried); the workload is
+    then drawn from the template with replacement, so large workloads cost no extra
+    scoring. Routes the models never produce are dropped from the mix with a warning.
+    Returns (raw_X, v1_decision).
+    """
+    rng = np.random.default_rng(seed)
+    quota = {route: max(1, int(round(share * template_rows))) for route, share in mix.items()}
+    picked = {route: [] for route in mix}
+    tried = 0
+    while tried < max_candidates and any(len(picked[r]) < quota[r] for r in mix):
+        candidates = synthetic_candidates(20000, rng)
+        tried += candidates.shape[0]
+        v1 = engine.evaluate_batch(candidates, version="V1")["trace"]["v1_decision"]
+        for route in mix:
+            need = quota[route] - len(picked[route])
+            if need > 0:
+                picked[route].extend(candidates[v1 == route][:need])
+
+    routes = [route for route in mix if picked[route]]
+    missing = [route for route in mix if not picked[route]]
+    if missing:
+        print(f"[synthetic_transactions] No candidates routed to {missing} after {tried:,} tries; dropped from the mix.")
+    shares = np.array([mix[route] for route in routes])
+    counts = rng.multinomial(n_rows, shares / shares.sum())
+
+    rows, labels = [], []
+    for route, count in zip(routes, counts):
+        template = np.asarray(picked[route])
+        rows.append(template[rng.integers(0, template.shape[0], count)])
+        labels.append(np.full(count, route, dtype=object))
+    order = rng.permutation(n_rows)
+    return np.concatenate(rows)[order], np.concatenate(labels)[order]
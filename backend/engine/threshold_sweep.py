@@ -0,0 +1,252 @@
+import itertools
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.engine.cost_model import FRAUD, CostModel
+from backend.engine.decision_codes import (
+    ABSTAIN, APPROVE, AUTO_DECLINE, DECLINE, ESCALATE_INVEST, HUMAN_ESCALATE, STATES, STEP_UP_AUTH, VERSIONS,
+)
+from backend.engine.decision_engine import _V4_CODES
+from backend.engine.evidence_fusion import ensemble_bpa, fuse_evidence, isolation_forest_bpa, svm_bpa
+
+# Every routing threshold of DecisionEngine, in pipeline order (V1, V2, V3)
+V1_THRESHOLDS = ("decline_threshold", "escalate_threshold", "auth_threshold", "uncertainty_threshold", "anomaly_threshold")
+V2_THRESHOLDS = ("v2_approve_thresh",)
+V3_THRESHOLDS = ("ds_bel_auto_decline", "ds_ign_low", "ds_conflict_human", "ds_ign_human", "ds_bel_stepup")
+THRESHOLD_NAMES = V1_THRESHOLDS + V2_THRESHOLDS + V3_THRESHOLDS
+
+# States each version can return; routes work on their decision_codes int8 codes
+VERSION_STATES = {
+    "V1": ("APPROVE", "ABSTAIN", "STEP_UP_AUTH", "ESCALATE_INVEST", "DECLINE"),
+    "V2": ("APPROVE", "ABSTAIN", "STEP_UP_AUTH", "ESCALATE_INVEST", "DECLINE"),
+    "V3": ("APPROVE", "ABSTAIN", "STEP_UP_AUTH", "ESCALATE_INVEST", "DECLINE", "HUMAN_ESCALATE", "AUTO_DECLINE"),
+    "V4": ("APPROVE", "STEP_UP", "DECLINE", "PEND"),
+}
+
+_DECLINES = np.zeros(len(STATES), dtype=bool)
+_DECLINES[[DECLINE, AUTO_DECLINE]] = True
+
+
+# ============================================================
+# ROUTING OVER CACHED SIGNALS
+# ============================================================
+
+def route_v1(prob: np.ndarray, uncertainty: np.ndarray, anomaly_score: np.ndarray, t: Dict[str, float]) -> np.ndarray:
+    """DecisionEngine.decide_v1_batch on codes; NaN anomaly scores (no forest) are never novel."""
+    novelty_flag = anomaly_score < t["anomaly_threshold"]
+    high_prob = prob >= t["escalate_threshold"]
+    decline_prob = prob >= t["decline_threshold"]
+    uncertain = uncertainty >= t["uncertainty_threshold"]
+
+    decision = np.full(prob.shape[0], APPROVE, dtype=np.int8)
+    decision[(prob < t["auth_threshold"]) & uncertain & ~novelty_flag] = ABSTAIN
+    decision[(prob >= t["auth_threshold"]) & ~novelty_flag & ~(high_prob & uncertain)] = STEP_UP_AUTH
+    decision[novelty_flag & ~(decline_prob & ~uncertain)] = ESCALATE_INVEST
+    decision[high_prob & uncertain] = ESCALATE_INVEST
+    decision[decline_prob & ~uncertain] = DECLINE
+    return decision
+
+
+def route_v2(v1: np.ndarray, v2_svm_prob: np.ndarray, t: Dict[str, float]) -> np.ndarray:
+    """The SVM second opinion clears ABSTAIN rows; NaN (no SVM) never clears."""
+    v2 = v1.copy()
+    v2[(v1 == ABSTAIN) & (v2_svm_prob < t["v2_approve_thresh"])] = APPROVE
+    return v2
+
+
+def route_v3(
+    v2: np.ndarray, bel_F: np.ndarray, ignorance: np.ndarray, conflict_K: np.ndarray, t: Dict[str, float]
+) -> np.ndarray:
+    """Dempster-Shafer sub-routing of ESCALATE_INVEST rows; NaN beliefs (no SVM) stay escalated."""
+    sub = np.full(v2.shape[0], HUMAN_ESCALATE, dtype=np.int8)
+    sub[bel_F >= t["ds_bel_stepup"]] = STEP_UP_AUTH
+    sub[ignorance >= t["ds_ign_human"]] = HUMAN_ESCALATE
+    sub[(bel_F >= t["ds_bel_auto_decline"]) & (ignorance <= t["ds_ign_low"])] = AUTO_DECLINE
+    sub[conflict_K >= t["ds_conflict_human"]] = HUMAN_ESCALATE
+    return np.where((v2 == ESCALATE_INVEST) & ~np.isnan(conflict_K), sub, v2)
+
+
+def route_v4(v3: np.ndarray) -> np.ndarray:
+    return _V4_CODES[v3]
+
+
+def decision_names(codes: np.ndarray) -> np.ndarray:
+    return np.asarray(STATES, dtype=object)[codes]
+
+
+class SweepSignals:
+    """
+    Threshold-independent signals for a labelled set of transactions: ensemble mean/std,
+    Isolation Forest score, V2/V3 SVM probabilities and the fused Dempster-Shafer
+    beliefs, computed for every row (not only the rows the current thresholds send to
+    V2/V3). The engine's thresholds and cost settings at capture time are kept as the
+    sweep's baseline.
+
+    Any threshold setting can then be re-routed from these arrays alone with route_*().
+    Signals a stage cannot produce (no forest, no SVM) are NaN.
+    """
+
+    ARRAY_NAMES = ("prob", "uncertainty", "anomaly_score", "v2_svm_prob", "v3_svm_prob",
+                   "bel_F", "ignorance", "conflict_K", "label")
+
+    def __init__(self, arrays: Dict[str, np.ndarray], thresholds: Dict[str, float],
+                 costs: Dict[str, float], fingerprint: str = "") -> None:
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Sweep signal arrays missing: {missing}")
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, np.asarray(arrays[name], dtype=np.int8 if name == "label" else np.float64))
+        self.thresholds = dict(thresholds)
+        self.costs = dict(costs)
+        self.fingerprint = fingerprint
+        self.n_rows = self.prob.shape[0]
+
+    @classmethod
+    def from_engine(cls, engine: Any, raw_X: np.ndarray, labels: np.ndarray, fingerprint: str = "") -> "SweepSignals":
+        n = raw_X.shape[0]
+        X = engine.preprocess_features_batch(raw_X)
+        prob, uncertainty = engine.predict_proba_batch(X)
+        anomaly_scores, _ = engine.anomaly_score_batch(X)
+        anomaly_score = np.full(n, np.nan) if anomaly_scores is None else anomaly_scores
+
+        rows = np.arange(n)
+        v2_scaled, v3_scaled = engine.scale_features_batch(X, rows, rows)
+        v2_svm_prob = np.full(n, np.nan)
+        if engine.v2_svm is not None and v2_scaled is not None:
+            v2_svm_prob = engine.v2_svm.predict_proba(v2_scaled)[:, 1]
+        v3_svm_prob = np.full(n, np.nan)
+        if engine.v3_svm is not None and v3_scaled is not None:
+            v3_svm_prob = engine.v3_svm.predict_proba(v3_scaled)[:, 1]
+
+        fused = fuse_evidence((
+            ensemble_bpa(prob, uncertainty),
+            isolation_forest_bpa(np.nan_to_num(anomaly_score, nan=0.0)),
+            svm_bpa(np.nan_to_num(v3_svm_prob, nan=0.5)),
+        ))
+        no_svm = np.isnan(v3_svm_prob)
+        arrays = {
+            "prob": prob, "uncertainty": uncertainty, "anomaly_score": anomaly_score,
+            "v2_svm_prob": v2_svm_prob, "v3_svm_prob": v3_svm_prob,
+            **{key: np.where(no_svm, np.nan, fused[key]) for key in ("bel_F", "ignorance", "conflict_K")},
+            "label": np.asarray(labels),
+        }
+        thresholds = {name: float(getattr(engine, name)) for name in THRESHOLD_NAMES}
+        costs = {name: float(getattr(engine, name)) for name in engine.COST_SETTINGS}
+        return cls(arrays, thresholds, costs, fingerprint)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        arrays["threshold_names"] = np.array(list(self.thresholds), dtype=str)
+        arrays["threshold_values"] = np.array(list(self.thresholds.values()))
+        arrays["cost_names"] = np.array(list(self.costs), dtype=str)
+        arrays["cost_values"] = np.array(list(self.costs.values()))
+        arrays["fingerprint"] = np.asarray(self.fingerprint)
+        return arrays
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "SweepSignals":
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        thresholds = dict(zip(arrays.pop("threshold_names").tolist(), arrays.pop("threshold_values").tolist()))
+        costs = dict(zip(arrays.pop("cost_names").tolist(), arrays.pop("cost_values").tolist()))
+        return cls(arrays, thresholds, costs, str(arrays.pop("fingerprint")))
+
+    def route(self, thresholds: Dict[str, float], version: str = "V4") -> np.ndarray:
+        """Decision codes for every row under `thresholds` (missing names fall back to the baseline)."""
+        if version not in VERSIONS:
+            raise ValueError(f"Unknown version: {version}")
+        t = {**self.thresholds, **thresholds}
+        decision = route_v1(self.prob, self.uncertainty, self.anomaly_score, t)
+        if version != "V1":
+            decision = route_v2(decision, self.v2_svm_prob, t)
+        if version in ("V3", "V4"):
+            decision = route_v3(decision, self.bel_F, self.ignorance, self.conflict_K, t)
+        if version == "V4":
+            decision = route_v4(decision)
+        return decision
+
+
+# ============================================================
+# SWEEP
+# ============================================================
+
+def _summary(codes: np.ndarray, label: np.ndarray, states: Sequence[str], cost_table: np.ndarray) -> Dict[str, float]:
+    # (decision, label) cell counts; costs are dot products with the cost matrix rows
+    cells = np.bincount(codes * 2 + label, minlength=2 * len(STATES)).reshape(-1, 2)
+    counts = cells.sum(axis=1)
+    n, n_fraud = codes.shape[0], int(cells[:, FRAUD].sum())
+    missed = int(cells[APPROVE, FRAUD])
+    fraud_declined = int(cells[_DECLINES, FRAUD].sum())
+    false_declines = int(counts[_DECLINES].sum()) - fraud_declined
+
+    row = {state: int(counts[STATES.index(state)]) for state in states}
+    total = float(np.sum(cells * cost_table))
+    handling = float(counts @ cost_table.min(axis=1))
+    row.update({
+        "fraud_caught": (n_fraud - missed) / n_fraud if n_fraud else float("nan"),
+        "fraud_declined": fraud_declined / n_fraud if n_fraud else float("nan"),
+        "false_declines": false_declines,
+        "handling_cost": handling,
+        "outcome_cost": total - handling,
+        "total_cost": total,
+        "cost_per_txn": total / n,
+    })
+    return row
+
+
+def sweep(
+    signals: SweepSignals,
+    grid: Dict[str, Sequence[float]],
+    version: str = "V4",
+    cost_model: CostModel | None = None,
+) -> pd.DataFrame:
+    """
+    Re-route every row under each combination of the grid (the Cartesian product of its
+    value lists; other thresholds stay at the signals' baseline). One result row per
+    combination: the thresholds, the decision counts for `version`, and fraud capture
+    and costs from the labels:
+
+    - fraud_caught: share of frauds not approved; fraud_declined: share auto-declined
+    - handling_cost / outcome_cost / total_cost under cost_model (default: the engine's
+      cost matrix under the cost settings the signals were taken with)
+
+    Stages are re-run only when one of their thresholds changes between consecutive
+    combinations, so a grid over the V3 thresholds re-routes V1 once.
+    """
+    unknown = [name for name in grid if name not in THRESHOLD_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown thresholds: {unknown}")
+    if version not in VERSIONS:
+        raise ValueError(f"Unknown version: {version}")
+    cost_model = cost_model or CostModel.engine_default(**signals.costs)
+    cost_table = cost_model.table_for(STATES)
+    label = signals.label.astype(np.int64)
+    names = [name for name in THRESHOLD_NAMES if name in grid]  # V1 names vary slowest
+    states = VERSION_STATES[version]
+
+    rows: List[Dict[str, float]] = []
+    v1_key = v2_key = None
+    for values in itertools.product(*(grid[name] for name in names)):
+        t = {**signals.thresholds, **dict(zip(names, values))}
+        key = tuple(t[name] for name in V1_THRESHOLDS)
+        if key != v1_key:
+            v1_key, v2_key = key, None
+            v1 = route_v1(signals.prob, signals.uncertainty, signals.anomaly_score, t)
+        decision = v1
+        if version != "V1":
+            if t["v2_approve_thresh"] != v2_key:
+                v2_key = t["v2_approve_thresh"]
+                v2 = route_v2(v1, signals.v2_svm_prob, t)
+            decision = v2
+        if version in ("V3", "V4"):
+            decision = route_v3(v2, signals.bel_F, signals.ignorance, signals.conflict_K, t)
+        if version == "V4":
+            decision = route_v4(decision)
+        rows.append({**dict(zip(names, values)), **_summary(decision.astype(np.int64), label, states, cost_table)})
+    return pd.DataFrame(rows)
+
@@ -0,0 +1,78 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
+os.environ["NUMEXPR_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+from collections import Counter
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.test_cascade_equivalence import load_test_split
+
+# Anytime evaluation stops a row once its V1 route is settled at z standard errors, so a
+# few rows near a threshold may still route differently from the full ensemble
+DEFAULT_MAX_DISAGREEMENT = 0.001
+
+
+def run_verification(min_members, z, max_disagreement):
+    print("==================================================")
+    print("[1] Loading the test split...")
+    raw_X = load_test_split()
+    n_test = raw_X.shape[0]
+    print(f"    Test set size: {n_test:,}")
+
+    print("\n[2] Routing with the full ensemble...")
+    full_engine = DecisionEngine(explainer_mode="lazy", collect_metrics=False)
+    t0 = time.perf_counter()
+    full = full_engine.evaluate_batch(raw_X, version="V4")["trace"]
+    full_secs = time.perf_counter() - t0
+    print(f"    {n_test / full_secs:,.0f} rows/s")
+
+    print(f"\n[3] Routing with anytime evaluation (min_members={min_members}, z={z})...")
+    anytime_engine = DecisionEngine(
+        explainer_mode="lazy", collect_metrics=False,
+        ensemble_mode="anytime", anytime_min_members=min_members, anytime_z=z,
+    )
+    t0 = time.perf_counter()
+    anytime = anytime_engine.evaluate_batch(raw_X, version="V4")["trace"]
+    anytime_secs = time.perf_counter() - t0
+    stats = anytime_engine.anytime_ensemble.stats()
+    print(f"    {n_test / anytime_secs:,.0f} rows/s, {stats['mean_members_per_row']:.2f} of "
+          f"{stats['members']} members per row, {stats['early_stop_rate']:.1%} of rows stopped early")
+
+    print("\n[4] Anytime vs full routing...")
+    passed = True
+    for version in ("v1", "v2", "v3", "v4"):
+        differ = full[f"{version}_decision"] != anytime[f"{version}_decision"]
+        rate = differ.mean()
+        print(f"    {version.upper()}: {int(differ.sum()):,} / {n_test:,} rows differ ({rate:.4%})")
+        pairs = Counter(zip(full[f"{version}_decision"][differ], anytime[f"{version}_decision"][differ]))
+        for (expected, got), count in pairs.most_common(5):
+            print(f"        full {expected:<16} -> anytime {got:<16} {count:,}")
+        passed &= rate <= max_disagreement
+
+    print(f"\n>>> ANYTIME ROUTING WITHIN {max_disagreement:.2%} OF THE FULL ENSEMBLE <<<" if passed
+          else f"\n>>> ANYTIME ROUTING DISAGREES ON MORE THAN {max_disagreement:.2%} OF ROWS <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare anytime ensemble routing with the full ensemble.")
+    parser.add_argument("--min-members", type=int, default=5)
+    parser.add_argument("--z", type=float, default=3.0)
+    parser.add_argument("--max-disagreement", type=float, default=DEFAULT_MAX_DISAGREEMENT,
+                        help="fail when a larger fraction of test rows routes differently at any version")
+    args = parser.parse_args()
+    run_verification(args.min_members, args.z, args.max_disagreement)
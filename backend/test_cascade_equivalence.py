@@ -0,0 +1,134 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.dataset_cache import load_dataset
+from backend.engine.decision_engine import DecisionEngine
+
+DECISION_KEYS = ("v1_decision", "v2_decision", "v3_decision", "v4_decision")
+
+
+def load_test_split():
+    return load_dataset().raw_features("test")
+
+
+def degenerate_forest_error():
+    """Packed vs sklearn on a forest of single-sample subsets (average path length 0)."""
+    from sklearn.ensemble import IsolationForest
+    from backend.engine.packed_isolation_forest import PackedIsolationForest
+
+    X = np.random.default_rng(0).normal(size=(200, 4))
+    forest = IsolationForest(n_estimators=10, max_samples=1, random_state=0).fit(X)
+    packed = PackedIsolationForest.from_sklearn(forest)
+    return max(
+        float(np.max(np.abs(packed.score_samples(X) - forest.score_samples(X)))),
+        float(np.max(np.abs(packed.decision_function(X) - forest.decision_function(X)))),
+    )
+
+
+def run_verification(prefix_trees, forest_depth):
+    print("==================================================")
+    print("[1] Loading test split...")
+    raw_X = load_test_split()
+    n_test = raw_X.shape[0]
+    print(f"    Test set size: {n_test:,}")
+
+    print(f"[2] Loading DecisionEngine with cascade ({prefix_trees} prefix trees per booster)...")
+    engine = DecisionEngine(
+        anomaly_backend="packed",
+        cascade=True,
+        cascade_prefix_trees=prefix_trees,
+        cascade_forest_depth=forest_depth,
+    )
+
+    print("[3] Full pipeline (cascade off)...")
+    engine.cascade = False
+    t0 = time.perf_counter()
+    reference = engine.evaluate_batch(raw_X, version="V4")
+    full_secs = time.perf_counter() - t0
+    print(f"    {full_secs:.2f}s ({n_test / full_secs:,.0f} rows/s)")
+
+    print("[4] Cascaded pipeline (cascade on)...")
+    engine.cascade = True
+    t0 = time.perf_counter()
+    cascaded = engine.evaluate_batch(raw_X, version="V4")
+    cascade_secs = time.perf_counter() - t0
+    print(f"    {cascade_secs:.2f}s ({n_test / cascade_secs:,.0f} rows/s)")
+
+    fast = cascaded["trace"]["fast_path"]
+    print(f"\n[5] Fast path taken by {int(fast.sum()):,} / {n_test:,} rows ({fast.mean():.2%})")
+
+    passed = True
+    for key in DECISION_KEYS:
+        diff = np.flatnonzero(reference["trace"][key] != cascaded["trace"][key])
+        print(f"    {key:<12}: {diff.size} mismatches")
+        passed &= diff.size == 0
+
+    # Fast-path rows must be rows the full pipeline approves at V1 and report bounds
+    # on the exact scores; every other row must score exactly as with the cascade off.
+    slow = ~fast
+    ref_anomaly = reference["explanations"]["anomaly_score"]
+    cas_anomaly = cascaded["explanations"]["anomaly_score"]
+    checks = {
+        "fast rows are V1 APPROVE": np.all(reference["trace"]["v1_decision"][fast] == "APPROVE"),
+        "risk_score bound holds": np.all(cascaded["risk_score"][fast] >= reference["risk_score"][fast]),
+        "uncertainty bound holds": np.all(cascaded["uncertainty"][fast] >= reference["uncertainty"][fast]),
+        "anomaly bound holds": np.all(cas_anomaly[fast] <= ref_anomaly[fast] + 1e-12),
+        "expected_loss bound holds": np.all(
+            cascaded["costs"]["expected_loss"][fast] >= reference["costs"]["expected_loss"][fast]
+        ),
+        "slow rows score exactly": all(
+            np.array_equal(cascaded[key][slow], reference[key][slow]) for key in ("risk_score", "uncertainty")
+        ) and np.array_equal(cas_anomaly[slow], ref_anomaly[slow]),
+        "slow rows cost exactly": all(
+            np.array_equal(cascaded["costs"][key][slow], reference["costs"][key][slow])
+            for key in ("expected_loss", "net_utility")
+        ),
+    }
+    for name, ok in checks.items():
+        print(f"    {name:<26}: {'ok' if ok else 'FAILED'}")
+        passed &= bool(ok)
+
+    print("\n[6] Single-row path on a sample of fast and slow rows...")
+    sample = np.concatenate([np.flatnonzero(fast)[:100], np.flatnonzero(slow)[:100]])
+    row_mismatches = 0
+    for i in sample:
+        rows = []
+        for cascade in (False, True):
+            engine.cascade = cascade
+            result = engine.evaluate_transaction(raw_X[i:i + 1], version="V4")
+            rows.append((result["decision"], result["risk_score"], result["uncertainty"],
+                         result["explanations"]["anomaly_score"], result["costs"]))
+        if fast[i]:
+            row_mismatches += rows[0][0] != rows[1][0] or rows[1][1] < rows[0][1] or rows[1][2] < rows[0][2]
+        else:
+            row_mismatches += rows[0] != rows[1]
+    print(f"    {sample.size} rows, {row_mismatches} mismatches")
+    passed &= row_mismatches == 0
+
+    err = degenerate_forest_error()
+    print(f"\n[7] Packed forest with max_samples=1: max |diff| vs sklearn = {err:.3e}")
+    passed &= err <= 1e-12
+
+    print("\n>>> DECISIONS EQUIVALENT <<<" if passed else "\n>>> EQUIVALENCE FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify cascaded scoring against the full pipeline.")
+    parser.add_argument("--prefix-trees", type=int, default=50)
+    parser.add_argument("--forest-depth", type=int, default=None, help="Isolation Forest traversal depth (default: full)")
+    args = parser.parse_args()
+    run_verification(args.prefix_trees, args.forest_depth)
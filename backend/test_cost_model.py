@@ -0,0 +1,77 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.cost_model import CHALLENGE_STATES, REVIEW_STATES
+from backend.engine.decision_engine import DecisionEngine
+from backend.test_cascade_equivalence import load_test_split
+
+
+def engine_costs(engine, raw_X, version):
+    """(risk_score, expected_loss, manual_review_cost, net_utility) from the batch and the per-row paths."""
+    batch = engine.evaluate_batch(raw_X, version=version)
+    rows = [engine.evaluate_transaction(raw_X[i:i + 1], version=version) for i in range(raw_X.shape[0])]
+    per_row = np.array([[r["risk_score"], r["costs"]["expected_loss"], r["costs"]["manual_review_cost"],
+                         r["costs"]["net_utility"]] for r in rows])
+    costs = batch["costs"]
+    columnar = np.column_stack([batch["risk_score"], costs["expected_loss"], costs["manual_review_cost"],
+                                costs["net_utility"]])
+    return columnar, per_row
+
+
+def run_verification(n_rows):
+    print("==================================================")
+    print("[1] Loading DecisionEngine and test rows...")
+    engine = DecisionEngine()
+    raw_X = load_test_split()[:n_rows]
+    passed = True
+
+    print(f"\n[2] Engine costs on {n_rows:,} rows, default and changed cost settings...")
+    settings = {
+        "default": {},
+        "missed fraud 5000": {"fraud_cost": 5000.0},
+        "review 80, step-up 25": {"investigation_cost": 80.0, "challenge_cost": 25.0},
+    }
+    defaults = {name: getattr(engine, name) for name in engine.COST_SETTINGS}
+    for name, changes in settings.items():
+        for setting, value in dict(defaults, **changes).items():
+            setattr(engine, setting, value)
+        manual = {d: engine.challenge_cost for d in CHALLENGE_STATES}
+        manual.update({d: engine.investigation_cost for d in REVIEW_STATES})
+        for version in ("V1", "V4"):
+            columnar, per_row = engine_costs(engine, raw_X, version)
+            decisions = engine.evaluate_batch(raw_X, version=version)["decision"]
+            prob = columnar[:, 0]
+            ok = (
+                np.allclose(columnar, per_row, rtol=0, atol=1e-9)
+                and np.allclose(columnar[:, 1], prob * engine.fraud_cost)
+                and np.array_equal(columnar[:, 2], [manual.get(d, 0.0) for d in decisions])
+                and np.allclose(columnar[:, 3], -columnar[:, 1] - columnar[:, 2])
+            )
+            print(f"    {name:<22} {version}: expected_loss and manual_review_cost follow the settings on both paths: {ok}")
+            passed &= ok
+    changed = not np.allclose(engine_costs(engine, raw_X[:50], "V4")[0][:, 2],
+                              engine_costs(DecisionEngine(collect_metrics=False), raw_X[:50], "V4")[0][:, 2])
+    print(f"    changed review costs change manual_review_cost: {changed}")
+    passed &= changed
+
+    print("\n>>> ENGINE COSTS FOLLOW THE COST MODEL <<<" if passed else "\n>>> COST MODEL CHECK FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check /predict costs against the engine's cost model.")
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+    run_verification(args.rows)
@@ -0,0 +1,95 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.evidence_fusion import ensemble_bpa, fuse_evidence, isolation_forest_bpa, svm_bpa
+from backend.test_cascade_equivalence import load_test_split
+
+TOLERANCE = 1e-12
+
+
+def random_inputs(n, seed=42):
+    """Evidence spread over the whole input range, plus the edge cases the clips guard."""
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.0, 1.0, n)
+    std = rng.uniform(0.0, 0.1, n)
+    anomaly = rng.uniform(-0.4, 0.4, n)
+    svm = rng.uniform(0.0, 1.0, n)
+    edges = np.array([
+        [0.0, 0.0, 0.0, 0.0], [1.0, 0.0, -1.0, 1.0], [1.0, 0.0, 1.0, 0.0], [0.0, 0.0, -1.0, 1.0],
+        [0.5, 0.05, 0.0, 0.5], [0.99, 1.0, -0.08, 0.99], [1e-9, 1e-9, 5.0, 1e-9],
+    ])
+    return tuple(np.concatenate([col, edges[:, j]]) for j, col in enumerate((prob, std, anomaly, svm)))
+
+
+def scalar_fusion(engine, prob, std, anomaly, svm):
+    out = {key: np.empty(prob.shape[0]) for key in ("bel_F", "pl_F", "ignorance", "conflict_K")}
+    for i in range(prob.shape[0]):
+        m12, _ = engine.dempster_combine(engine.bpa_from_ensemble(float(prob[i]), float(std[i])),
+                                         engine.bpa_from_isolation_forest(float(anomaly[i])))
+        m123, out["conflict_K"][i] = engine.dempster_combine(m12, engine.bpa_from_svm(float(svm[i])))
+        metrics = engine.extract_belief_metrics(m123)
+        for key in ("bel_F", "pl_F", "ignorance"):
+            out[key][i] = metrics[key]
+    return out
+
+
+def run_verification(n_rows):
+    print("==================================================")
+    print("[1] Loading DecisionEngine...")
+    engine = DecisionEngine(explainer_mode="lazy")
+
+    print(f"\n[2] Fusing {n_rows:,} random evidence triples (scalar dicts vs (n, 3) arrays)...")
+    prob, std, anomaly, svm = random_inputs(n_rows)
+    t0 = time.perf_counter()
+    reference = scalar_fusion(engine, prob, std, anomaly, svm)
+    scalar_secs = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fused = fuse_evidence((ensemble_bpa(prob, std), isolation_forest_bpa(anomaly), svm_bpa(svm)))
+    kernel_secs = time.perf_counter() - t0
+    print(f"    scalar: {scalar_secs * 1e3:.1f} ms   vectorized: {kernel_secs * 1e3:.2f} ms "
+          f"({scalar_secs / kernel_secs:,.0f}x)")
+
+    passed = True
+    for key, ref in reference.items():
+        err = float(np.max(np.abs(fused[key] - ref)))
+        exact = int(np.sum(fused[key] == ref))
+        ok = err <= TOLERANCE
+        print(f"    {key:<11}: max |diff| {err:.1e}, bit-identical {exact:,} / {ref.shape[0]:,}  {'ok' if ok else 'FAILED'}")
+        passed &= ok
+
+    print("\n[3] V3 trace on escalated test rows: evaluate_batch vs evaluate_transaction...")
+    raw_X = load_test_split()
+    batch = engine.evaluate_batch(raw_X, version="V3")
+    escalated = np.flatnonzero(batch["trace"]["v2_decision"] == "ESCALATE_INVEST")
+    mismatches = 0
+    for i in escalated:
+        trace = engine.evaluate_transaction(raw_X[i].reshape(1, -1), version="V3")["trace"]
+        if any(trace[key] != batch["trace"][key][i]
+               for key in ("v3_decision", "ds_bel_F", "ds_ignorance", "ds_conflict_K")):
+            mismatches += 1
+    print(f"    {escalated.size:,} escalated rows, {mismatches} mismatches")
+    passed &= mismatches == 0
+
+    print("\n>>> FUSION EQUIVALENT <<<" if passed else "\n>>> EQUIVALENCE FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the vectorized Dempster-Shafer kernel against the scalar path.")
+    parser.add_argument("--rows", type=int, default=100000, help="random evidence triples to fuse")
+    args = parser.parse_args()
+    run_verification(args.rows)
@@ -0,0 +1,127 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.model_bundle import ModelBundle
+from backend.test_cascade_equivalence import load_test_split
+from scripts.export_model_bundle import bundle_from_engine, mismatches
+
+# Maps the bundle in a second process and touches every array, then waits to be released
+_TOUCH = """
+import sys
+from backend.engine.model_bundle import ModelBundle
+bundle = ModelBundle.load(sys.argv[1])
+print(sum(int(a.sum()) for arrays in bundle.components.values() for a in arrays.values() if a.dtype.kind in "biu"), flush=True)
+sys.stdin.readline()
+"""
+
+
+def mapping_kb(path):
+    """Rss / Shared_Clean / Private_* kB of this process's mappings of path (Linux only)."""
+    totals, inside = {}, False
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if "-" in fields[0] and len(fields) >= 5:
+                inside = len(fields) >= 6 and fields[5] == os.path.realpath(path)
+            elif inside and fields[0].endswith(":") and len(fields) == 3:
+                totals[fields[0][:-1]] = totals.get(fields[0][:-1], 0) + int(fields[1])
+    return totals
+
+
+def run_verification(n_rows):
+    print("==================================================")
+    print("[1] Exporting a bundle from the pickles (NumPy backends)...")
+    reference = DecisionEngine(ensemble_backend="fused", anomaly_backend="packed", svm_backend="linear",
+                               explainer_backend="path", collect_metrics=False)
+    bundle = bundle_from_engine(reference)
+    passed = True
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "models.bundle")
+        bundle.save(path)
+
+        print("\n[2] Round trip, read-only views, rejected files...")
+        loaded = ModelBundle.load(path)
+        same = all(
+            np.array_equal(arrays[name], loaded.components[component][name])
+            and arrays[name].dtype == loaded.components[component][name].dtype
+            for component, arrays in bundle.components.items() for name in arrays
+        )
+        read_only = not any(a.flags.writeable for arrays in loaded.components.values() for a in arrays.values())
+        aligned = all(a.ctypes.data % 64 == 0 for arrays in loaded.components.values() for a in arrays.values())
+        print(f"    arrays identical: {same}, read-only: {read_only}, 64-byte aligned: {aligned}")
+        passed &= same and read_only and aligned and loaded.settings == bundle.settings
+
+        rejected = {}
+        for case in ("corrupt", "truncated", "not_a_bundle"):
+            bad_path = os.path.join(directory, f"{case}.bundle")
+            shutil.copy(path, bad_path)
+            with open(bad_path, "r+b") as f:
+                if case == "corrupt":
+                    f.seek(-100, os.SEEK_END)
+                    byte = f.read(1)
+                    f.seek(-100, os.SEEK_END)
+                    f.write(bytes([byte[0] ^ 0xFF]))
+                elif case == "truncated":
+                    f.truncate(os.path.getsize(path) - 64)
+                else:
+                    f.write(b"PK\x03\x04")
+            try:
+                ModelBundle.load(bad_path)
+                rejected[case] = False
+            except ValueError:
+                rejected[case] = True
+        print(f"    rejected: {rejected}")
+        passed &= all(rejected.values())
+
+        print(f"\n[3] Bundle engine vs pickle engine on {n_rows:,} test rows...")
+        served = DecisionEngine(bundle_path=path, explainer_mode="eager", collect_metrics=False)
+        raw_X = load_test_split()[:n_rows]
+        bad = set()
+        for lo in range(0, n_rows, 256):
+            chunk = raw_X[lo:lo + 256]
+            bad.update(mismatches(reference.evaluate_batch(chunk, version="V4"), served.evaluate_batch(chunk, version="V4")))
+        large = served.evaluate_batch(raw_X, version="V4")  # one call past the fused/XGBoost cut-over
+        whole = reference.evaluate_batch(raw_X, version="V4")
+        agree = float(np.mean(large["decision"] == whole["decision"]))
+        print(f"    mismatching fields (256-row batches): {sorted(bad) or 'none'}; "
+              f"decisions on one {n_rows:,}-row batch agree: {agree:.4%}")
+        passed &= not bad and agree == 1.0
+
+        if os.path.exists("/proc/self/smaps"):
+            print("\n[4] Page sharing with a second process mapping the same bundle...")
+            child = subprocess.Popen([sys.executable, "-c", _TOUCH, path], cwd=PROJECT_ROOT,
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            child.stdout.readline()
+            kb = mapping_kb(path)
+            child.communicate("\n")
+            private_dirty = kb.get("Private_Dirty", 0)
+            print(f"    this process: Rss {kb.get('Rss', 0):,} kB, Shared_Clean {kb.get('Shared_Clean', 0):,} kB, "
+                  f"Private_Dirty {private_dirty} kB")
+            passed &= private_dirty == 0 and kb.get("Shared_Clean", 0) > 0
+
+    print("\n>>> MODEL BUNDLE CHECKS PASS <<<" if passed else "\n>>> MODEL BUNDLE CHECK FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export, reload and serve a model bundle against the pickles.")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+    run_verification(args.rows)
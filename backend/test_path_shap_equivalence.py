@@ -0,0 +1,90 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.model_registry import ModelRegistry
+from backend.engine.path_shap import top_k_indices
+from backend.test_cascade_equivalence import load_test_split
+
+
+def reason_codes(engine, sv, top_idxs):
+    return np.array([engine._shap_reason(sv[i], top_idxs[i])[1] for i in range(sv.shape[0])], dtype=object)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run_verification(n_rows):
+    print("==================================================")
+    print("[1] Loading test split...")
+    raw_X = load_test_split()
+    print(f"    Test set size: {raw_X.shape[0]:,}")
+
+    print("[2] Loading DecisionEngine with shap.TreeExplainer and with path TreeSHAP...")
+    registry = ModelRegistry()
+    reference = DecisionEngine(registry=registry, explainer_backend="shap")
+    candidate = DecisionEngine(registry=registry, explainer_backend="path")
+    if reference.shap_explainer is None:
+        print("    SHAP model not found; nothing to verify.")
+        sys.exit(1)
+
+    X = reference.preprocess_features_batch(raw_X)[:n_rows]
+    print(f"\n[3] Explaining {X.shape[0]:,} rows directly...")
+    ref_sv, ref_secs = timed(lambda A: np.asarray(reference.shap_explainer.shap_values(A)), X)
+    path_sv, path_secs = timed(candidate.shap_explainer.shap_values, X)
+    print(f"    shap.TreeExplainer: {ref_secs:.2f}s   path TreeSHAP: {path_secs:.2f}s")
+    err = float(np.max(np.abs(path_sv - ref_sv)))
+    print(f"    max |SHAP diff| = {err:.3e} (max |SHAP| {float(np.max(np.abs(ref_sv))):.3f})")
+
+    full_sort, sort_secs = timed(lambda A: np.argsort(np.abs(A), axis=1)[:, ::-1][:, :3], ref_sv)
+    top_k, topk_secs = timed(top_k_indices, ref_sv, 3)
+    print(f"    top-3 by argsort: {sort_secs * 1e3:.1f} ms   by argpartition: {topk_secs * 1e3:.1f} ms")
+
+    passed = True
+    checks = {
+        "top-k == argsort order": np.array_equal(top_k, full_sort),
+        "reason codes match": np.array_equal(
+            reason_codes(reference, ref_sv, full_sort),
+            reason_codes(candidate, path_sv, top_k_indices(path_sv, 3)),
+        ),
+    }
+
+    print("\n[4] Full pipeline, PEND rows...")
+    ref_batch, ref_secs = timed(reference.evaluate_batch, raw_X)
+    path_batch, path_secs = timed(candidate.evaluate_batch, raw_X)
+    pend = ref_batch["trace"]["v4_decision"] == "PEND"
+    print(f"    {int(pend.sum()):,} PEND rows; evaluate_batch {ref_secs:.2f}s (shap) vs {path_secs:.2f}s (path)")
+    checks["decisions match"] = np.array_equal(ref_batch["trace"]["v4_decision"], path_batch["trace"]["v4_decision"])
+    checks["PEND reason codes match"] = np.array_equal(
+        ref_batch["trace"]["shap_reason_code"], path_batch["trace"]["shap_reason_code"]
+    )
+
+    for name, ok in checks.items():
+        print(f"    {name:<26}: {'ok' if ok else 'FAILED'}")
+        passed &= bool(ok)
+
+    print("\n>>> REASON CODES EQUIVALENT <<<" if passed else "\n>>> EQUIVALENCE FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify path TreeSHAP reason codes against shap.TreeExplainer.")
+    parser.add_argument("--rows", type=int, default=5000, help="rows explained directly (PEND or not)")
+    args = parser.parse_args()
+    run_verification(args.rows)
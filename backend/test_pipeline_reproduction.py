@@ -6,31 +6,25 @@ os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 os.environ["NUMEXPR_NUM_THREADS"] = "1"
 
 import sys
+import time
 import warnings
 warnings.filterwarnings("ignore")
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
+from backend.engine.dataset_cache import load_dataset
 from backend.engine.decision_engine import DecisionEngine
 
 def run_verification():
     print("==================================================")
     # 1. Load Clean Dataset
     print("[1] Loading clean dataset and splitting...")
-    csv_path = os.path.join(PROJECT_ROOT, "creditcard_phase0_clean.csv")
-    df = pd.read_csv(csv_path)
-    
-    # We split identically to obtain X_test
-    X = df.drop(columns=["Class"])
-    y = df["Class"]
-    
-    _, X_test, _, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    # Same split as training; raw Amount, since the engine applies log1p itself
+    data = load_dataset()
+    X_test, y_test = data.features("test", log_amount=False), data.labels("test")
     
     n_test = len(X_test)
     print(f"    Test set size: {n_test:,}")
@@ -40,72 +34,52 @@ def run_verification():
     # We want to reconstruct raw_X: [Time, V1..V28, Amount, delta_time]
     # Since hour = (Time / 3600) % 24, we can set Time = hour * 3600.
     print("[2] Reconstructing raw feature vectors...")
-    raw_X_list = []
-    for idx in range(n_test):
-        row = X_test.iloc[idx]
-        hour = row["hour"]
-        time_val = hour * 3600.0
-        pca_vals = [row[f"V{i}"] for i in range(1, 29)]
-        amount_val = row["Amount"]
-        delta_time_val = row["delta_time"]
-        
-        raw_row = [time_val] + pca_vals + [amount_val, delta_time_val]
-        raw_X_list.append(raw_row)
-        
-    raw_X_arr = np.array(raw_X_list)
+    raw_X_arr = np.column_stack([
+        X_test["hour"].values * 3600.0,
+        X_test[[f"V{i}" for i in range(1, 29)]].values,
+        X_test["Amount"].values,
+        X_test["delta_time"].values,
+    ])
     
     # 3. Load Decision Engine
     print("[3] Loading production DecisionEngine...")
     engine = DecisionEngine()
 
-    # Precompute aligned features in bulk
-    print("    Pre-computing aligned test set features...")
-    aligned_X_test = X_test.copy()
-    aligned_X_test["Amount"] = np.log1p(aligned_X_test["Amount"])
-    aligned_X_test_vals = aligned_X_test[engine.feature_cols].values
+    # 4. Evaluate all test transactions
+    print("[4] Evaluating all test transactions through DecisionEngine.evaluate_batch...")
+    t0 = time.perf_counter()
+    batch = engine.evaluate_batch(raw_X_arr, version="V4")
+    batch_secs = time.perf_counter() - t0
+    print(f"    Evaluated {n_test:,} transactions in {batch_secs:.2f}s ({n_test / batch_secs:,.0f} rows/s)")
 
-    # Precompute ensemble predictions in bulk
-    print("    Pre-computing ensemble predictions in bulk...")
-    probs_list = []
-    for model in engine.models:
-        probs_list.append(model.predict_proba(aligned_X_test_vals)[:, 1])
-    probs_arr = np.vstack(probs_list)
-    bulk_probs = np.mean(probs_arr, axis=0)
-    bulk_stds = np.std(probs_arr, axis=0)
+    trace = batch["trace"]
+    decisions_v1 = trace["v1_decision"]
+    decisions_v2 = trace["v2_decision"]
+    decisions_v3 = trace["v3_decision"]
+    decisions_v4 = trace["v4_decision"]
 
-    # Precompute anomaly scores in bulk
-    print("    Pre-computing anomaly scores in bulk...")
-    if engine.anomaly_model is not None:
-        bulk_anomalies = engine.anomaly_model.decision_function(aligned_X_test_vals)
-    else:
-        bulk_anomalies = np.zeros(n_test)
-    
-    # 4. Evaluate all test transactions
-    print("[4] Evaluating all test transactions through DecisionEngine...")
-    decisions_v1 = []
-    decisions_v2 = []
-    decisions_v3 = []
-    decisions_v4 = []
-    
-    for i in range(n_test):
-        raw_txn = raw_X_arr[i].reshape(1, -1)
-        res = engine.evaluate_transaction(
-            raw_txn,
-            version="V4",
-            precomputed_prob=float(bulk_probs[i]),
-            precomputed_std=float(bulk_stds[i]),
-            precomputed_anomaly=float(bulk_anomalies[i]),
-        )
-        
-        # Extract decisions from the trace for comparison
-        trace = res["trace"]
-        decisions_v1.append(trace["v1_decision"])
-        decisions_v2.append(trace["v2_decision"])
-        decisions_v3.append(trace["v3_decision"])
-        decisions_v4.append(trace["v4_decision"])
-        
-        if (i + 1) % 10000 == 0:
-            print(f"    Evaluated {i + 1:,} / {n_test:,} transactions...")
+    # Cross-check the batch path against the per-row path: every routed (non-APPROVE)
+    # row plus a random sample of approvals must produce identical records.
+    print("    Cross-checking batch records against evaluate_transaction...")
+    rng = np.random.default_rng(42)
+    routed = np.flatnonzero(decisions_v4 != "APPROVE")
+    approved = np.flatnonzero(decisions_v4 == "APPROVE")
+    sample = np.concatenate([routed, rng.choice(approved, size=min(2000, approved.size), replace=False)])
+    records = engine.batch_records(batch)
+
+    t0 = time.perf_counter()
+    mismatches = 0
+    for i in sample:
+        res = engine.evaluate_transaction(raw_X_arr[i].reshape(1, -1), version="V4")
+        expected = records[i]
+        res["meta"].pop("timestamp")
+        expected["meta"].pop("timestamp")
+        if res != expected:
+            mismatches += 1
+    row_secs = time.perf_counter() - t0
+    print(f"    Per-row path: {sample.size / row_secs:,.0f} rows/s "
+          f"(batch speed-up ~{(n_test / batch_secs) / (sample.size / row_secs):,.0f}x)")
+    print(f"    Batch vs per-row mismatches: {mismatches} / {sample.size:,}")
             
     print("\n[5] Decision Distributions:")
     
@@ -151,6 +125,9 @@ def run_verification():
         # V2 check
         assert dist_v2.get("ABSTAIN", 0) == 29, f"V2 ABSTAIN mismatch: {dist_v2.get('ABSTAIN', 0)} vs 29"
         
+        # Batch/per-row equivalence
+        assert mismatches == 0, f"{mismatches} batch records differ from evaluate_transaction"
+
         # V3 check
         assert dist_v3.get("AUTO_DECLINE", 0) == 6, f"V3 AUTO_DECLINE mismatch: {dist_v3.get('AUTO_DECLINE', 0)} vs 6"
         assert dist_v3.get("HUMAN_ESCALATE", 0) == 22, f"V3 HUMAN_ESCALATE mismatch: {dist_v3.get('HUMAN_ESCALATE', 0)} vs 22"
@@ -0,0 +1,169 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.prediction_cache import PredictionCache
+from backend.test_cascade_equivalence import load_test_split
+
+
+def cached_evaluate(cache, engine, row, version="V4"):
+    key = cache.key(row, version)
+    result = cache.get(key)
+    if result is None:
+        result = engine.evaluate_transaction(row, version=version)
+        if cache.cacheable(result):
+            cache.put(key, result)
+    return result
+
+
+def check_explainer_in_workers(engine, raw_X):
+    """
+    MARI_INFERENCE_POOL=process with MARI_SHAP_LOAD=lazy: the workers load SHAP, the
+    parent's explainer_status never changes. `engine` plays the worker, `parent` owns
+    the cache; PEND rows scored before the worker's explainer is ready must not stick.
+    """
+    parent = DecisionEngine(explainer_mode="lazy")
+    cache = PredictionCache(parent)
+    pend = next(i for i in range(raw_X.shape[0])
+                if engine.evaluate_transaction(raw_X[i:i + 1])["trace"]["v4_decision"] == "PEND")
+    row = raw_X[pend:pend + 1]
+
+    explainer, status = engine.shap_explainer, engine.explainer_status
+    engine.shap_explainer, engine.explainer_status = None, "loading"  # the worker's load is still running
+    try:
+        early = cached_evaluate(cache, engine, row)
+    finally:
+        engine.shap_explainer, engine.explainer_status = explainer, status
+    early_cached = len(cache) > 0
+    later = cached_evaluate(cache, engine, row)
+    served = cache.get(cache.key(row, "V4"))
+    print(f"    before the explainer: {len(early['explanations']['top_features'])} top features, cached: {early_cached}")
+    print(f"    after: {len(later['explanations']['top_features'])} top features, served from cache: {served is later}, "
+          f"generation still {cache.generation}")
+    return (not early["explanations"]["top_features"] and not early_cached
+            and bool(later["explanations"]["top_features"]) and served is later and cache.generation == 0)
+
+
+def check_api_delta_rows(raw_X):
+    """/predict with 30-column rows and MARI_DELTA_TIME=partition: keys before delta_time."""
+    os.environ.update(MARI_PREDICTION_CACHE="1", MARI_DELTA_TIME="partition", MARI_SHAP_LOAD="lazy")
+    from fastapi.testclient import TestClient
+    import api.main
+
+    rows = raw_X[:3, :30].tolist()
+    with TestClient(api.main.app) as client:
+        def post(row, stream="card-a"):
+            response = client.post("/predict", json={"features": row, "stream": stream})
+            return response.headers.get("x-cache"), response.json()
+
+        first = post(rows[0])
+        second = post(rows[1])
+        events = api.main.delta_store.n_events
+        retry = post(rows[1])
+        retry_events = api.main.delta_store.n_events - events
+        other_stream = post(rows[1], stream="card-b")
+        full_row = post(rows[2] + [0.0])
+    print(f"    30-column rows: {first[0]}, {second[0]}, retry {retry[0]}, other stream {other_stream[0]}, "
+          f"31-column {full_row[0]}")
+    print(f"    events recorded by the retry: {retry_events}")
+    return (
+        (first[0], second[0], retry[0], other_stream[0], full_row[0]) == ("MISS", "MISS", "HIT", "MISS", "MISS")
+        and retry[1]["decision"] == second[1]["decision"] and retry[1]["risk_score"] == second[1]["risk_score"]
+        and retry_events == 0
+    )
+
+
+def run_verification(n_rows, repeats):
+    print("==================================================")
+    print("[1] Loading DecisionEngine and test rows...")
+    engine = DecisionEngine()
+    raw_X = load_test_split()[:n_rows]
+    passed = True
+
+    print(f"\n[2] Replaying {n_rows:,} rows {repeats}x through the cache...")
+    cache = PredictionCache(engine)
+    t0 = time.perf_counter()
+    first = [cached_evaluate(cache, engine, raw_X[i:i + 1]) for i in range(n_rows)]
+    miss_secs = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(repeats - 1):
+        again = [cached_evaluate(cache, engine, raw_X[i:i + 1]) for i in range(n_rows)]
+    hit_secs = time.perf_counter() - t0
+    stats = cache.stats()
+    print(f"    miss: {miss_secs / n_rows * 1e6:,.0f} us/row, hit: {hit_secs / (n_rows * (repeats - 1)) * 1e6:.1f} us/row")
+    print(f"    {stats['hits']:,} hits, {stats['misses']:,} misses, {stats['entries']:,} entries, "
+          f"{stats['bytes'] / max(1, stats['entries']):,.0f} bytes/entry")
+    passed &= stats["hits"] == n_rows * (repeats - 1) and all(a is b for a, b in zip(first, again))
+
+    # Cached results are what the engine returns (timestamp aside)
+    fresh = engine.evaluate_transaction(raw_X[:1], version="V4")
+    passed &= {k: v for k, v in fresh.items() if k != "meta"} == {k: v for k, v in first[0].items() if k != "meta"}
+
+    print("\n[3] Invalidation on a threshold change, V-version keys, TTL...")
+    engine.auth_threshold += 0.01
+    invalidated = cache.get(cache.key(raw_X[:1], "V4")) is None and len(cache) == 0
+    engine.auth_threshold -= 0.01
+    cached_evaluate(cache, engine, raw_X[:1], "V4")
+    other_version = cache.get(cache.key(raw_X[:1], "V1")) is None
+    short = PredictionCache(engine, ttl_secs=0.05)
+    cached_evaluate(short, engine, raw_X[:1])
+    time.sleep(0.1)
+    expired = short.get(short.key(raw_X[:1], "V4")) is None and short.stats()["expired"] == 1
+    print(f"    invalidated: {invalidated}, versions keyed apart: {other_version}, expired: {expired}")
+    passed &= invalidated and other_version and expired
+
+    print("\n[4] Quantized keys...")
+    coarse = PredictionCache(engine, quantize_decimals=3)
+    cached_evaluate(coarse, engine, raw_X[:1])
+    nudged = raw_X[:1] + 1e-6
+    shared = coarse.get(coarse.key(nudged, "V4")) is not None
+    print(f"    row + 1e-6 hits the rounded key: {shared}")
+    passed &= shared
+
+    print("\n[5] Byte limit and TinyLFU admission under a one-off scan...")
+    entry_bytes = stats["bytes"] // stats["entries"]
+    for policy in PredictionCache.POLICIES:
+        small = PredictionCache(engine, max_bytes=50 * entry_bytes, policy=policy)
+        hot = raw_X[:20]
+        for _ in range(3):
+            for i in range(hot.shape[0]):
+                cached_evaluate(small, engine, hot[i:i + 1])
+        for i in range(20, n_rows):  # rows seen once
+            cached_evaluate(small, engine, raw_X[i:i + 1])
+        hot_hits = sum(small.get(small.key(hot[i:i + 1], "V4")) is not None for i in range(hot.shape[0]))
+        s = small.stats()
+        print(f"    {policy:<8} bytes {s['bytes']:,} <= {s['max_bytes']:,}, {s['evictions']:,} evictions, "
+              f"{s['rejected']:,} rejected, hot rows still cached: {hot_hits}/{hot.shape[0]}")
+        passed &= s["bytes"] <= s["max_bytes"]
+        if policy == "tinylfu":
+            passed &= hot_hits == hot.shape[0]
+
+    print("\n[6] PEND rows scored before a pool worker's SHAP explainer is ready...")
+    passed &= check_explainer_in_workers(engine, raw_X)
+
+    print("\n[7] /predict with 30-column rows and server-side delta_time...")
+    passed &= check_api_delta_rows(raw_X)
+
+    print("\n>>> PREDICTION CACHE CHECKS PASS <<<" if passed else "\n>>> PREDICTION CACHE CHECK FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the /predict result cache against the engine.")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run_verification(args.rows, args.repeats)
@@ -0,0 +1,92 @@
+import os
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+import warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.dataset_cache import load_dataset
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.threshold_sweep import (
+    THRESHOLD_NAMES, SweepSignals, decision_names, route_v1, route_v2, route_v3, route_v4, sweep,
+)
+
+# A second setting that moves rows between every V1 and V3 route
+SHIFTED = {"auth_threshold": 0.2, "uncertainty_threshold": 0.01, "ds_conflict_human": 0.2, "ds_bel_auto_decline": 0.85}
+
+
+def replay(signals, thresholds):
+    """route_v1..route_v4 over the cached signals, as decision names per version."""
+    v1 = route_v1(signals.prob, signals.uncertainty, signals.anomaly_score, thresholds)
+    v2 = route_v2(v1, signals.v2_svm_prob, thresholds)
+    v3 = route_v3(v2, signals.bel_F, signals.ignorance, signals.conflict_K, thresholds)
+    return {f"v{i}": decision_names(codes) for i, codes in enumerate((v1, v2, v3, route_v4(v3)), start=1)}
+
+
+def compare(engine, raw_X, routed):
+    """Rows whose route_* decision differs from evaluate_batch, per version."""
+    trace = engine.evaluate_batch(raw_X, version="V4")["trace"]
+    mismatches = {}
+    for version, names in routed.items():
+        mismatches[version] = int(np.sum(names != trace[f"{version}_decision"]))
+        print(f"    {version.upper()}: {mismatches[version]} / {raw_X.shape[0]:,} decisions differ from evaluate_batch")
+    return mismatches
+
+
+def run_verification(n_rows):
+    print("==================================================")
+    print("[1] Loading DecisionEngine and the test split...")
+    engine = DecisionEngine(explainer_mode="lazy")
+    data = load_dataset()
+    raw_X = data.raw_features("test")
+    labels = data.labels("test").to_numpy()
+    if n_rows:
+        raw_X, labels = raw_X[:n_rows], labels[:n_rows]
+    passed = True
+
+    print(f"\n[2] Capturing the sweep signals for {raw_X.shape[0]:,} rows...")
+    t0 = time.perf_counter()
+    signals = SweepSignals.from_engine(engine, raw_X, labels)
+    print(f"    {time.perf_counter() - t0:.2f}s")
+    defaults = {name: getattr(engine, name) for name in THRESHOLD_NAMES}
+    passed &= signals.thresholds == defaults
+
+    print("\n[3] Default thresholds: route_* vs evaluate_batch...")
+    routed = default_routes = replay(signals, signals.thresholds)
+    passed &= not any(compare(engine, raw_X, routed).values())
+    counts = sweep(signals, {name: [value] for name, value in defaults.items()}, "V4").iloc[0]
+    v4_counts = {state: int(np.sum(routed["v4"] == state)) for state in ("APPROVE", "STEP_UP", "DECLINE", "PEND")}
+    print(f"    sweep() V4 counts: {v4_counts}")
+    passed &= all(counts[state] == n for state, n in v4_counts.items())
+
+    print(f"\n[4] Shifted thresholds {SHIFTED}: route_* vs evaluate_batch...")
+    thresholds = dict(signals.thresholds, **SHIFTED)
+    for name, value in SHIFTED.items():
+        setattr(engine, name, value)
+    try:
+        routed = replay(signals, thresholds)
+        moved = int(np.sum(routed["v3"] != default_routes["v3"]))
+        print(f"    {moved:,} rows routed differently from the defaults at V3")
+        passed &= moved > 0 and not any(compare(engine, raw_X, routed).values())
+    finally:
+        for name, value in defaults.items():
+            setattr(engine, name, value)
+
+    print("\n>>> SWEEP ROUTER MATCHES EVALUATE_BATCH <<<" if passed else "\n>>> SWEEP ROUTER CHECK FAILED <<<")
+    print("==================================================")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the threshold sweep router against evaluate_batch.")
+    parser.add_argument("--rows", type=int, default=0, help="limit to the first N test rows (0 = all)")
+    args = parser.parse_args()
+    run_verification(args.rows)
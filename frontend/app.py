@@ -39,8 +39,15 @@ def generate_random_transaction():
 # Call Model
 # ----------------------------------------
 
+@st.cache_resource
+def get_session():
+    # One keep-alive connection pool for every call, across reruns:
+    # generate_for_decision can make hundreds of calls per click
+    return requests.Session()
+
+
 def call_model(features):
-    response = requests.post(API_URL, json={"features": features})
+    response = get_session().post(API_URL, json={"features": features})
     payload = response.json()
     return payload.get("result", payload)
 
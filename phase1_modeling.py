@@ -3,7 +3,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
@@ -12,28 +11,19 @@ from sklearn.metrics import (
     roc_auc_score
 )
 
+from backend.engine.dataset_cache import load_dataset
+
 # ====================================
 # Phase 1 – Baseline Logistic Model
 # ====================================
 
-# 1️⃣ Load cleaned dataset
-df = pd.read_csv("creditcard_phase0_clean.csv")
-
-# 2️⃣ Log-transform skewed feature
-df["Amount"] = np.log1p(df["Amount"])
+# 1️⃣ Load cleaned dataset (memory-mapped cache of creditcard_phase0_clean.csv)
+# 2️⃣ Log-transform skewed feature (Amount is log1p'd once, when the cache is built)
+data = load_dataset()
 
 # 3️⃣ Split features / target
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-# 4️⃣ Stratified split
-X_train, X_test, y_train, y_test = train_test_split(
-    X,
-    y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+# 4️⃣ Stratified split (test_size=0.2, random_state=42, stratify=y)
+X_train, X_test, y_train, y_test = data.train_test_split()
 
 # 5️⃣ Scale features
 scaler = StandardScaler()
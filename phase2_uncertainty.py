@@ -1,12 +1,16 @@
+import os
+
 import pandas as pd
 import numpy as np
 
 import joblib
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score
 from xgboost import XGBClassifier
 from sklearn.calibration import CalibratedClassifierCV
 
+from backend.engine.cost_model import CostModel
+from backend.engine.dataset_cache import load_dataset
+
 # ======================================================
 # Phase 2 – Bootstrap Ensemble + 2D Risk Decision Engine
 # ======================================================
@@ -14,25 +18,16 @@ from sklearn.calibration import CalibratedClassifierCV
 # -----------------------------
 # 1️⃣ Load and Prepare Data
 # -----------------------------
-df = pd.read_csv("creditcard_phase0_clean.csv")
-df["Amount"] = np.log1p(df["Amount"])
-
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+data = load_dataset()  # memory-mapped cache of creditcard_phase0_clean.csv
+X_train, X_test, y_train, y_test = data.train_test_split()
 
 scale_pos_weight = (len(y_train) - y_train.sum()) / y_train.sum()
 
 # -----------------------------
 # 2️⃣ Bootstrap Ensemble
 # -----------------------------
-n_models = 5
+# Ensemble size; 10-50 members give steadier uncertainty estimates (MARI_ENSEMBLE_SIZE)
+n_models = int(os.environ.get("MARI_ENSEMBLE_SIZE", "5"))
 probs = []
 models = []
 
@@ -140,44 +135,31 @@ C_manual = 50
 C_step_up = 10
 C_escalate = 100
 
-total_cost = 0
-
-for _, row in results.iterrows():
-
-    decision = row["decision"]
-    true = row["true_label"]
-
-    # AUTO BLOCK
-    if decision == "AUTO_BLOCK":
-        if true == 0:
-            total_cost += C_FP_block
-
-    # AUTO APPROVE
-    elif decision == "AUTO_APPROVE":
-        if true == 1:
-            total_cost += C_FN
-
-    # MANUAL REVIEW
-    elif decision == "MANUAL_REVIEW":
-        total_cost += C_manual
-
-    # STEP UP
-    elif decision == "STEP_UP_AUTH":
-        total_cost += C_step_up
-
-    # ESCALATE
-    elif decision == "ESCALATE_INVEST":
-        total_cost += C_escalate
-
-    # ABSTAIN (treated as manual)
-    elif decision == "ABSTAIN":
-        total_cost += C_manual
+# Decision x true-label cost matrix, evaluated over all rows at once
+cost_model = CostModel.from_components(
+    review_costs={
+        "MANUAL_REVIEW": C_manual,
+        "STEP_UP_AUTH": C_step_up,
+        "ESCALATE_INVEST": C_escalate,
+        "ABSTAIN": C_manual,  # treated as manual
+    },
+    missed_fraud_cost=C_FN,  # AUTO_APPROVE on fraud
+    false_decline_cost=C_FP_block,  # AUTO_BLOCK on legit
+)
+summary = cost_model.summary(results["decision"], results["true_label"])
+total_cost = summary["total_cost"]
 
 print("\n===== TOTAL SYSTEM COST =====")
 print("Total Cost:", total_cost)
-print("Average Cost per Transaction:", total_cost / len(results))
+print("Average Cost per Transaction:", summary["cost_per_txn"])
+
+print("\n===== COST BY DECISION =====")
+print(cost_model.breakdown(results["decision"], results["true_label"]))
+
+ci = cost_model.bootstrap(results["decision"], results["true_label"])
+print("95% bootstrap CI, total cost: [{1:,.0f}, {2:,.0f}]".format(*ci["total_cost"]))
+print("95% bootstrap CI, cost per transaction: [{1:.4f}, {2:.4f}]".format(*ci["cost_per_txn"]))
 
-import os
 os.makedirs("artifacts", exist_ok=True)
 
 joblib.dump(models, "artifacts/xgb_ensemble.pkl")
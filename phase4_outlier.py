@@ -2,26 +2,18 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import IsolationForest
 
+from backend.engine.dataset_cache import load_dataset
+
 # ==========================================
 # Phase 4 – Isolation Forest (Novelty Layer)
 # ==========================================
 
 # 1️⃣ Load data
-df = pd.read_csv("creditcard_phase0_clean.csv")
-df["Amount"] = np.log1p(df["Amount"])
-
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+data = load_dataset()  # memory-mapped cache of creditcard_phase0_clean.csv
+X = data.features()
+X_train, X_test, y_train, y_test = data.train_test_split()
 
 # ------------------------------------------
 # 2️⃣ Train ONLY on Legitimate Transactions
@@ -106,3 +98,22 @@ os.makedirs("artifacts", exist_ok=True)
 joblib.dump(iso, "artifacts/isolation_forest.pkl")
 
 print("Isolation Forest saved successfully.")
+
+
+# ------------------------------------------
+# 7️⃣ Packed Forest Export + Full-Dataset Scoring
+# ------------------------------------------
+import time
+from backend.engine.packed_isolation_forest import PackedIsolationForest
+
+packed = PackedIsolationForest.from_sklearn(iso)
+packed.save("artifacts/isolation_forest_packed.npz")
+
+packed_test_scores = packed.decision_function(X_test.values)
+print("\nPacked vs sklearn max |diff| (test):", np.max(np.abs(packed_test_scores - iso.decision_function(X_test))))
+
+start = time.perf_counter()
+full_scores = packed.decision_function(X.values)
+print(f"Scored full dataset ({len(X):,} rows) in {time.perf_counter() - start:.2f}s")
+
+print("Packed Isolation Forest saved successfully.")
@@ -2,29 +2,20 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
 from sklearn.calibration import calibration_curve
 from sklearn.metrics import brier_score_loss
 from sklearn.calibration import CalibratedClassifierCV
 from xgboost import XGBClassifier
 
+from backend.engine.dataset_cache import load_dataset
+
 # ==========================================
 # Phase 5 – Reliability & Calibration Check
 # ==========================================
 
 # 1️⃣ Load Data
-df = pd.read_csv("creditcard_phase0_clean.csv")
-df["Amount"] = np.log1p(df["Amount"])
-
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+data = load_dataset()  # memory-mapped cache of creditcard_phase0_clean.csv
+X_train, X_test, y_train, y_test = data.train_test_split()
 
 scale_pos_weight = (len(y_train) - y_train.sum()) / y_train.sum()
 
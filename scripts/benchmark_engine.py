@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.evidence_fusion import ensemble_bpa, fuse_evidence, isolation_forest_bpa, svm_bpa
+from backend.engine.synthetic_transactions import DEFAULT_MIX, synthetic_workload
+
+CASES = ("pipeline", "ensemble", "isolation_forest", "v2_svm", "ds_fusion", "shap")
+# Results are only comparable to a baseline recorded with the same values of these
+COMPARABLE_META = ("config", "machine", "cpus", "ensemble_members", "seed")
+
+
+# ============================================================
+# TIMING
+# ============================================================
+
+def time_calls(fn, batches, min_secs, min_calls, max_calls):
+    """Call fn on successive batches until min_secs and min_calls are reached; per-call seconds."""
+    fn(batches[0])  # warm-up: lazy loads, allocator, caches
+    secs = []
+    started = time.perf_counter()
+    while len(secs) < max_calls and (len(secs) < min_calls or time.perf_counter() - started < min_secs):
+        batch = batches[len(secs) % len(batches)]
+        t0 = time.perf_counter()
+        fn(batch)
+        secs.append(time.perf_counter() - t0)
+    return np.asarray(secs)
+
+
+def summarize(secs, rows_per_call):
+    return {
+        "calls": int(secs.size),
+        "rows_per_call": rows_per_call,
+        "rows_per_s": round(rows_per_call * secs.size / float(secs.sum()), 1),
+        "p50_ms": round(float(np.percentile(secs, 50)) * 1e3, 4),
+        "p99_ms": round(float(np.percentile(secs, 99)) * 1e3, 4),
+    }
+
+
+def case_inputs(engine, raw_X):
+    """Everything each stage consumes, computed once outside the timed region."""
+    X = engine.preprocess_features_batch(raw_X)
+    prob, std = engine.predict_proba_batch(X)
+    anomaly, _ = engine.anomaly_score_batch(X)
+    anomaly = np.zeros(X.shape[0]) if anomaly is None else anomaly
+    scaled = engine.v2_scaler.transform(X) if engine.v2_scaler is not None else None
+    svm = engine.v3_svm.predict_proba(engine.v3_scaler.transform(X))[:, 1] if engine.v3_svm is not None else np.zeros(X.shape[0])
+    return {"raw": raw_X, "X": X, "prob": prob, "std": std, "anomaly": anomaly, "scaled": scaled, "svm": svm}
+
+
+def case_fn(engine, case, size):
+    """(callable on one batch of case_inputs, or None when the stage is unavailable)."""
+    if case == "pipeline":
+        if size == 1:
+            return lambda b: engine.evaluate_transaction(b["raw"], version="V4")
+        return lambda b: engine.evaluate_batch(b["raw"], version="V4")
+    if case == "ensemble":
+        return lambda b: engine.predict_proba_batch(b["X"])
+    if case == "isolation_forest":
+        return None if engine.anomaly_model is None else (lambda b: engine.anomaly_score_batch(b["X"]))
+    if case == "v2_svm":
+        return None if engine.v2_svm is None else (lambda b: engine.v2_svm.predict_proba(b["scaled"]))
+    if case == "ds_fusion":
+        return lambda b: fuse_evidence((ensemble_bpa(b["prob"], b["std"]), isolation_forest_bpa(b["anomaly"]), svm_bpa(b["svm"])))
+    if case == "shap":
+        explainer = engine.load_explainer()
+        return None if explainer is None else (lambda b: explainer.shap_values(b["X"]))
+    raise ValueError(f"Unknown case: {case}")
+
+
+def run(engine, raw_X, sizes, cases, args):
+    inputs = case_inputs(engine, raw_X)
+    results = {}
+    for size in sizes:
+        # Distinct rows per call, cycling through the workload
+        n_batches = max(1, min(64, raw_X.shape[0] // size))
+        batches = [{key: None if value is None else value[i * size:(i + 1) * size] for key, value in inputs.items()}
+                   for i in range(n_batches)]
+        for case in cases:
+            key = f"{case}@{size}"
+            fn = case_fn(engine, case, size)
+            if fn is None or (case == "shap" and size > args.shap_max_rows):
+                print(f"[benchmark_engine] {key:<24} skipped")
+                continue
+            secs = time_calls(fn, batches, args.min_secs, args.min_calls, args.max_calls)
+            results[key] = summarize(secs, size)
+            r = results[key]
+            print(f"[benchmark_engine] {key:<24} {r['rows_per_s']:>12,.0f} rows/s   "
+                  f"p50 {r['p50_ms']:>10.3f} ms   p99 {r['p99_ms']:>10.3f} ms   ({r['calls']} calls)")
+    return results
+
+
+# ============================================================
+# BASELINE
+# ============================================================
+
+def compare(results, baseline, max_throughput_drop, max_p99_growth):
+    """Cases that regressed against the baseline: throughput down or p99 up beyond the limits."""
+    regressions = []
+    for key, current in results.items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        drop = 1.0 - current["rows_per_s"] / before["rows_per_s"]
+        growth = current["p99_ms"] / before["p99_ms"] - 1.0
+        flag = drop > max_throughput_drop or growth > max_p99_growth
+        print(f"[benchmark_engine] {key:<24} rows/s {-drop:+7.1%}   p99 {growth:+7.1%}   {'REGRESSED' if flag else 'ok'}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the decision engine and its stages.")
+    parser.add_argument("--sizes", default="1,64,1000,100000", help="comma-separated batch sizes")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma-separated subset of {','.join(CASES)}")
+    parser.add_argument("--min-secs", type=float, default=2.0, help="minimum timed seconds per case")
+    parser.add_argument("--min-calls", type=int, default=5)
+    parser.add_argument("--max-calls", type=int, default=2000)
+    parser.add_argument("--shap-max-rows", type=int, default=1000, help="skip SHAP on larger batches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ensemble-backend", default="sklearn")
+    parser.add_argument("--anomaly-backend", default="sklearn")
+    parser.add_argument("--svm-backend", default="exact")
+    parser.add_argument("--explainer-backend", default="shap")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARKS_DIR, "engine_baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--output", help="also write these results to this JSON file")
+    # p99 over a few dozen calls is close to the maximum, so it gets the looser limit
+    parser.add_argument("--max-throughput-drop", type=float, default=0.25, help="fail if rows/s falls by more")
+    parser.add_argument("--max-p99-growth", type=float, default=1.0, help="fail if p99 latency grows by more")
+    parser.add_argument("--allow-config-mismatch", action="store_true",
+                        help="exit 0 without comparing when the baseline is missing or from another config or machine")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise SystemExit(f"Unknown cases: {sorted(unknown)}")
+
+    config = {
+        "ensemble_backend": args.ensemble_backend,
+        "anomaly_backend": args.anomaly_backend,
+        "svm_backend": args.svm_backend,
+        "explainer_backend": args.explainer_backend,
+        "cascade": args.cascade,
+    }
+    engine = DecisionEngine(explainer_mode="lazy", collect_metrics=False, **config)
+
+    n_rows = max(max(sizes), 4096)
+    print(f"[benchmark_engine] Building a {n_rows:,}-row synthetic workload (seed {args.seed})...")
+    raw_X, v1 = synthetic_workload(engine, n_rows, seed=args.seed)
+    routes, counts = np.unique(v1, return_counts=True)
+    print("[benchmark_engine] V1 mix: " + ", ".join(f"{r} {c / n_rows:.1%}" for r, c in zip(routes, counts)))
+
+    results = run(engine, raw_X, sizes, cases, args)
+    report = {
+        "meta": {
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            # A bundle engine has no sklearn members, only the fused evaluator
+            "ensemble_members": engine.fused_ensemble.n_members if engine.fused_ensemble is not None else len(engine.models),
+            "config": config,
+            "mix": DEFAULT_MIX,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[benchmark_engine] Results written to {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[benchmark_engine] Baseline written to {args.baseline}")
+        return
+
+    mismatch = None
+    if not os.path.exists(args.baseline):
+        mismatch = f"No baseline at {args.baseline}; record one on this machine with --update-baseline"
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differs = [key for key in COMPARABLE_META if baseline["meta"].get(key) != report["meta"][key]]
+        if differs:
+            mismatch = f"Baseline {args.baseline} was recorded with a different {', '.join(differs)}"
+    if mismatch:
+        if args.allow_config_mismatch:
+            print(f"[benchmark_engine] {mismatch}; not comparing (--allow-config-mismatch).")
+            return
+        raise SystemExit(f"[benchmark_engine] {mismatch}. Pass --allow-config-mismatch to skip the comparison.")
+    print(f"\n[benchmark_engine] Against {args.baseline} ({baseline['meta']['created']}):")
+    regressions = compare(results, baseline, args.max_throughput_drop, args.max_p99_growth)
+    if regressions:
+        print(f"[benchmark_engine] {len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+    print("[benchmark_engine] No regressions.")
+
+
+if __name__ == "__main__":
+    main()
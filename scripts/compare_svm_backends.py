@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.model_registry import ModelRegistry
+from backend.test_cascade_equivalence import load_test_split
+
+
+def agreement_table(reference, candidate, labels):
+    """Rows: exact backend decision; columns: linear backend decision."""
+    width = max(len(label) for label in labels) + 2
+    print(" " * width + "".join(f"{label:>{width}}" for label in labels))
+    for ref_label in labels:
+        counts = [int(np.sum((reference == ref_label) & (candidate == label))) for label in labels]
+        print(f"{ref_label:<{width}}" + "".join(f"{c:>{width},}" for c in counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the exact and linear SVM backends on the test split.")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="max abs diff allowed on the SVM probability")
+    args = parser.parse_args()
+
+    print("[compare_svm_backends] Loading test split...")
+    raw_X = load_test_split()
+    print(f"  {raw_X.shape[0]:,} rows")
+
+    results = {}
+    registry = ModelRegistry()
+    for backend in ("exact", "linear"):
+        engine = DecisionEngine(svm_backend=backend, registry=registry)
+        X = engine.preprocess_features_batch(raw_X)
+        t0 = time.perf_counter()
+        svm_prob = engine.v2_svm.predict_proba(engine.v2_scaler.transform(X))[:, 1]
+        svm_secs = time.perf_counter() - t0
+        results[backend] = (engine.evaluate_batch(raw_X, version="V4"), svm_prob)
+        print(f"  {backend:<6} SVM over the full split: {svm_secs:.3f}s")
+
+    (exact, exact_prob), (linear, linear_prob) = results["exact"], results["linear"]
+    err = float(np.max(np.abs(linear_prob - exact_prob)))
+    print(f"\n  max |SVM probability diff| = {err:.3e}")
+
+    # V2 clearances: V1 ABSTAIN rows the SVM approves
+    abstain = exact["trace"]["v1_decision"] == "ABSTAIN"
+    cleared_exact = abstain & (exact["trace"]["v2_decision"] == "APPROVE")
+    cleared_linear = abstain & (linear["trace"]["v2_decision"] == "APPROVE")
+    print(f"\n[V2] {int(abstain.sum()):,} ABSTAIN rows")
+    print(f"  cleared by exact: {int(cleared_exact.sum()):,}, by linear: {int(cleared_linear.sum()):,}, "
+          f"disagreements: {int(np.sum(cleared_exact != cleared_linear))}")
+
+    # V3 sub-routing on rows both backends escalate
+    escalated = (exact["trace"]["v2_decision"] == "ESCALATE_INVEST") & (linear["trace"]["v2_decision"] == "ESCALATE_INVEST")
+    print(f"\n[V3] {int(escalated.sum()):,} rows escalated by both backends")
+    labels = ["AUTO_DECLINE", "STEP_UP_AUTH", "HUMAN_ESCALATE"]
+    agreement_table(exact["trace"]["v3_decision"][escalated], linear["trace"]["v3_decision"][escalated], labels)
+
+    mismatches = {key: int(np.sum(exact["trace"][key] != linear["trace"][key]))
+                  for key in ("v2_decision", "v3_decision", "v4_decision")}
+    print(f"\n  decision mismatches: {mismatches}")
+    passed = err <= args.tolerance and not any(mismatches.values())
+    print("[compare_svm_backends] " + ("Backends agree." if passed else "Backends DIFFER."))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
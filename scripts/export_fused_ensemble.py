@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.fused_ensemble import FusedEnsemble
+
+FEATURE_COLS = [f"V{i}" for i in range(1, 29)] + ["Amount", "hour", "delta_time"]
+
+
+def load_validation_rows(n_rows):
+    csv_path = os.path.join(PROJECT_ROOT, "creditcard_phase0_clean.csv")
+    if os.path.exists(csv_path):
+        print(f"[export_fused_ensemble] Validating on {n_rows:,} rows of {csv_path}")
+        df = pd.read_csv(csv_path, nrows=n_rows)
+        df["Amount"] = np.log1p(df["Amount"])
+        return df[FEATURE_COLS].values
+    print(f"[export_fused_ensemble] Clean CSV not found. Validating on {n_rows:,} synthetic rows.")
+    rng = np.random.default_rng(42)
+    X = rng.normal(0.0, 1.5, size=(n_rows, len(FEATURE_COLS)))
+    X[:, 28] = np.log1p(rng.exponential(80.0, n_rows))
+    X[:, 29] = rng.uniform(0.0, 24.0, n_rows)
+    X[:, 30] = rng.exponential(1.0, n_rows)
+    return X
+
+
+def sklearn_mean_std(models, X):
+    probs_arr = np.vstack([model.predict_proba(X)[:, 1] for model in models])
+    return np.mean(probs_arr, axis=0), np.std(probs_arr, axis=0)
+
+
+def single_row_latency_us(fn, X, n_calls=500):
+    timings = []
+    for i in range(min(n_calls, X.shape[0])):
+        row = X[i:i + 1]
+        t0 = time.perf_counter()
+        fn(row)
+        timings.append((time.perf_counter() - t0) * 1e6)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the bootstrap ensemble as a fused NumPy tree evaluator.")
+    parser.add_argument("--ensemble", default=os.path.join(ARTIFACTS_DIR, "xgb_ensemble.pkl"))
+    parser.add_argument("--out", default=os.path.join(ARTIFACTS_DIR, "xgb_ensemble_fused.npz"))
+    parser.add_argument("--rows", type=int, default=20000, help="rows used to validate the export")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="max abs diff allowed on mean/std")
+    args = parser.parse_args()
+
+    print(f"[export_fused_ensemble] Loading {args.ensemble}")
+    models = joblib.load(args.ensemble)
+    fused = FusedEnsemble.from_models(models)
+    print(f"  {fused.n_members} members, {fused.n_boosters} boosters, {fused.n_trees} trees, "
+          f"{fused.feature.shape[0]:,} nodes, max depth {fused.max_depth}")
+
+    X = load_validation_rows(args.rows)
+    ref_mean, ref_std = sklearn_mean_std(models, X)
+    fused_mean, fused_std = fused.predict_mean_std(X)
+    err_mean = float(np.max(np.abs(fused_mean - ref_mean)))
+    err_std = float(np.max(np.abs(fused_std - ref_std)))
+    print(f"  max |mean diff| = {err_mean:.3e}, max |std diff| = {err_std:.3e}")
+    if max(err_mean, err_std) > args.tolerance:
+        raise SystemExit(f"[export_fused_ensemble] Export differs from sklearn by more than {args.tolerance}; not saved.")
+
+    p50, p99 = single_row_latency_us(lambda row: sklearn_mean_std(models, row), X)
+    print(f"  sklearn members, single row: p50 {p50:,.0f} us, p99 {p99:,.0f} us")
+    p50, p99 = single_row_latency_us(fused.predict_mean_std, X)
+    print(f"  fused evaluator, single row: p50 {p50:,.0f} us, p99 {p99:,.0f} us")
+
+    fused.save(args.out)
+    print(f"[export_fused_ensemble] Fused ensemble saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.model_bundle import ModelBundle
+from backend.engine.synthetic_transactions import synthetic_workload
+
+# Batches stay on the fused evaluator in the reference engine too (it hands larger ones to XGBoost)
+_CHUNK_ROWS = 256
+
+
+def bundle_from_engine(engine):
+    """A ModelBundle of everything `engine` serves; it must run on the NumPy backends."""
+    components = {
+        "ensemble": engine.fused_ensemble.to_arrays(),
+        "v2_svm": engine.v2_svm.to_arrays(),
+    }
+    aliases = {}
+    if engine.anomaly_model is not None:
+        components["isolation_forest"] = engine.anomaly_model.to_arrays()
+    if engine.v3_svm is engine.v2_svm:
+        aliases["v3_svm"] = "v2_svm"
+    elif engine.v3_svm is not None:
+        components["v3_svm"] = engine.v3_svm.to_arrays()
+    if engine.shap_explainer is not None:
+        components["explainer"] = engine.shap_explainer.to_arrays()
+
+    settings = {name: getattr(engine, name) for name in DecisionEngine.SETTINGS}
+    sources = {os.path.relpath(path, PROJECT_ROOT): digest for path, digest in engine.registry.digests.items()}
+    return ModelBundle(components, aliases=aliases, settings=settings, sources=sources)
+
+
+def mismatches(expected, actual, prefix=""):
+    """Fields of two evaluate_batch results that differ (the timestamp aside)."""
+    if isinstance(expected, dict):
+        out = []
+        for key in expected.keys() | actual.keys():
+            if key != "timestamp":
+                out += mismatches(expected.get(key), actual.get(key), f"{prefix}{key}.")
+        return out
+    if isinstance(expected, np.ndarray):
+        same = isinstance(actual, np.ndarray) and expected.shape == actual.shape and np.array_equal(expected, actual)
+    else:
+        same = expected == actual
+    return [] if same else [prefix.rstrip(".")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack every served model into one memory-mappable bundle.")
+    parser.add_argument("--out", default=os.path.join(ARTIFACTS_DIR, "models.bundle"))
+    parser.add_argument("--rows", type=int, default=4096, help="synthetic rows used to validate the bundle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-explainer", action="store_true", help="leave the SHAP explainer out")
+    args = parser.parse_args()
+
+    print("[export_model_bundle] Loading the engine from its pickles on the NumPy backends...")
+    t0 = time.perf_counter()
+    reference = DecisionEngine(
+        ensemble_backend="fused",
+        anomaly_backend="packed",
+        svm_backend="linear",
+        explainer_backend="path",
+        explainer_mode="lazy" if args.no_explainer else "eager",
+        collect_metrics=False,
+    )
+    pickle_secs = time.perf_counter() - t0
+
+    bundle = bundle_from_engine(reference)
+    for name, arrays in bundle.components.items():
+        size = sum(a.nbytes for a in arrays.values())
+        print(f"  {name:<17} {len(arrays):>3} arrays {size / 1e6:>9,.2f} MB")
+    for name, target in bundle.aliases.items():
+        print(f"  {name:<17} -> {target}")
+
+    candidate = f"{args.out}.candidate"
+    checksum = bundle.save(candidate)
+    try:
+        t0 = time.perf_counter()
+        ModelBundle.load(candidate, verify=False)
+        map_secs = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ModelBundle.load(candidate, verify=True)
+        verify_secs = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        served = DecisionEngine(bundle_path=candidate, explainer_mode="eager", collect_metrics=False)
+        bundle_secs = time.perf_counter() - t0
+
+        raw_X, v1 = synthetic_workload(reference, args.rows, seed=args.seed)
+        routes, counts = np.unique(v1, return_counts=True)
+        print("[export_model_bundle] Validating on " + ", ".join(f"{c} {r}" for r, c in zip(routes, counts)) + " rows")
+        bad = set()
+        for lo in range(0, raw_X.shape[0], _CHUNK_ROWS):
+            chunk = raw_X[lo:lo + _CHUNK_ROWS]
+            bad.update(mismatches(reference.evaluate_batch(chunk), served.evaluate_batch(chunk)))
+        for i in range(0, raw_X.shape[0], max(1, raw_X.shape[0] // 200)):  # the per-row path on a sample
+            bad.update(mismatches(reference.evaluate_transaction(raw_X[i:i + 1]), served.evaluate_transaction(raw_X[i:i + 1])))
+        if bad:
+            raise SystemExit(f"[export_model_bundle] Bundle results differ from the pickles in {sorted(bad)}; not saved.")
+    except BaseException:
+        os.remove(candidate)
+        raise
+
+    os.replace(candidate, args.out)
+    print(f"  {os.path.getsize(args.out) / 1e6:,.2f} MB, sha256 {checksum[:16]}...")
+    print(f"  map {map_secs * 1e3:.1f} ms, map + verify {verify_secs * 1e3:.1f} ms")
+    print(f"  engine start with the SHAP explainer: {pickle_secs:.2f}s from pickles (evaluators built at load), "
+          f"{bundle_secs:.2f}s from the bundle")
+    print(f"[export_model_bundle] Bundle saved to {args.out}; serve it with MARI_MODEL_BUNDLE={args.out}")
+
+
+if __name__ == "__main__":
+    main()
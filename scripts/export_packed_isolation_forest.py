@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.packed_isolation_forest import PackedIsolationForest
+from scripts.export_fused_ensemble import load_validation_rows, single_row_latency_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Isolation Forest as packed NumPy arrays.")
+    parser.add_argument("--forest", default=os.path.join(ARTIFACTS_DIR, "isolation_forest.pkl"))
+    parser.add_argument("--out", default=os.path.join(ARTIFACTS_DIR, "isolation_forest_packed.npz"))
+    parser.add_argument("--rows", type=int, default=20000, help="rows used to validate the export")
+    parser.add_argument("--tolerance", type=float, default=1e-12, help="max abs diff allowed on decision_function")
+    args = parser.parse_args()
+
+    print(f"[export_packed_isolation_forest] Loading {args.forest}")
+    forest = joblib.load(args.forest)
+    packed = PackedIsolationForest.from_sklearn(forest)
+    print(f"  {packed.n_trees} trees, {packed.feature.shape[0]:,} nodes, max depth {packed.max_depth}")
+
+    X = load_validation_rows(args.rows)
+    t0 = time.perf_counter()
+    reference = forest.decision_function(X)
+    sklearn_secs = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    scores = packed.decision_function(X)
+    packed_secs = time.perf_counter() - t0
+
+    err = float(np.max(np.abs(scores - reference)))
+    print(f"  max |decision_function diff| = {err:.3e}")
+    if err > args.tolerance:
+        raise SystemExit(f"[export_packed_isolation_forest] Export differs from sklearn by more than {args.tolerance}; not saved.")
+
+    print(f"  batch of {X.shape[0]:,}: sklearn {sklearn_secs:.3f}s, packed {packed_secs:.3f}s")
+    p50, p99 = single_row_latency_us(forest.decision_function, X)
+    print(f"  sklearn forest, single row: p50 {p50:,.0f} us, p99 {p99:,.0f} us")
+    p50, p99 = single_row_latency_us(packed.decision_function, X)
+    print(f"  packed forest, single row: p50 {p50:,.0f} us, p99 {p99:,.0f} us")
+
+    packed.save(args.out)
+    print(f"[export_packed_isolation_forest] Packed forest saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.decision_journal import journal_frame, journal_segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize (and export) a decision journal written by the API.")
+    parser.add_argument("directory", help="the API's MARI_JOURNAL_DIR")
+    parser.add_argument("--since", help="only records at or after this UTC time, e.g. 2026-01-31T12:00")
+    parser.add_argument("--features", action="store_true", help="include the raw input features in --output")
+    parser.add_argument("--output", help="write the decoded records to this .csv or .parquet file")
+    args = parser.parse_args()
+
+    segments = journal_segments(args.directory)
+    if not segments:
+        raise SystemExit(f"No journal segments in {args.directory}")
+    frame = journal_frame(args.directory, features=args.features)
+    if args.since:
+        frame = frame[frame["ts"] >= pd.Timestamp(args.since)]
+    print(f"[journal_report] {len(frame):,} records in {len(segments)} segments "
+          f"({frame['ts'].min()} to {frame['ts'].max()})")
+
+    pd.set_option("display.width", 200)
+    print("\n[journal_report] Decisions per requested version:")
+    print(frame.pivot_table(index="decision", columns="version", values="ts", aggfunc="count", fill_value=0))
+    print("\n[journal_report] Per model set:")
+    print(frame.groupby("model_set").agg(
+        records=("ts", "size"), first=("ts", "min"), last=("ts", "max"),
+        mean_risk=("risk_score", "mean"), manual_review_cost=("manual_review_cost", "sum"),
+    ))
+    pend = frame[frame["v4_decision"] == "PEND"]
+    if len(pend):
+        print("\n[journal_report] Top PEND reason features:")
+        print(pend["shap_feature_1"].value_counts().head(10).to_string())
+
+    if args.output:
+        if args.output.endswith(".parquet"):
+            frame.to_parquet(args.output, index=False)
+        else:
+            frame.to_csv(args.output, index=False)
+        print(f"\n[journal_report] Records written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
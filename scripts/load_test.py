@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.synthetic_transactions import synthetic_candidates
+
+PERCENTILES = (50, 90, 99, 99.9)
+REQUEST_KINDS = ("predict", "batch", "health")
+
+
+# ============================================================
+# TRAFFIC
+# ============================================================
+
+def parse_mix(spec):
+    """"predict=0.9,batch=0.1" -> (kinds, probabilities)."""
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in REQUEST_KINDS:
+            raise SystemExit(f"Unknown request kind '{kind}'. Choose from: {', '.join(REQUEST_KINDS)}")
+        mix[kind] = float(weight or 1.0)
+    weights = np.array(list(mix.values()))
+    return list(mix), weights / weights.sum()
+
+
+def load_rows(source, fraud_share, n, seed):
+    """Raw 31-column rows to replay: the test split (optionally fraud-enriched) or synthetic ones."""
+    rng = np.random.default_rng(seed)
+    if source == "synthetic":
+        return synthetic_candidates(n, rng)
+
+    from backend.engine.dataset_cache import load_dataset
+
+    data = load_dataset()
+    X_test = data.features("test", log_amount=False)
+    raw_X = np.column_stack([
+        X_test["hour"].values * 3600.0,
+        X_test[[f"V{i}" for i in range(1, 29)]].values,
+        X_test["Amount"].values,
+        X_test["delta_time"].values,
+    ])
+    if fraud_share is None:
+        return raw_X[rng.integers(0, raw_X.shape[0], n)]
+    labels = data.labels("test").to_numpy()
+    fraud, legit = np.flatnonzero(labels == 1), np.flatnonzero(labels == 0)
+    n_fraud = int(round(n * fraud_share))
+    picks = np.concatenate([rng.choice(fraud, n_fraud), rng.choice(legit, n - n_fraud)])
+    return raw_X[rng.permutation(picks)]
+
+
+class Traffic:
+    """Request i of the run: kind drawn from the mix, rows replayed in order (cycling)."""
+
+    def __init__(self, rows, kinds, probs, batch_rows, version, shape, seed):
+        self.rows = rows
+        self.kinds = np.random.default_rng(seed).choice(len(kinds), size=1 << 16, p=probs)
+        self.kind_names = kinds
+        self.batch_rows = batch_rows
+        self.params = {"version": version, "shape": shape}
+        self._next_row = 0
+
+    def _take(self, n):
+        idx = (self._next_row + np.arange(n)) % self.rows.shape[0]
+        self._next_row = int(idx[-1]) + 1
+        return self.rows[idx].tolist()
+
+    def request(self, i):
+        """(kind, method, path, params, json body) of request i."""
+        kind = self.kind_names[self.kinds[i % self.kinds.size]]
+        if kind == "predict":
+            return kind, "POST", "/predict", self.params, {"features": self._take(1)[0]}
+        if kind == "batch":
+            return kind, "POST", "/predict/batch", {"version": self.params["version"]}, {"features": self._take(self.batch_rows)}
+        return kind, "GET", "/health", None, None
+
+
+# ============================================================
+# LOAD GENERATION
+# ============================================================
+
+class Recorder:
+    """Per-request outcomes. Corrected latency runs from the request's intended send time."""
+
+    def __init__(self):
+        self.samples = []  # (kind, status, service_secs, corrected_secs, completed_at)
+
+    def add(self, kind, status, service, corrected, completed_at):
+        self.samples.append((kind, status, service, corrected, completed_at))
+
+
+async def send(client, traffic, i, intended, recorder, timeout):
+    kind, method, path, params, body = traffic.request(i)
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, params=params, json=body, timeout=timeout)
+        status = response.status_code
+        # Errors the API reports in a 200 body (e.g. a wrong feature count) count as errors too
+        if status == 200 and kind == "predict" and b'"error"' in response.content[:64]:
+            status = 422
+    except Exception:
+        status = 0  # connection error or timeout
+    done = time.perf_counter()
+    recorder.add(kind, status, done - started, done - intended, done)
+
+
+async def open_loop(client, traffic, recorder, args):
+    """
+    Requests are issued on a fixed schedule (uniform or Poisson arrivals at --rate) no
+    matter how fast responses come back. At most --concurrency are in flight; a request
+    that has to wait for a slot still counts its latency from its scheduled time, so a
+    stalled server shows up in the tail instead of slowing the generator down
+    (coordinated omission).
+    """
+    rng = np.random.default_rng(args.seed)
+    n = int(args.rate * args.duration)
+    gaps = rng.exponential(1.0 / args.rate, n) if args.arrivals == "poisson" else np.full(n, 1.0 / args.rate)
+    offsets = np.cumsum(gaps) - gaps[0]
+    slots = asyncio.Semaphore(args.concurrency)
+    tasks = []
+
+    async def one(i, intended):
+        async with slots:
+            await send(client, traffic, i, intended, recorder, args.timeout)
+
+    start = time.perf_counter()
+    for i, offset in enumerate(offsets):
+        intended = start + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i, intended)))
+    await asyncio.gather(*tasks)
+    return start
+
+
+async def closed_loop(client, traffic, recorder, args):
+    """
+    --concurrency users each send a request, wait for the answer and send the next. With
+    --rate, each user paces itself to rate / concurrency and corrected latency counts
+    from the paced send time, as in wrk2; without it users go flat out and corrected
+    latency equals service time.
+    """
+    start = time.perf_counter()
+    deadline = start + args.duration
+    counter = iter(range(1 << 62))
+    interval = args.concurrency / args.rate if args.rate else 0.0
+
+    async def user(u):
+        intended = start + (u * interval / args.concurrency if interval else 0.0)
+        while True:
+            now = time.perf_counter()
+            if interval:
+                if intended >= deadline:
+                    return
+                if intended > now:
+                    await asyncio.sleep(intended - now)
+            else:
+                if now >= deadline:
+                    return
+                intended = now
+            await send(client, traffic, next(counter), intended, recorder, args.timeout)
+            intended += interval
+
+    await asyncio.gather(*(user(u) for u in range(args.concurrency)))
+    return start
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def summarize(samples, elapsed):
+    statuses = np.array([s[1] for s in samples])
+    service = np.array([s[2] for s in samples]) * 1e3
+    corrected = np.array([s[3] for s in samples]) * 1e3
+    ok = statuses == 200
+    summary = {
+        "requests": int(statuses.size),
+        "throughput_rps": round(int(ok.sum()) / elapsed, 1),
+        "error_rate": round(float(np.mean(~ok)), 5) if statuses.size else 0.0,
+        "shed_503": int(np.sum(statuses == 503)),
+        "failed": int(np.sum(statuses == 0)),
+    }
+    for name, values in (("latency_ms", service[ok]), ("corrected_latency_ms", corrected[ok])):
+        if values.size:
+            summary[name] = {f"p{p:g}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+            summary[name]["max"] = round(float(values.max()), 3)
+    return summary
+
+
+def report(recorder, start, args):
+    # Drop the warm-up period: connections opening, lazy model loads
+    cutoff = start + args.warmup
+    samples = [s for s in recorder.samples if s[4] - s[3] >= cutoff]
+    elapsed = max(1e-9, max((s[4] for s in samples), default=cutoff) - cutoff)
+    results = {"all": summarize(samples, elapsed)}
+    for kind in REQUEST_KINDS:
+        subset = [s for s in samples if s[0] == kind]
+        if subset:
+            results[kind] = summarize(subset, elapsed)
+
+    for name, summary in results.items():
+        print(f"\n[load_test] {name}: {summary['requests']:,} requests, {summary['throughput_rps']:,.1f} ok/s, "
+              f"error rate {summary['error_rate']:.2%} ({summary['shed_503']} shed, {summary['failed']} failed)")
+        for key, label in (("latency_ms", "service  "), ("corrected_latency_ms", "corrected")):
+            if key in summary:
+                cols = "  ".join(f"{p} {v:>9.2f}" for p, v in summary[key].items())
+                print(f"[load_test]   {label} ms: {cols}")
+    return results
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+async def run(args):
+    try:
+        import httpx  # optional: only needed to generate load
+    except ImportError:
+        raise SystemExit("scripts/load_test.py needs httpx (pip install httpx)")
+
+    kinds, probs = parse_mix(args.mix)
+    rows = load_rows(args.source, args.fraud_share, args.rows, args.seed)
+    traffic = Traffic(rows, kinds, probs, args.batch_rows, args.version, args.shape, args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits)
+        print(f"[load_test] Target: {args.url}")
+    else:
+        # In-process: same event loop and CPU as the generator, so use it to compare
+        # configurations, and a real server (--url) to size pods
+        import api.main
+
+        api.main.start_serving()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.main.app), base_url="http://mari", limits=limits)
+        print("[load_test] Target: api.main in-process")
+
+    mode = f"{args.mode}-loop" + (f" at {args.rate:g} req/s" if args.rate else "")
+    print(f"[load_test] {mode}, {args.concurrency} connections, {args.duration:g}s "
+          f"(first {args.warmup:g}s discarded), mix {dict(zip(kinds, np.round(probs, 3).tolist()))}")
+    recorder = Recorder()
+    async with client:
+        if args.mode == "open":
+            start = await open_loop(client, traffic, recorder, args)
+        else:
+            start = await closed_loop(client, traffic, recorder, args)
+    if not args.url:
+        api.main.stop_serving()
+    return report(recorder, start, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /predict with open- or closed-loop HTTP load.")
+    parser.add_argument("--url", help="server base URL, e.g. http://localhost:8000 (default: api.main in-process)")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rate", type=float, help="requests/s: the arrival rate (open) or total pacing (closed)")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="poisson", help="open-loop arrival process")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections; closed-loop users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds excluded from the report")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", default="predict=1", help="request kinds with weights, e.g. predict=0.9,batch=0.08,health=0.02")
+    parser.add_argument("--batch-rows", type=int, default=64, help="rows per /predict/batch request")
+    parser.add_argument("--source", choices=("test", "synthetic"), default="test", help="rows to replay")
+    parser.add_argument("--fraud-share", type=float, help="share of fraud rows drawn from the test split")
+    parser.add_argument("--rows", type=int, default=20000, help="distinct rows to replay")
+    parser.add_argument("--version", default="V4")
+    parser.add_argument("--shape", default="standard", help="/predict response shape")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    args = parser.parse_args()
+    if args.mode == "open" and not args.rate:
+        parser.error("--mode open needs --rate")
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\n[load_test] Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESULT_PREFIX = "COLD_START_RESULT "
+
+# Runs in a fresh interpreter: time until the API module is importable (scoring ready),
+# then until the SHAP explainer is built (explanations ready).
+PROBE = f"""
+import json, time
+t0 = time.perf_counter()
+import api.main
+scoring = time.perf_counter() - t0
+api.main.engine.load_explainer()
+explanations = time.perf_counter() - t0
+print({RESULT_PREFIX!r} + json.dumps({{"scoring": scoring, "explanations": explanations}}))
+"""
+
+
+def probe(shap_load):
+    # "lazy" here: nothing is started at import, the probe then loads the explainer itself
+    env = dict(os.environ, MARI_SHAP_LOAD=shap_load)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=PROJECT_ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    line = next(l for l in out.splitlines() if l.startswith(RESULT_PREFIX))
+    return json.loads(line[len(RESULT_PREFIX):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold start with eager vs deferred SHAP loading.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    medians = {}
+    for shap_load in ("eager", "lazy"):
+        runs = [probe(shap_load) for _ in range(args.repeats)]
+        medians[shap_load] = {key: float(np.median([r[key] for r in runs])) for key in ("scoring", "explanations")}
+        print(f"[measure_cold_start] {shap_load:<5}: scoring ready {medians[shap_load]['scoring']:.2f}s, "
+              f"explanations ready {medians[shap_load]['explanations']:.2f}s (median of {args.repeats})")
+
+    saved = medians["eager"]["scoring"] - medians["lazy"]["scoring"]
+    print(f"[measure_cold_start] Deferring SHAP serves scoring {saved:.2f}s sooner "
+          f"({saved / medians['eager']['scoring']:.0%} of the eager cold start).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import os
 import shutil
-import pandas as pd
-import numpy as np
+import sys
 import joblib
-from sklearn.model_selection import train_test_split
 from xgboost import XGBClassifier
 
 # Define paths
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.dataset_cache import load_dataset
+
 ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
 os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 
@@ -42,19 +44,8 @@ def copy_models():
 
 def train_shap_model():
     print("[prepare_artifacts] Training SHAP-compatible raw XGBoost model...")
-    csv_path = os.path.join(PROJECT_ROOT, "creditcard_phase0_clean.csv")
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"Clean CSV not found at {csv_path}")
-        
-    df = pd.read_csv(csv_path)
-    df["Amount"] = np.log1p(df["Amount"])
-    
-    X = df.drop(columns=["Class"])
-    y = df["Class"]
-    
-    X_train, _, y_train, _ = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    data = load_dataset(os.path.join(PROJECT_ROOT, "creditcard_phase0_clean.csv"))
+    X_train, _, y_train, _ = data.train_test_split()
     
     scale_pos_weight = (len(y_train) - y_train.sum()) / y_train.sum()
     
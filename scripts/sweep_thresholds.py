@@ -0,0 +1,133 @@
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.dataset_cache import CACHE_DIR, load_dataset
+from backend.engine.model_registry import file_digest
+from backend.engine.threshold_sweep import THRESHOLD_NAMES, VERSIONS, SweepSignals, decision_names, sweep
+
+# Bumped when the cached signals change meaning: 2 scores rows in the engine's raw layout
+SIGNALS_VERSION = 2
+
+# Swept when no --grid is given: 1,440 combinations across V1 and V3
+DEFAULT_GRID = [
+    "auth_threshold=0.10:0.50:0.05",
+    "uncertainty_threshold=0.005:0.040:0.005",
+    "ds_conflict_human=0.15:0.35:0.05",
+    "ds_bel_auto_decline=0.80:0.95:0.05",
+]
+
+
+def parse_grid(specs):
+    """NAME=start:stop:step (inclusive) or NAME=v1,v2,... -> {name: values}."""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in THRESHOLD_NAMES:
+            raise SystemExit(f"Unknown threshold '{name}'. Choose from: {', '.join(THRESHOLD_NAMES)}")
+        if ":" in values:
+            start, stop, step = (float(v) for v in values.split(":"))
+            grid[name] = np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+        else:
+            grid[name] = [float(v) for v in values.split(",")]
+    return grid
+
+
+def fingerprint(data):
+    """Ties cached signals to the dataset and to every model artifact."""
+    h = hashlib.sha256(f"{SIGNALS_VERSION}:{data.manifest['source_sha256']}".encode())
+    for path in sorted(glob.glob(os.path.join(ARTIFACTS_DIR, "*.pkl"))):
+        h.update(f"{os.path.basename(path)}:{file_digest(path)}".encode())
+    return h.hexdigest()
+
+
+def load_signals(path, refresh):
+    data = load_dataset()
+    stamp = fingerprint(data)
+    if not refresh and os.path.exists(path):
+        signals = SweepSignals.load(path)
+        if signals.fingerprint == stamp:
+            print(f"[sweep_thresholds] Cached signals loaded from {path} ({signals.n_rows:,} rows).")
+            return signals, data
+        print("[sweep_thresholds] Cached signals are stale (data or models changed).")
+
+    from backend.engine.decision_engine import DecisionEngine
+
+    print("[sweep_thresholds] Scoring the test split once (ensemble, Isolation Forest, SVM, DS fusion)...")
+    t0 = time.perf_counter()
+    engine = DecisionEngine(explainer_mode="lazy")
+    raw_X = data.raw_features("test")
+    signals = SweepSignals.from_engine(engine, raw_X, data.labels("test").to_numpy(), stamp)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    signals.save(path)
+    print(f"[sweep_thresholds] Signals cached to {path} ({time.perf_counter() - t0:.1f}s).")
+    return signals, data
+
+
+def verify(signals, data):
+    """Baseline thresholds through the sweep router vs DecisionEngine.evaluate_batch."""
+    from backend.engine.decision_engine import DecisionEngine
+
+    engine = DecisionEngine(explainer_mode="lazy")
+    raw_X = data.raw_features("test")
+    batch = engine.evaluate_batch(raw_X, version="V4")
+    ok = True
+    for version in VERSIONS:
+        expected = batch["trace"][f"{version.lower()}_decision"]
+        mismatches = int(np.sum(decision_names(signals.route({}, version)) != expected))
+        print(f"[sweep_thresholds] {version}: {mismatches} decisions differ from evaluate_batch")
+        ok &= mismatches == 0
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-route the test split under a grid of routing thresholds.")
+    parser.add_argument("--grid", action="append", metavar="NAME=START:STOP:STEP|NAME=V1,V2",
+                        help="threshold values to sweep (repeatable); unswept thresholds keep the engine's values")
+    parser.add_argument("--version", choices=VERSIONS, default="V4")
+    parser.add_argument("--sort", default="total_cost", help="result column to rank combinations by")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--signals", default=os.path.join(CACHE_DIR, "sweep_signals.npz"))
+    parser.add_argument("--refresh", action="store_true", help="re-score even if the cached signals are current")
+    parser.add_argument("--verify", action="store_true", help="check the router against evaluate_batch first")
+    parser.add_argument("--output", help="write every combination to this CSV")
+    args = parser.parse_args()
+
+    signals, data = load_signals(args.signals, args.refresh)
+    if args.verify and not verify(signals, data):
+        sys.exit(1)
+
+    grid = parse_grid(args.grid or DEFAULT_GRID)
+    n_combos = int(np.prod([len(values) for values in grid.values()]))
+    print(f"[sweep_thresholds] Sweeping {n_combos:,} combinations x {signals.n_rows:,} rows ({args.version})...")
+    t0 = time.perf_counter()
+    results = sweep(signals, grid, args.version)
+    secs = time.perf_counter() - t0
+    print(f"[sweep_thresholds] Done in {secs:.2f}s ({n_combos / secs:,.0f} combinations/s).")
+
+    baseline = sweep(signals, {name: [signals.thresholds[name]] for name in grid}, args.version)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", 40)
+    print("\n[sweep_thresholds] Baseline (engine thresholds):")
+    print(baseline.to_string(index=False))
+    print(f"\n[sweep_thresholds] Top {args.top} by {args.sort}:")
+    print(results.sort_values(args.sort).head(args.top).to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n[sweep_thresholds] All combinations written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+# Define paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+sys.path.append(PROJECT_ROOT)
+
+from backend.engine.dataset_cache import load_dataset
+from backend.engine.ensemble_training import train_parallel, train_serial_isolated
+
+
+def fmt_mb(value):
+    return "n/a" if value is None else f"{value:,.0f} MB"
+
+
+def test_probs(models, X_test):
+    return np.vstack([model.predict_proba(X_test)[:, 1] for model in models])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the bootstrap XGBoost ensemble (artifacts/xgb_ensemble.pkl).")
+    parser.add_argument("--mode", choices=("parallel", "serial", "compare"), default="parallel",
+                        help="compare trains both ways and saves the parallel ensemble")
+    parser.add_argument("--n-models", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="training processes (default: one per core, at most n-models)")
+    parser.add_argument("--output", default=os.path.join(ARTIFACTS_DIR, "xgb_ensemble.pkl"))
+    parser.add_argument("--tolerance", type=float, default=1e-6,
+                        help="compare fails (nothing saved) when any member probability differs by more")
+    args = parser.parse_args()
+
+    _, X_test, _, y_test = load_dataset().train_test_split()
+    runs = {}
+
+    if args.mode in ("serial", "compare"):
+        print(f"[train_ensemble] Serial loop: {args.n_models} members, one after another...")
+        t0 = time.perf_counter()
+        models, stats = train_serial_isolated(args.n_models)
+        runs["serial"] = (models, time.perf_counter() - t0, stats)
+
+    if args.mode in ("parallel", "compare"):
+        print(f"[train_ensemble] Parallel: {args.n_models} members across worker processes...")
+        t0 = time.perf_counter()
+        models, stats = train_parallel(args.n_models, args.workers)
+        wall = time.perf_counter() - t0
+        print(f"[train_ensemble]   {stats['workers']} workers x {stats['threads_per_member']} XGBoost threads")
+        runs["parallel"] = (models, wall, stats)
+
+    # Summed over the parent and its workers at the same instant; PSS counts shared pages once
+    print("\n[train_ensemble] mode       wall clock   peak RSS   peak PSS   ROC-AUC (mean)")
+    probs = {}
+    for mode, (models, wall, stats) in runs.items():
+        probs[mode] = test_probs(models, X_test)
+        auc = roc_auc_score(y_test, probs[mode].mean(axis=0))
+        print(f"[train_ensemble] {mode:<9} {wall:>9.1f}s   {fmt_mb(stats['peak_rss_mb']):>9}   "
+              f"{fmt_mb(stats['peak_pss_mb']):>9}   {auc:.6f}")
+    if len(runs) == 2:
+        diff = float(np.max(np.abs(probs["parallel"] - probs["serial"])))
+        print(f"[train_ensemble] max |member probability diff| on the test split: {diff:.3e}")
+        print(f"[train_ensemble] Speed-up: {runs['serial'][1] / runs['parallel'][1]:.2f}x")
+        if diff > args.tolerance:
+            print(f"[train_ensemble] FAILED: parallel members differ from serial by more than {args.tolerance:.0e}")
+            sys.exit(1)
+
+    models = runs["parallel" if "parallel" in runs else "serial"][0]
+    joblib.dump(models, args.output)
+    print(f"[train_ensemble] Ensemble saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()